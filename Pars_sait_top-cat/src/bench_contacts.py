@@ -0,0 +1,195 @@
+"""
+До/после для разбора блока «Контакты»: прежний parse_contacts_block
+(копия ниже — legacy_parse_contacts_block) против ContactExtractor.
+
+  - на dump_cattery.html и наборе синтетических блоков результаты совпадают;
+  - normalize_phone приводит типичные записи номеров к E.164;
+  - печатается время на блок: только разбор строк (текст блока готов)
+    и вместе с block.get_text().
+
+    python bench_contacts.py
+"""
+import re
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from contacts import ContactExtractor, normalize_phone
+from parse_all_topcat import find_contacts_header, parse_contacts_block
+
+HERE = Path(__file__).resolve().parent
+
+FIELDS = ("breeder_person", "breeder_rating", "city_country", "email", "phone", "site", "social_links")
+
+
+def legacy_parse_contacts_block(block):
+    """parse_contacts_block до перехода на contacts.py — без изменений."""
+
+    text = block.get_text("\n", strip=True)
+    lines = [l.strip() for l in text.split("\n") if l.strip()]
+
+    if lines and "контакты" in lines[0].lower():
+        lines = lines[1:]
+
+    breeder_person = None
+    breeder_rating = None
+    city_country = None
+    email = None
+    phone = None
+    site = None
+    social_links = []
+
+    if not lines:
+        return breeder_person, breeder_rating, city_country, email, phone, site, social_links
+
+    breeder_person = lines[0]
+
+    email_re = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+    phone_re = re.compile(r"\+?\d[\d\-\s\(\)]{6,}")
+    url_re = re.compile(r"https?://\S+")
+
+    for i, line in enumerate(lines):
+        low = line.lower()
+
+        if "рейтинг" in low and "заводчика" in low and i + 1 < len(lines):
+            breeder_rating = lines[i + 1]
+
+        if email is None:
+            m = email_re.search(line)
+            if m:
+                email = m.group(0)
+
+        if phone is None:
+
+            m = phone_re.search(line)
+            if m:
+                phone = line
+
+        for m in url_re.findall(line):
+            url = m.strip().rstrip(").,;")
+            if any(s in url for s in ("vk.com", "ok.ru", "instagram.com", "facebook.com", "t.me", "telegram.me")):
+                if url not in social_links:
+                    social_links.append(url)
+            else:
+                if site is None:
+                    site = url
+
+    for line in lines:
+        if line == breeder_person or (breeder_rating and line == breeder_rating):
+            continue
+        if "@" in line:
+            continue
+        if line.startswith("http"):
+            continue
+        if any(word in line for word in ["Россия", "Украина", "Беларусь", "Казахстан", "Latvia", "Lithuania",
+                                         "Estonia", "Germany", "France", "USA", "Россия."]):
+            city_country = line
+            break
+
+    return breeder_person, breeder_rating, city_country, email, phone, site, social_links
+
+
+class TextBlock:
+    """Готовый текст блока с интерфейсом get_text(), как у тега bs4."""
+
+    def __init__(self, text):
+        self.text = text
+
+    def get_text(self, separator="", strip=False):
+        return self.text
+
+
+SYNTHETIC_BLOCKS = [
+    "Контакты\nИванова Анна\nРейтинг заводчика\n+120.5\nМосква, Россия\n"
+    "anna@example.ru\n8 (916) 123-45-67\nhttps://vk.com/anna_cats\nhttps://anna-cats.ru/",
+    "Контакты\nPetrov Ivan\nRiga, Latvia\n+371 2 123 4567\n"
+    "https://www.instagram.com/petrov.cats/, https://m.vk.com/petrov\nhttp://petrov.lv",
+    "Контакты\nSmith\nAustin, USA\n+1 (512) 555-0100\nhttps://t.me/smithcats\n"
+    "https://facebook.com/smith.cats\nhttps://t.me/smithcats",
+    "Контакты\nКовальчук Олег\nРейтинг заводчика\n0\nКиев, Украина\n"
+    "kov@ukr.net; kov2@ukr.net\n+38 (067) 123-45-67, +38 (050) 765-43-21",
+    "Контакты\nЗаводчик без контактов",
+    "Контакты\nМинск, Беларусь\nhttps://ok.ru/group/1\n375291234567",
+    "Контакты",
+]
+
+
+def legacy_as_dict(result):
+    return dict(zip(FIELDS, result))
+
+
+def engine_as_dict(result):
+    return {key: result[key] for key in FIELDS}
+
+
+def bench(func, block, n, repeat=5):
+    """Лучшее из repeat замеров по n вызовов — время одного вызова."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            func(block)
+        best = min(best, time.perf_counter() - t0)
+    return best / n
+
+
+def main():
+    html = (HERE / "dump_cattery.html").read_text(encoding="utf-8")
+    block = find_contacts_header(BeautifulSoup(html, "html.parser")).find_parent("div")
+    text = block.get_text("\n", strip=True)
+
+    # Совпадение с прежним разбором
+    cases = [("dump_cattery.html", block)] + [
+        (f"synthetic {i}", TextBlock(t)) for i, t in enumerate(SYNTHETIC_BLOCKS, 1)
+    ]
+    for name, case in cases:
+        old = legacy_as_dict(legacy_parse_contacts_block(case))
+        new = engine_as_dict(parse_contacts_block(case))
+        assert old == new, f"{name}: расходится с прежним разбором\n{old}\n{new}"
+    print(f"Совпадает с прежним parse_contacts_block: {len(cases)} блоков")
+
+    contacts = parse_contacts_block(block)
+    for key, value in contacts.items():
+        print(f"  {key}: {value}")
+
+    # Телефоны в E.164
+    for raw, expected in [
+        ("+79202504004", "+79202504004"),
+        ("8 (916) 123-45-67", "+79161234567"),
+        ("916 123 45 67", "+79161234567"),
+        ("+371 2 123 4567", "+37121234567"),
+        ("+38 (067) 123-45-67, +38 (050) 765-43-21", "+380671234567"),
+        ("+1 (512) 555-0100", "+15125550100"),
+        ("рейтинг +120.5", None),
+    ]:
+        assert normalize_phone(raw) == expected, (raw, normalize_phone(raw), expected)
+    print("E.164: ok")
+
+    # Расширение без правки кода разбора
+    extended = ContactExtractor(countries={"Poland"}, social_domains={"youtube.com"})
+    extra = extended.extract(["Nowak", "Kraków, Poland", "https://youtube.com/@nowak"])
+    assert extra["city_country"] == "Kraków, Poland"
+    assert extra["social_links"] == ["https://youtube.com/@nowak"]
+
+    n = 5000
+    lines_block = TextBlock(text)
+    t_old = bench(legacy_parse_contacts_block, lines_block, n)
+    t_new = bench(parse_contacts_block, lines_block, n)
+    t_old_bs4 = bench(legacy_parse_contacts_block, block, n // 5)
+    t_new_bs4 = bench(parse_contacts_block, block, n // 5)
+    synthetic = [TextBlock(t) for t in SYNTHETIC_BLOCKS]
+    t_old_syn = bench(lambda blocks: [legacy_parse_contacts_block(b) for b in blocks], synthetic, n // 5)
+    t_new_syn = bench(lambda blocks: [parse_contacts_block(b) for b in blocks], synthetic, n // 5)
+
+    print("\n=== Время на блок «Контакты», мкс: прежний / ContactExtractor ===")
+    for name, old, new in [
+        ("dump_cattery.html, разбор строк", t_old, t_new),
+        ("dump_cattery.html, с get_text", t_old_bs4, t_new_bs4),
+        (f"синтетические, {len(synthetic)} блоков", t_old_syn, t_new_syn),
+    ]:
+        print(f"{name:34}: {old * 1e6:7.1f} / {new * 1e6:7.1f}  (быстрее в {old / new:.2f} раза)")
+
+
+if __name__ == "__main__":
+    main()
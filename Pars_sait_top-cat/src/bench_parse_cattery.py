@@ -0,0 +1,41 @@
+"""
+До/после для частичного разбора страницы питомника:
+parse_cattery_html в режимах full и partial на dump_cattery.html.
+Результаты должны совпадать, печатается скорость обоих режимов.
+"""
+import time
+from pathlib import Path
+
+from parse_all_topcat import parse_cattery_html
+
+HERE = Path(__file__).resolve().parent
+CATTERY_URL = "https://ru.top-cat.org/catteries/1621"
+
+
+def bench(html, mode, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        parse_cattery_html(html, CATTERY_URL, mode)
+    return (time.perf_counter() - t0) / n
+
+
+def main():
+    html = (HERE / "dump_cattery.html").read_text(encoding="utf-8")
+
+    full = parse_cattery_html(html, CATTERY_URL, "full")
+    partial = parse_cattery_html(html, CATTERY_URL, "partial")
+    print("=== Результат разбора ===")
+    for key, value in full.items():
+        print(f"{key}: {value}")
+    assert partial == full, f"partial расходится с full:\n{partial}\n{full}"
+
+    n = 200
+    t_full = bench(html, "full", n)
+    t_partial = bench(html, "partial", n)
+    print(f"\n=== dump_cattery.html, {n} прогонов ===")
+    print(f"full   : {t_full * 1000:7.2f} мс/стр")
+    print(f"partial: {t_partial * 1000:7.2f} мс/стр  (быстрее в {t_full / t_partial:.1f} раза)")
+
+
+if __name__ == "__main__":
+    main()
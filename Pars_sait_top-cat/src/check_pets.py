@@ -0,0 +1,100 @@
+"""
+Проверка сбора кошек через pets.json:
+  - страница кошки (dump_cat.html) разбирается в схему CAT_COLUMNS;
+  - ответ pets.json разных форм приводится к той же схеме;
+  - на стенде страница кошки запрашивается только тогда,
+    когда в JSON не хватает основных полей.
+"""
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import parse_all_topcat
+from crawl_journal import CrawlJournal
+from topcat_pets import CAT_COLUMNS, normalize_pets_list, parse_cat_html, pet_to_cat_row
+
+DUMP_CAT = (Path(__file__).resolve().parent / "dump_cat.html").read_text(encoding="utf-8")
+
+PETS = [
+    {   # полная запись — страница не нужна
+        "id": 528324, "name": "Mirrorofsoul Yars", "gender": "Кот",
+        "color": "n (aby)", "birthday": "01.02.2020",
+        "father": {"id": 1, "name": "Sire"}, "mother": {"id": 2, "name": "Dam"},
+    },
+    {   # неполная — дочитываем dump_cat.html
+        "id": 528326, "name": "Mirrorofsoul Lilit", "url": "/cats/528326",
+    },
+]
+
+
+class PetsHandler(BaseHTTPRequestHandler):
+    paths: list[str] = []
+
+    def do_GET(self):
+        type(self).paths.append(self.path)
+        if self.path.startswith("/pets.json"):
+            body, ctype = json.dumps({"pets": PETS}).encode(), "application/json"
+        elif self.path.startswith("/cats/"):
+            body, ctype = DUMP_CAT.encode("utf-8"), "text/html; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    print("=== Страница кошки ===")
+    row = parse_cat_html(DUMP_CAT, "https://ru.top-cat.org/cats/528326")
+    print(row)
+    assert list(row) == CAT_COLUMNS
+    assert row["cat_name"] == "Mirrorofsoul Lilit"
+    assert row["sex"] == "Кошка" and row["color"] == "n (aby)"
+    assert (row["father_id"], row["mother_id"]) == ("528324", "528325")
+    assert (row["cattery_id"], row["cattery_name"]) == ("6109", "Mirrorofsoul")
+
+    print("\n=== Формы ответа pets.json ===")
+    assert normalize_pets_list(PETS) == PETS
+    assert normalize_pets_list({"items": PETS}) == PETS
+    assert normalize_pets_list({"total": 2, "list": PETS}) == PETS
+    row = pet_to_cat_row(PETS[0], 1621, "https://ru.top-cat.org")
+    assert row["cat_url"] == "https://ru.top-cat.org/cats/528324"
+    assert (row["father"], row["father_id"]) == ("Sire", "1")
+    assert row["sex"] == "Кот" and row["cattery_id"] == "1621"
+
+    print("\n=== Стенд ===")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PetsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    parse_all_topcat.limiter.configure(0)
+    parse_all_topcat.cache.configure(enabled=False)
+
+    journal = CrawlJournal(Path(tempfile.mkdtemp()) / "cats.sqlite")
+    try:
+        cats, from_html = parse_all_topcat.crawl_cattery_cats(
+            "1621", journal, base_url=base,
+        )
+    finally:
+        server.shutdown()
+
+    rows = {r["cat_id"]: r for r in journal.rows("cat")}
+    print(PetsHandler.paths)
+    assert (cats, from_html) == (2, 1)
+    assert PetsHandler.paths == ["/pets.json?cattery_id=1621", "/cats/528326"]
+    assert rows["528324"]["source"] == "json"
+    assert rows["528326"]["source"] == "json+html"
+    assert rows["528326"]["mother_id"] == "528325"
+    assert rows["528326"]["cattery_id"] == "1621"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import re
+
+# Шаблоны компилируются один раз при импорте
+EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+PHONE_RE = re.compile(r"\+?\d[\d\-\s\(\)]{6,}")
+URL_RE = re.compile(r"https?://\S+")
+NON_DIGIT_RE = re.compile(r"\D")
+HOST_RE = re.compile(r"https?://(?:www\.)?([^/:?#\s]+)", re.I)
+
+# Строка — город/страна, если в ней есть одно из этих слов
+COUNTRIES = frozenset({
+    "Россия", "Украина", "Беларусь", "Казахстан",
+    "Latvia", "Lithuania", "Estonia", "Germany", "France", "USA",
+})
+
+# Ссылки на эти домены (и их поддомены) — соцсети, остальные — сайт
+SOCIAL_DOMAINS = frozenset({
+    "vk.com", "ok.ru", "instagram.com", "facebook.com", "t.me", "telegram.me",
+})
+
+# Код страны для номеров без «+»: 8XXXXXXXXXX и XXXXXXXXXX — российские
+DEFAULT_COUNTRY_CODE = "7"
+
+
+def normalize_phone(raw: str | None, country_code: str = DEFAULT_COUNTRY_CODE) -> str | None:
+    """
+    Телефон в формате E.164 (+79202504004) или None, если номер не похож
+    на телефон. Номера без «+» считаются номерами страны country_code,
+    ведущая 8 у 11-значного номера (8 920 ...) заменяется на код страны.
+    """
+    if not raw:
+        return None
+    m = PHONE_RE.search(raw)
+    return _e164(m.group(0), country_code) if m else None
+
+
+def _e164(number: str, country_code: str) -> str | None:
+    digits = NON_DIGIT_RE.sub("", number)
+    if not number.startswith("+"):
+        if len(digits) == 11 and digits[0] == "8":
+            digits = country_code + digits[1:]
+        elif len(digits) == 10:
+            digits = country_code + digits
+    # E.164: не больше 15 цифр вместе с кодом страны
+    if not 8 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+
+def url_host(url: str) -> str:
+    """Домен ссылки без www. в нижнем регистре."""
+    m = HOST_RE.match(url)
+    return m.group(1).lower() if m else ""
+
+
+class ContactExtractor:
+    """
+    Разбор строк блока «Контакты» за один проход.
+
+    Первая строка — заводчик; строка после «Рейтинг заводчика» — рейтинг;
+    первый e-mail; первая строка с телефоном (как есть и в E.164);
+    ссылки делятся на соцсети и сайт по домену; город/страна — первая
+    «обычная» строка (не заводчик, не рейтинг, не e-mail, не ссылка),
+    в которой встречается слово из списка стран.
+
+    Страны собираются в одно регулярное выражение, домен ссылки ищется
+    в множестве доменов соцсетей — без перебора списков на каждой строке.
+    Оба набора можно дополнить, не трогая код разбора:
+
+        extractor = ContactExtractor(countries=COUNTRIES | {"Poland"})
+    """
+
+    def __init__(self, countries=COUNTRIES, social_domains=SOCIAL_DOMAINS,
+                 country_code: str = DEFAULT_COUNTRY_CODE):
+        self.countries = frozenset(countries)
+        self.social_domains = frozenset(social_domains)
+        self.country_code = country_code
+        # Все страны — одно регулярное выражение: строка просматривается
+        # один раз, а не по разу на каждое слово списка
+        self._country_re = re.compile(
+            "|".join(re.escape(c) for c in sorted(self.countries, key=len, reverse=True))
+        )
+
+    def is_social(self, url: str) -> bool:
+        # сам домен и поддомены: vk.com, m.vk.com, ru-ru.facebook.com
+        parts = url_host(url).split(".")
+        return any(".".join(parts[i:]) in self.social_domains for i in range(len(parts) - 1))
+
+    def is_location(self, line: str) -> bool:
+        return self._country_re.search(line) is not None
+
+    def extract(self, lines: list[str]) -> dict:
+        """lines — непустые строки блока без заголовка «Контакты»."""
+        breeder_person = lines[0] if lines else None
+        breeder_rating = city_country = email = phone = phone_e164 = site = None
+        social_links = []
+        rating_index = None
+        country_search = self._country_re.search
+
+        for i, line in enumerate(lines):
+            low = line.lower()
+            if "рейтинг" in low and "заводчика" in low and i + 1 < len(lines):
+                breeder_rating = lines[i + 1]
+                rating_index = i + 1
+
+            has_at = "@" in line
+            if has_at and email is None:
+                m = EMAIL_RE.search(line)
+                if m:
+                    email = m.group(0)
+
+            if phone is None:
+                m = PHONE_RE.search(line)
+                if m:
+                    phone = line
+                    phone_e164 = _e164(m.group(0), self.country_code)
+
+            if "http" in line:
+                for m in URL_RE.findall(line):
+                    url = m.strip().rstrip(").,;")
+                    if self.is_social(url):
+                        if url not in social_links:
+                            social_links.append(url)
+                    elif site is None:
+                        site = url
+
+            if (city_country is None
+                    and i != rating_index and line != breeder_person
+                    and not has_at and not line.startswith("http")
+                    and country_search(line)):
+                city_country = line
+
+        return {
+            "breeder_person": breeder_person,
+            "breeder_rating": breeder_rating,
+            "city_country": city_country,
+            "email": email,
+            "phone": phone,
+            "phone_e164": phone_e164,
+            "site": site,
+            "social_links": social_links,
+        }
+
+
+# Экземпляр по умолчанию для parse_contacts_block
+CONTACTS = ContactExtractor()
+
+
+def block_lines(text: str) -> list[str]:
+    """Непустые строки текста блока без заголовка «Контакты»."""
+    lines = [line for line in map(str.strip, text.split("\n")) if line]
+    if lines and "контакты" in lines[0].lower():
+        lines = lines[1:]
+    return lines
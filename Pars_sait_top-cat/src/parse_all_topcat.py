@@ -1,8 +1,40 @@
+import argparse
+import os
+import queue
 import re
-import time
-import requests
+import socket
+import sys
+import threading
+from pathlib import Path
+
 from bs4 import BeautifulSoup
-from openpyxl import Workbook
+
+# Общие модули (ограничитель частоты, кэш и т.п.) лежат в src парсера top-dog
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Pars_sait_top-dog" / "src"))
+
+from contacts import CONTACTS, block_lines
+from crawl_journal import CrawlJournal
+from excel_stream import StreamingExcelWriter
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL, HttpCache
+from http_client import HttpClient
+from id_probe import (
+    DEFAULT_PROBED_PAGES, MISSING_STATUSES, ProbedPages, add_probe_arguments, probe_from_args,
+)
+from metrics import CrawlMetrics
+from pagination import DEFAULT_LISTING_CONCURRENCY, iter_listing
+from parquet_stream import StreamingParquetWriter, parquet_available
+from photo_store import DEFAULT_PHOTO_RPS, DEFAULT_PHOTO_WORKERS, PhotoStore, attach, photo_client
+from rate_limit import TokenBucket
+from sqlite_sink import SinkTable, SqliteSink
+from work_queue import DEFAULT_LEASE, WorkQueue
+from topcat_pets import (
+    CAT_COLUMNS,
+    fill_missing,
+    missing_fields,
+    normalize_pets_list,
+    parse_cat_html,
+    pet_to_cat_row,
+)
 
 BASE_URL = "https://ru.top-cat.org"
 
@@ -15,255 +47,754 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
+# Бюджет вежливости: в среднем запросов в секунду и сколько подряд без ожидания
+REQUESTS_PER_SECOND = 2.0
+RATE_BURST = 4
+
+# Повторы на 5xx/429/таймаутах: сколько раз и начальная пауза, секунды
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+limiter = TokenBucket(REQUESTS_PER_SECOND, RATE_BURST)
+
+# Дисковый кэш страниц, общий с парсером top-dog
+cache = HttpCache()
+
+# Метрики по стадиям (fetch, parse, export), общий модуль с top-dog
+metrics = CrawlMetrics()
+
+# Ответы на питомники, найденные перебором ID, — обходу, без второго скачивания.
+# Включается, только когда обход сам перебирает ID (не у координатора shard_crawl.py).
+probed_pages = ProbedPages(max_pages=0)
+
+# Общий клиент с top-dog: keep-alive вместо нового соединения на каждый
+# запрос, повторы с паузой. Запросы идут из основного потока и потоков
+# страниц списка.
+client = HttpClient(
+    HEADERS,
+    pool_size=1 + DEFAULT_LISTING_CONCURRENCY,
+    retries=RETRIES,
+    backoff=RETRY_BACKOFF,
+    before_request=limiter.acquire,
+    on_retry=lambda *_: metrics.count_retry(),
+)
+
+
+JSON_HEADERS = {**HEADERS, "Accept": "application/json, text/javascript, */*; q=0.01"}
+
+
+def http_get(url, headers=HEADERS):
+    """
+    Все запросы к сайту идут через дисковый кэш и общий клиент
+    (попадания в кэш бюджет запросов не расходуют, повторы — расходуют).
+    В метрики ответов и байт попадают только ответы сайта.
+    """
+    with metrics.timer("fetch"):
+        resp = cache.get(client, url, on_response=metrics.count_http_response,
+                         headers=headers, timeout=20)
+    if resp.from_cache:
+        metrics.count_cache_hit()
+    return resp
+
+
+def cattery_links_on_page(page, base_url=BASE_URL):
+    """HTML страницы /catteries?page=N и ссылки на питомники на ней (по порядку)."""
+    resp = http_get(f"{base_url}/catteries?page={page}")
+    if resp.status_code != 200:
+        raise RuntimeError(f"статус {resp.status_code}")
+
+    soup = BeautifulSoup(resp.text, "html.parser")
+    links = []
+    for a in soup.find_all("a", href=re.compile(r"^/catteries/\d+")):
+        href = a.get("href")
+        if not href:
+            continue
+        links.append(base_url + href if href.startswith("/") else href)
+    return resp.text, links
+
 
-def get_cattery_links(max_pages=None, pause=0.5):
+def iter_cattery_links(max_pages=None, base_url=BASE_URL,
+                       concurrency=DEFAULT_LISTING_CONCURRENCY):
     """
-    Собирает все ссылки на питомники со страниц /catteries?page=N.
+    Обходит страницы /catteries?page=N и отдаёт ссылки на питомники
+    по мере разбора страниц. Число страниц определяется заранее
+    (pagination.py), страницы скачиваются в concurrency потоков,
+    повторы отбрасываются по ID питомника.
 
-    max_pages: если None — идём до первой пустой страницы.
+    max_pages: если None — все страницы списка.
                если число — ограничиваемся этим количеством страниц.
+    base_url:  адрес сайта (другой — например, для локального replay_server).
     """
-    links = []
-    page = 1
+    return iter_listing(
+        lambda page: cattery_links_on_page(page, base_url),
+        key=cattery_id, concurrency=concurrency,
+        max_pages=max_pages, label="CATTERIES",
+    )
 
-    while True:
-        if max_pages is not None and page > max_pages:
-            break
 
-        url = f"{BASE_URL}/catteries?page={page}"
-        print(f"\n=== Страница {page} ===")
-        print("Запрос:", url)
+def cattery_exists(url):
+    """
+    Проверка ID для перебора (--discovery ids): 404 — питомника нет.
+    Ответ на найденный питомник parse_cattery берёт из probed_pages.
+    """
+    resp = http_get(url)
+    if resp.status_code in MISSING_STATUSES:
+        return False
+    resp.raise_for_status()
+    probed_pages.put(url, resp)
+    return True
+
 
-        resp = requests.get(url, headers=HEADERS, timeout=20)
-        if resp.status_code != 200:
-            print(f"Страница {page}: статус {resp.status_code}, прекращаю обход.")
-            break
+def cattery_id(url):
+    m = re.search(r"/catteries/(\d+)", url)
+    return m.group(1) if m else url
 
-        soup = BeautifulSoup(resp.text, "html.parser")
 
-        page_links = []
-        for a in soup.find_all("a", href=re.compile(r"^/catteries/\d+")):
-            href = a.get("href")
-            if not href:
-                continue
-            full_url = BASE_URL + href if href.startswith("/") else href
-            if full_url not in links:
-                links.append(full_url)
-                page_links.append(full_url)
+def get_cattery_links(max_pages=None, base_url=BASE_URL):
+    """
+    Собирает все ссылки на питомники со страниц /catteries?page=N одним списком.
+    """
+    return list(iter_cattery_links(max_pages, base_url))
 
-        print(f"Найдено новых ссылок на этой странице: {len(page_links)}")
-        print(f"Всего уникальных ссылок: {len(links)}")
 
-        if not page_links:
-            break
+def start_link_producer(links, maxsize=1000):
+    """
+    Запускает сбор ссылок в отдельном потоке и возвращает очередь,
+    из которой их можно забирать сразу, не дожидаясь конца пагинации.
+    Конец списка обозначается None.
+    """
+    link_queue = queue.Queue(maxsize=maxsize)
 
-        page += 1
-        time.sleep(pause)
+    def produce():
+        try:
+            for url in links:
+                link_queue.put(url)
+        except Exception as e:
+            print(f"ОШИБКА при сборе ссылок на питомники: {e}")
+        finally:
+            link_queue.put(None)
+
+    threading.Thread(target=produce, name="cattery-links", daemon=True).start()
+    return link_queue
 
-    return links
 
+def parse_contacts_block(block, extractor=CONTACTS):
+    """
+    Разбор блока «Контакты» (см. contacts.ContactExtractor).
+    Возвращает dict: breeder_person, breeder_rating, city_country,
+    email, phone, phone_e164, site, social_links (список).
+    """
+    return extractor.extract(block_lines(block.get_text("\n", strip=True)))
 
-def parse_contacts_block(block):
 
-    text = block.get_text("\n", strip=True)
-    lines = [l.strip() for l in text.split("\n") if l.strip()]
-    
-    if lines and "контакты" in lines[0].lower():
-        lines = lines[1:]
+# Режимы разбора страницы питомника:
+#   partial — строим дерево только для <h1> и блока «Контакты»;
+#   full    — разбираем страницу целиком (запасной вариант).
+PARSE_MODES = ("partial", "full")
+DEFAULT_PARSE_MODE = "partial"
 
-    breeder_person = None
-    breeder_rating = None
-    city_country = None
-    email = None
-    phone = None
-    site = None
-    social_links = []
+H1_RE = re.compile(r"<h1\b.*?</h1\s*>", re.I | re.S)
+HEADER_RE = re.compile(r"<(h[234])\b[^>]*>(.*?)</\1\s*>", re.I | re.S)
+DIV_TAG_RE = re.compile(r"<(/?)div\b", re.I)
 
-    if not lines:
-        return breeder_person, breeder_rating, city_country, email, phone, site, social_links
 
-    breeder_person = lines[0]
+def find_contacts_header(soup):
+    return soup.find(
+        lambda tag: tag.name in ("h2", "h3", "h4")
+        and "Контакты" in tag.get_text()
+    )
 
-    email_re = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
-    phone_re = re.compile(r"\+?\d[\d\-\s\(\)]{6,}")
-    url_re = re.compile(r"https?://\S+")
 
-    for i, line in enumerate(lines):
-        low = line.lower()
+def contacts_region(html):
+    """
+    Находит в сыром HTML кусок, который целиком занимает div,
+    содержащий заголовок «Контакты» (как header.find_parent("div")).
+    Возвращает (начало, конец) или None.
+    """
+    header = next(
+        (m for m in HEADER_RE.finditer(html) if "Контакты" in m.group(2)), None
+    )
+    if header is None:
+        return None
+
+    # Назад от заголовка — ближайший незакрытый <div>
+    depth = 0
+    start = None
+    for m in reversed(list(DIV_TAG_RE.finditer(html, 0, header.start()))):
+        if m.group(1):
+            depth += 1
+        elif depth:
+            depth -= 1
+        else:
+            start = m.start()
+            break
+    if start is None:
+        return None
+
+    # Вперёд — парный ему </div>
+    depth = 0
+    for m in DIV_TAG_RE.finditer(html, start):
+        if not m.group(1):
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            end = html.find(">", m.end())
+            return (start, end + 1) if end != -1 else None
+    return None
 
 
-        if "рейтинг" in low and "заводчика" in low and i + 1 < len(lines):
-            breeder_rating = lines[i + 1]
+def parse_cattery_regions(html):
+    """
+    Частичный разбор: дерево строится только для первого <h1>
+    и div с блоком «Контакты». Если вырезать куски не удалось —
+    возвращает None, и страницу нужно разобрать целиком.
+    """
+    m = H1_RE.search(html)
+    h1 = BeautifulSoup(m.group(0), "html.parser").find("h1") if m else None
 
+    region = contacts_region(html)
+    if region is None:
+        return None
+    block_soup = BeautifulSoup(html[region[0]:region[1]], "html.parser")
+    header = find_contacts_header(block_soup)
+    if header is None:
+        return None
 
-        if email is None:
-            m = email_re.search(line)
-            if m:
-                email = m.group(0)
+    return h1, header
 
 
-        if phone is None:
+def parse_cattery_html(html, url, mode=DEFAULT_PARSE_MODE):
+    """
+    Разбор уже скачанной страницы питомника (без сети).
+    """
+    m = re.search(r"/catteries/(\d+)", url)
+    cattery_id = m.group(1) if m else None
 
-            m = phone_re.search(line)
-            if m:
-                phone = line
+    regions = parse_cattery_regions(html) if mode == "partial" else None
+    if regions is None:
+        soup = BeautifulSoup(html, "html.parser")
+        h1 = soup.find("h1")
+        header = find_contacts_header(soup)
+    else:
+        h1, header = regions
 
+    cattery_name = h1.get_text(strip=True) if h1 else None
 
-        for m in url_re.findall(line):
-            url = m.strip().rstrip(").,;")
-            if any(s in url for s in ("vk.com", "ok.ru", "instagram.com", "facebook.com", "t.me", "telegram.me")):
-                if url not in social_links:
-                    social_links.append(url)
-            else:
-                if site is None:
-                    site = url
+    contacts = CONTACTS.extract([])
+    if header:
 
-    for line in lines:
-        if line == breeder_person or (breeder_rating and line == breeder_rating):
-            continue
-        if "@" in line:
-            continue
-        if line.startswith("http"):
-            continue
-        if any(word in line for word in ["Россия", "Украина", "Беларусь", "Казахстан", "Latvia", "Lithuania",
-                                         "Estonia", "Germany", "France", "USA", "Россия."]):
-            city_country = line
-            break
+        block = header.find_parent("div")
+        if block:
+            contacts = parse_contacts_block(block)
+    else:
+        print("ВНИМАНИЕ: блок 'Контакты' не найден, данные будут пустыми.")
 
-    return breeder_person, breeder_rating, city_country, email, phone, site, social_links
+    social_links = contacts["social_links"]
+    return {
+        "cattery_id": cattery_id,
+        "cattery_url": url,
+        "cattery_name": cattery_name,
+        "breeder_person": contacts["breeder_person"],
+        "breeder_rating": contacts["breeder_rating"],
+        "city_country": contacts["city_country"],
+        "email": contacts["email"],
+        "phone": contacts["phone"],
+        "phone_e164": contacts["phone_e164"],
+        "site": contacts["site"],
+        "social_links": ", ".join(social_links) if social_links else None,
+    }
 
 
-def parse_cattery(url):
+def parse_cattery(url, mode=DEFAULT_PARSE_MODE):
     """
     Парсит ОДИН питомник по его URL.
     Возвращает dict с полями:
       cattery_id, cattery_url, cattery_name,
       breeder_person, breeder_rating, city_country,
-      email, phone, site, social_links
+      email, phone, phone_e164, site, social_links
     """
     print(f"\n=== Парсим питомник ===")
     print("URL:", url)
 
-    resp = requests.get(url, headers=HEADERS, timeout=20)
+    resp = probed_pages.take(url)
+    if resp is None:
+        resp = http_get(url)
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-    
-    m = re.search(r"/catteries/(\d+)", url)
-    cattery_id = m.group(1) if m else None
+    with metrics.timer("parse"):
+        return parse_cattery_html(resp.text, url, mode)
 
-    h1 = soup.find("h1")
-    cattery_name = h1.get_text(strip=True) if h1 else None
 
-    header = soup.find(
-        lambda tag: tag.name in ("h2", "h3", "h4")
-        and "Контакты" in tag.get_text()
-    )
+def fetch_pets_json(cattery_id, base_url=BASE_URL):
+    """
+    Тот же запрос, что делает страница питомника:
+    pets.json?cattery_id=... — все питомцы одним ответом.
+    """
+    url = f"{base_url}/pets.json?cattery_id={cattery_id}"
+    resp = http_get(url, headers=JSON_HEADERS)
+    resp.raise_for_status()
+    return resp.json()
 
-    breeder_person = None
-    breeder_rating = None
-    city_country = None
-    email = None
-    phone = None
-    site = None
-    social_links = []
 
-    if header:
+def parse_cat(url):
+    """
+    Парсит страницу ОДНОЙ кошки — запасной путь, когда в pets.json
+    не хватает полей.
+    """
+    resp = http_get(url)
+    resp.raise_for_status()
+    with metrics.timer("parse"):
+        return parse_cat_html(resp.text, url)
 
-        block = header.find_parent("div")
-        if block:
-            (breeder_person,
-             breeder_rating,
-             city_country,
-             email,
-             phone,
-             site,
-             social_links) = parse_contacts_block(block)
-    else:
-        print("ВНИМАНИЕ: блок 'Контакты' не найден, данные будут пустыми.")
 
+def crawl_cattery_cats(cattery_id, journal, html_fallback=True, base_url=BASE_URL):
+    """
+    Кошки питомника: один запрос к pets.json, страницы кошек —
+    только для тех, у кого в JSON нет основных полей (CAT_CORE_FIELDS).
+    Каждая кошка пишется в журнал с parent_id = id питомника.
+    Возвращает (кошек, из них дочитано по HTML).
+    """
+    pets = normalize_pets_list(fetch_pets_json(cattery_id, base_url))
+    cats = 0
+    from_html = 0
+
+    for pet in pets:
+        row = pet_to_cat_row(pet, cattery_id, base_url)
+        cat_id = row["cat_id"]
+        if cat_id is None or journal.is_done("cat", cat_id, cattery_id):
+            continue
+
+        if html_fallback and missing_fields(row):
+            try:
+                if fill_missing(row, parse_cat(row["cat_url"])):
+                    from_html += 1
+            except Exception as e:
+                # Что есть из JSON — всё равно лучше, чем ничего
+                print(f"  ОШИБКА при дочитывании кошки {row['cat_url']}: {e}")
+
+        journal.record("cat", cat_id, row, parent_id=cattery_id)
+        metrics.count_rows("cat")
+        cats += 1
+
+    return cats, from_html
+
+
+def empty_cattery_row(url):
+    """
+    Строка-заглушка для питомника, который не удалось распарсить.
+    """
+    m = re.search(r"/catteries/(\d+)", url)
+    c_id = m.group(1) if m else None
     return {
-        "cattery_id": cattery_id,
+        "cattery_id": c_id,
         "cattery_url": url,
-        "cattery_name": cattery_name,
-        "breeder_person": breeder_person,
-        "breeder_rating": breeder_rating,
-        "city_country": city_country,
-        "email": email,
-        "phone": phone,
-        "site": site,
-        "social_links": ", ".join(social_links) if social_links else None,
+        "cattery_name": None,
+        "breeder_person": None,
+        "breeder_rating": None,
+        "city_country": None,
+        "email": None,
+        "phone": None,
+        "phone_e164": None,
+        "site": None,
+        "social_links": None,
     }
 
 
-def save_to_excel(rows, filename="topcat_catteries.xlsx"):
+def failed_cattery_rows(journal, base_url=BASE_URL):
     """
-    Сохраняет список словарей rows в Excel.
+    Заглушки питомников, которые так и не удалось распарсить, — по журналу.
+    Одни и те же для Excel, Parquet и базы, чтобы выгрузки совпадали.
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "catteries"
+    for c_id in journal.failed_ids("cattery"):
+        yield empty_cattery_row(f"{base_url}/catteries/{c_id}")
 
-    headers = [
-        "cattery_id",
-        "cattery_url",
-        "cattery_name",
-        "breeder_person",
-        "breeder_rating",
-        "city_country",
-        "email",
-        "phone",
-        "site",
-        "social_links",
-    ]
-    ws.append(headers)
 
-    for row in rows:
-        ws.append([row.get(col) for col in headers])
+def journal_rows(journal, base_url=BASE_URL):
+    """
+    Строки для выгрузки из журнала: готовые питомники,
+    затем заглушки для тех, что так и не удалось распарсить.
+    """
+    yield from journal.rows("cattery")
+    yield from failed_cattery_rows(journal, base_url)
+
+
+CATTERY_COLUMNS = [
+    "cattery_id",
+    "cattery_url",
+    "cattery_name",
+    "breeder_person",
+    "breeder_rating",
+    "city_country",
+    "email",
+    "phone",
+    "phone_e164",
+    "site",
+    "social_links",
+]
+
+
+# Выгрузки по ходу обхода (Parquet, база): вид записи в журнале -> (таблица, колонки)
+EXPORT_TABLES = {
+    "cattery": ("catteries", CATTERY_COLUMNS),
+    "cat": ("cats", CAT_COLUMNS),
+}
+INT_COLUMNS = ("cattery_id", "cat_id", "father_id", "mother_id")
+# Повторяющиеся значения — в Parquet храним словарём
+PARQUET_DICTIONARY = (
+    "city_country", "breed", "color", "sex", "status", "club",
+    "breeder_person", "cattery_name", "source",
+)
+
+# База SQLite (--db): ключи, индексы для поиска и связи таблиц.
+# Кошка может быть в pets.json нескольких питомников — ключ составной.
+DB_TABLES = [
+    SinkTable("catteries", CATTERY_COLUMNS, key=("cattery_id",), ints=INT_COLUMNS,
+              indexes=("cattery_name", "breeder_person")),
+    SinkTable("cats", CAT_COLUMNS, key=("cat_id", "cattery_id"), ints=INT_COLUMNS,
+              indexes=("cattery_id", "breed", "breeder_person"),
+              references={"cattery_id": "catteries"}),
+]
+
+
+def open_parquet(directory, journal, with_cats=True):
+    """
+    Parquet-выгрузка по ходу обхода: готовые питомники и кошки
+    из журнала сразу уходят в буфер своей таблицы (при --resume
+    уже готовые записи переносятся первыми).
+    """
+    tables = {k: v for k, v in EXPORT_TABLES.items() if with_cats or k != "cat"}
+    writer = StreamingParquetWriter(directory)
+    for table, columns in tables.values():
+        writer.add_table(table, columns, ints=INT_COLUMNS, dictionary=PARQUET_DICTIONARY)
 
-    wb.save(filename)
-    print(f"\nФайл сохранён: {filename}")
+    def on_record(kind, item_id, data, parent_id):
+        if kind in tables:
+            writer.append(tables[kind][0], data)
 
+    journal.add_listener(on_record, replay_kinds=tables)
+    return writer
 
-# ====================== MAIN ======================
 
-def main():
-    print("=== Сбор ссылок на все питомники TopCat ===")
-    # max_pages=None — идти до первой пустой страницы
-    cattery_links = get_cattery_links(max_pages=None, pause=0.5)
+def open_db(path, journal, with_cats=True):
+    """
+    База, которая пополняется по ходу обхода: готовые питомники и кошки
+    уходят в фоновый поток-писатель и upsert'ами ложатся в таблицы.
+    """
+    tables = {k: v for k, v in EXPORT_TABLES.items() if with_cats or k != "cat"}
+    sink = SqliteSink(path, DB_TABLES)
+
+    def on_record(kind, item_id, data, parent_id):
+        if kind in tables:
+            sink.upsert(tables[kind][0], data)
+
+    journal.add_listener(on_record, replay_kinds=tables)
+    return sink
+
+
+def close_parquet(parquet, journal, base_url=BASE_URL):
+    """Дописывает заглушки питомников, которые не удалось разобрать (как в Excel), и закрывает файлы."""
+    for row in failed_cattery_rows(journal, base_url):
+        parquet.append("catteries", row)
+    parquet.close()
+
+
+def add_failed_catteries(db, journal, base_url=BASE_URL):
+    """
+    Заглушки питомников, которые не удалось разобрать (как в Excel и Parquet), — в базу.
+    Вызывается в конце обхода: при следующем удачном обходе строка заменится настоящей.
+    """
+    for row in failed_cattery_rows(journal, base_url):
+        db.upsert("catteries", row)
+
+
+def save_to_excel(rows, filename="topcat_catteries.xlsx", cat_rows=None):
+    """
+    Сохраняет словари rows (список или итератор) в Excel,
+    кошек (cat_rows), если переданы, — на отдельный лист cats.
+    Запись потоковая: строки не копятся в памяти.
+    """
+    with StreamingExcelWriter(filename) as writer:
+        writer.add_sheet("catteries", CATTERY_COLUMNS)
+        writer.write_rows("catteries", rows)
+        if cat_rows is not None:
+            writer.add_sheet("cats", CAT_COLUMNS)
+            writer.write_rows("cats", cat_rows)
+
+    print(f"\nФайл сохранён: {filename}")
 
-    print(f"\nВсего найдено питомников: {len(cattery_links)}")
 
-    all_rows = []
-    total = len(cattery_links)
+# ====================== MAIN ======================
 
-    for idx, url in enumerate(cattery_links, start=1):
-        print(f"\n[{idx}/{total}] Обработка: {url}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Парсер питомников top-cat.org")
+    parser.add_argument(
+        "--rps", type=float, default=REQUESTS_PER_SECOND,
+        help="средний лимит запросов в секунду (0 — без ограничения)",
+    )
+    parser.add_argument(
+        "--burst", type=int, default=RATE_BURST,
+        help="сколько запросов можно сделать подряд без ожидания",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=RETRIES,
+        help="сколько раз повторять запрос при 5xx/429/таймауте (0 — не повторять)",
+    )
+    parser.add_argument(
+        "--backoff", type=float, default=RETRY_BACKOFF,
+        help="пауза перед первым повтором, секунды (дальше удваивается)",
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+        help="каталог дискового кэша страниц",
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, default=DEFAULT_TTL,
+        help="сколько секунд страница из кэша считается свежей (0 — всегда перепроверять)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="не использовать кэш, всегда скачивать страницы заново",
+    )
+    parser.add_argument(
+        "--metrics-dir", type=Path, default=Path("."),
+        help="куда писать topcat_metrics.json и topcat_metrics.prom",
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=30,
+        help="раз во сколько секунд обновлять файлы метрик во время обхода (0 — только в конце)",
+    )
+    parser.add_argument(
+        "--no-metrics", action="store_true",
+        help="не писать файлы метрик",
+    )
+    parser.add_argument(
+        "--base-url", default=BASE_URL,
+        help="адрес сайта, например http://127.0.0.1:8765 для replay_server.py",
+    )
+    parser.add_argument(
+        "--output", default="topcat_catteries.xlsx",
+        help="куда сохранить итоговый Excel",
+    )
+    parser.add_argument(
+        "--parquet-dir", type=Path, default=None,
+        help="писать ещё и catteries/cats.parquet в этот каталог (нужен pyarrow)",
+    )
+    parser.add_argument(
+        "--db", type=Path, default=None,
+        help="пополнять по ходу обхода базу SQLite (catteries, cats)",
+    )
+    parser.add_argument(
+        "--photos-dir", type=Path, default=None,
+        help="скачивать по ходу обхода фото кошек в этот каталог "
+             "(файлы по sha256 содержимого, одинаковые хранятся один раз)",
+    )
+    parser.add_argument(
+        "--photo-workers", type=int, default=DEFAULT_PHOTO_WORKERS,
+        help="сколько фото скачивать одновременно",
+    )
+    parser.add_argument(
+        "--photo-rps", type=float, default=DEFAULT_PHOTO_RPS,
+        help="лимит запросов за фото в секунду, отдельный от --rps (0 — без ограничения)",
+    )
+    parser.add_argument(
+        "--parse-mode", choices=PARSE_MODES, default=DEFAULT_PARSE_MODE,
+        help="partial — разбирать только <h1> и блок «Контакты», full — всю страницу",
+    )
+    parser.add_argument(
+        "--journal", type=Path, default=None,
+        help="файл журнала обхода (SQLite); по умолчанию topcat_journal.sqlite, "
+             "у воркера — рядом с очередью",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="продолжить прерванный обход: пропустить то, что уже есть в журнале",
+    )
+    parser.add_argument(
+        "--no-cats", action="store_true",
+        help="не собирать кошек питомников (pets.json)",
+    )
+    parser.add_argument(
+        "--no-cat-html", action="store_true",
+        help="брать кошек только из pets.json, не дочитывать их страницы",
+    )
+    parser.add_argument(
+        "--listing-concurrency", type=int, default=DEFAULT_LISTING_CONCURRENCY,
+        help="сколько страниц списка питомников скачивать одновременно",
+    )
+    add_probe_arguments(parser, Path("topcat_id_gaps.json"))
+    parser.add_argument(
+        "--queue", type=Path, default=None,
+        help="работать воркером шардового обхода: брать питомники из этой очереди "
+             "(её наполняет shard_crawl.py --site topcat)",
+    )
+    parser.add_argument(
+        "--worker-id", default=f"{socket.gethostname()}-{os.getpid()}",
+        help="имя воркера в очереди",
+    )
+    parser.add_argument(
+        "--lease", type=float, default=DEFAULT_LEASE,
+        help="на сколько секунд воркер берёт шард; не продлённый вовремя шард отдаётся другому",
+    )
+    args = parser.parse_args(argv)
+    if args.journal is None:
+        args.journal = (
+            args.queue.with_name(f"{args.queue.stem}.{args.worker_id}.journal.sqlite")
+            if args.queue else Path("topcat_journal.sqlite")
+        )
+    return args
+
+
+def process_cattery(idx, url, journal, args, base_url):
+    """Питомник и его кошки — то, что ещё не готово по журналу."""
+    c_id = cattery_id(url)
+    cattery_done = journal.is_done("cattery", c_id)
+    # "pets" — отметка, что кошки питомника уже собраны
+    cats_done = args.no_cats or journal.is_done("pets", c_id)
+    if cattery_done:
+        # ответ перебора ID этому питомнику уже не нужен
+        probed_pages.take(url)
+    if cattery_done and cats_done:
+        return
+
+    print(f"\n[{idx}] Обработка: {url}")
+    if not cattery_done:
         try:
-            data = parse_cattery(url)
+            data = parse_cattery(url, mode=args.parse_mode)
         except Exception as e:
             print(f"ОШИБКА при парсинге {url}: {e}")
-            m = re.search(r"/catteries/(\d+)", url)
-            c_id = m.group(1) if m else None
-            data = {
-                "cattery_id": c_id,
-                "cattery_url": url,
-                "cattery_name": None,
-                "breeder_person": None,
-                "breeder_rating": None,
-                "city_country": None,
-                "email": None,
-                "phone": None,
-                "site": None,
-                "social_links": None,
-            }
-
-        all_rows.append(data)
-        if idx % 20 == 0:
-            save_to_excel(all_rows, filename="topcat_catteries_progress.xlsx")
-
-        time.sleep(0.5)
-
-    save_to_excel(all_rows, filename="topcat_catteries.xlsx")
+            journal.record_error("cattery", c_id, str(e))
+            return
+
+        journal.record("cattery", c_id, data)
+        metrics.count_rows("cattery")
+
+    if not cats_done:
+        try:
+            cats, from_html = crawl_cattery_cats(
+                c_id, journal, html_fallback=not args.no_cat_html,
+                base_url=base_url,
+            )
+        except Exception as e:
+            print(f"ОШИБКА при получении кошек питомника {c_id}: {e}")
+            journal.record_error("pets", c_id, str(e))
+            return
+
+        print(f"Кошек: {cats} (дочитано со страниц: {from_html})")
+        journal.record("pets", c_id, {"cats": cats, "from_html": from_html})
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.parquet_dir and not parquet_available():
+        raise SystemExit("Для --parquet-dir нужен pyarrow: pip install pyarrow")
+    if args.queue and args.parquet_dir:
+        raise SystemExit("Воркер пишет только журнал; Parquet собирает shard_crawl.py merge --parquet-dir")
+    limiter.configure(args.rps, args.burst)
+    # основной поток и потоки страниц списка или проверки ID при переборе
+    discovery = args.probe_concurrency if args.discovery == "ids" else args.listing_concurrency
+    client.configure(pool_size=1 + discovery,
+                     retries=args.retries, backoff=args.backoff)
+    cache.configure(args.cache_dir, args.cache_ttl, enabled=not args.no_cache)
+    labels = {"parse_mode": args.parse_mode}
+    if args.queue:
+        labels["worker"] = args.worker_id
+    metrics.configure(
+        None if args.no_metrics else args.metrics_dir,
+        name="topcat",
+        interval=args.metrics_interval,
+        labels=labels,
+        # у каждого воркера шардового обхода свои файлы метрик
+        file_name=f"topcat.{args.worker_id}" if args.queue else None,
+    )
+    metrics.start()
+
+    journal = CrawlJournal(args.journal, resume=args.resume)
+    if args.resume:
+        print(f"Продолжаем обход: уже готово питомников {journal.done_count('cattery')}")
+    parquet = None
+    if args.parquet_dir:
+        parquet = open_parquet(args.parquet_dir, journal, with_cats=not args.no_cats)
+    db = open_db(args.db, journal, with_cats=not args.no_cats) if args.db else None
+
+    base_url = args.base_url.rstrip("/")
+    photos = None
+    if args.photos_dir:
+        # Фото качаются в своих потоках, обход страниц их не ждёт
+        # и со своим клиентом и бюджетом запросов (--photo-rps), не из бюджета страниц
+        photos = PhotoStore(
+            args.photos_dir,
+            photo_client(HEADERS, args.photo_rps, args.photo_workers, args.retries,
+                         args.backoff, on_retry=lambda *_: metrics.count_retry()),
+            workers=args.photo_workers, metrics=metrics,
+        )
+        attach(photos, journal, ("cat",), base_url=base_url)
+    shard_queue = None
+    if args.queue:
+        shard_queue = WorkQueue(args.queue, lease=args.lease)
+        shard_queue.register_worker(args.worker_id, args.journal)
+        print(f"Воркер {args.worker_id}: очередь {args.queue}, журнал {args.journal}")
+
+    try:
+        if shard_queue:
+            # Питомники раздаёт координатор (shard_crawl.py) шардами,
+            # выгрузку он же собирает из журналов воркеров
+            def crawl(links):
+                for idx, url in enumerate(links, start=1):
+                    process_cattery(idx, url, journal, args, base_url)
+
+            shards = shard_queue.consume(args.worker_id, crawl)
+            print(f"\nВоркер {args.worker_id}: обработано шардов {shards}, журнал {args.journal}")
+        else:
+            print("=== Сбор ссылок на все питомники TopCat ===")
+            probe = None
+            if args.discovery == "ids":
+                # перебор /catteries/{id} параллельно вместо страниц списка
+                probe = probe_from_args(args, cattery_exists, base_url + "/catteries/{id}", "cattery")
+                probed_pages.configure(max(DEFAULT_PROBED_PAGES, 4 * args.probe_concurrency))
+                links = iter(probe)
+            else:
+                # max_pages=None — все страницы списка.
+                links = iter_cattery_links(max_pages=None, base_url=base_url,
+                                           concurrency=args.listing_concurrency)
+            # Ссылки собираются в фоне: питомники парсятся, пока идёт поиск.
+            # При переборе ID очередь не длиннее половины probed_pages:
+            # ответы найденных питомников не вытесняются, пока ждут разбора.
+            link_queue = (start_link_producer(links, maxsize=probed_pages.max_pages // 2)
+                          if probe else start_link_producer(links))
+            for idx, url in enumerate(iter(link_queue.get, None), start=1):
+                process_cattery(idx, url, journal, args, base_url)
+            if probe:
+                print(probe.report())
+
+            with metrics.timer("export"):
+                save_to_excel(
+                    journal_rows(journal, base_url),
+                    filename=args.output,
+                    cat_rows=None if args.no_cats else journal.rows("cat"),
+                )
+                if parquet:
+                    close_parquet(parquet, journal, base_url)
+                    print(f"Parquet: {args.parquet_dir}")
+                if db:
+                    add_failed_catteries(db, journal, base_url)
+        journal.mark_finished()
+    finally:
+        # База пишется и при прерванном обходе — всё, что успели собрать
+        if db:
+            db.close()
+        if photos:
+            photos.close()
+            photos.client.close()
+        journal.close()
+        metrics.stop()
+        if shard_queue:
+            shard_queue.close()
+    if db:
+        print(f"База: {args.db} (строк записано {db.rows_written})")
+    if photos:
+        print(photos.report())
+    print(cache.report())
+    print(metrics.report())
 
 
 if __name__ == "__main__":
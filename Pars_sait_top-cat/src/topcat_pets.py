@@ -0,0 +1,224 @@
+"""
+Кошки питомника top-cat.
+
+Основной путь — pets.json?cattery_id=...: один запрос на питомник
+отдаёт всех его питомцев (так делает сама страница питомника, см. test_cattery.py).
+Ответ приводится к стабильной схеме CAT_COLUMNS через pet_to_cat_row.
+Страница кошки /cats/{id} (parse_cat_html) нужна только как запасной
+источник для полей, которых нет в JSON.
+
+Здесь только разбор — без сети; запросы делает parse_all_topcat.py.
+"""
+import re
+
+from bs4 import BeautifulSoup
+
+CAT_COLUMNS = [
+    "cat_id",
+    "cat_url",
+    "cat_name",
+    "sex",
+    "breed",
+    "color",
+    "birthday",
+    "status",
+    "father",
+    "father_id",
+    "mother",
+    "mother_id",
+    "owner",
+    "breeder_person",
+    "club",
+    "cattery_id",
+    "cattery_name",
+    "photo_url",
+    "source",
+]
+
+# Без этих полей строка кошки считается неполной — тогда дочитываем HTML
+CAT_CORE_FIELDS = ("cat_name", "sex", "color", "birthday", "father", "mother")
+
+# Поле схемы -> возможные ключи в pets.json (формат API не документирован)
+JSON_ALIASES = {
+    "cat_id": ("id", "pet_id", "cat_id"),
+    "cat_name": ("name", "full_name", "title", "pet_name"),
+    "sex": ("sex", "gender"),
+    "breed": ("breed", "breed_name", "breed_code", "ems_breed"),
+    "color": ("color", "colour", "color_name", "ems", "ems_color"),
+    "birthday": ("birthday", "birth_date", "birthdate", "date_of_birth", "born"),
+    "status": ("status", "breeding_status"),
+    "father": ("father", "father_name", "sire"),
+    "father_id": ("father_id", "sire_id"),
+    "mother": ("mother", "mother_name", "dam"),
+    "mother_id": ("mother_id", "dam_id"),
+    "owner": ("owner", "owner_name"),
+    "breeder_person": ("breeder", "breeder_name"),
+    "club": ("club", "club_name"),
+    "cattery_name": ("cattery", "cattery_name"),
+    "photo_url": ("photo", "photo_url", "image", "image_url", "avatar"),
+    "cat_url": ("url", "link", "path"),
+}
+
+# Подписи строк таблицы на странице кошки -> поле схемы
+HTML_LABELS = {
+    "Пол": "sex",
+    "Обозначение": "breed",
+    "Окрас": "color",
+    "День рождения": "birthday",
+    "Статус": "status",
+    "Отец": "father",
+    "Мать": "mother",
+    "Владелец": "owner",
+    "Заводчик": "breeder_person",
+    "Клуб": "club",
+    "Питомник": "cattery_name",
+}
+
+CAT_ID_RE = re.compile(r"/cats/(\d+)")
+
+
+def normalize_pets_list(data):
+    """
+    JSON может быть либо списком, либо словарём с ключами.
+    Здесь пытаемся вытащить список питомцев максимально универсально.
+    """
+    if data is None:
+        return []
+
+    if isinstance(data, list):
+        return data
+
+    if isinstance(data, dict):
+        # Если сервер вернёт что-то вроде {"pets": [...]}
+        for key in ("pets", "items", "data"):
+            if key in data and isinstance(data[key], list):
+                return data[key]
+
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+
+    return []
+
+
+def _as_text(value):
+    """Значение поля JSON как строка: вложенные объекты — по name/title."""
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("title") or value.get("full_name")
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _nested_id(value):
+    if isinstance(value, dict):
+        return _as_text(value.get("id"))
+    return None
+
+
+def _pick(pet, keys):
+    for key in keys:
+        if pet.get(key) not in (None, ""):
+            return pet[key]
+    return None
+
+
+def empty_cat_row():
+    return dict.fromkeys(CAT_COLUMNS)
+
+
+def pet_to_cat_row(pet, cattery_id, base_url):
+    """
+    Один питомец из pets.json -> строка схемы CAT_COLUMNS.
+    """
+    row = empty_cat_row()
+    for field, keys in JSON_ALIASES.items():
+        row[field] = _as_text(_pick(pet, keys))
+
+    # Родители могут прийти объектами {"id": ..., "name": ...}
+    for parent in ("father", "mother"):
+        if row[f"{parent}_id"] is None:
+            row[f"{parent}_id"] = _nested_id(_pick(pet, JSON_ALIASES[parent]))
+
+    if row["cat_url"] and row["cat_url"].startswith("/"):
+        row["cat_url"] = base_url + row["cat_url"]
+    if row["cat_id"] is None and row["cat_url"]:
+        m = CAT_ID_RE.search(row["cat_url"])
+        row["cat_id"] = m.group(1) if m else None
+    if row["cat_url"] is None and row["cat_id"]:
+        row["cat_url"] = f"{base_url}/cats/{row['cat_id']}"
+    if row["photo_url"] and row["photo_url"].startswith("/"):
+        row["photo_url"] = base_url + row["photo_url"]
+
+    row["cattery_id"] = str(cattery_id)
+    row["source"] = "json"
+    return row
+
+
+def missing_fields(row):
+    return [field for field in CAT_CORE_FIELDS if not row.get(field)]
+
+
+def parse_cat_html(html, url):
+    """
+    Разбор уже скачанной страницы кошки /cats/{id} (без сети).
+    Возвращает строку схемы CAT_COLUMNS.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    row = empty_cat_row()
+
+    m = CAT_ID_RE.search(url)
+    row["cat_id"] = m.group(1) if m else None
+    row["cat_url"] = url
+
+    # В h1 перед кличкой может стоять титул (<span class="cat-title">)
+    h1 = soup.select_one(".primary-info-section .name h1") or soup.find("h1")
+    if h1:
+        title = h1.select_one(".cat-title")
+        if title:
+            title.extract()
+        row["cat_name"] = h1.get_text(" ", strip=True) or None
+
+    img = soup.select_one(".primary-info-section .avatar img")
+    row["photo_url"] = img.get("src") if img and img.get("src") else None
+
+    for tr in soup.select(".secondary-info .info-column table tr"):
+        def_td = tr.select_one("td.definition")
+        val_td = tr.select_one("td.value")
+        if not def_td or not val_td:
+            continue
+        field = HTML_LABELS.get(def_td.get_text(strip=True).rstrip(":"))
+        if field is None:
+            continue
+        row[field] = val_td.get_text(" ", strip=True) or None
+
+        link = val_td.find("a", href=True)
+        if field in ("father", "mother") and link:
+            m = CAT_ID_RE.search(link["href"])
+            row[f"{field}_id"] = m.group(1) if m else None
+        if field == "cattery_name" and link:
+            m = re.search(r"/catteries/(\d+)", link["href"])
+            row["cattery_id"] = m.group(1) if m else None
+
+    row["source"] = "html"
+    return row
+
+
+def fill_missing(row, html_row):
+    """
+    Дополняет строку из JSON полями со страницы кошки.
+    Уже заполненные из JSON поля не трогаются; питомник тоже —
+    на странице указан питомник рождения, а строка привязана к тому,
+    в чьём pets.json кошка нашлась.
+    """
+    filled = []
+    for field in CAT_COLUMNS:
+        if field in ("source", "cattery_id", "cattery_name"):
+            continue
+        if not row.get(field) and html_row.get(field):
+            row[field] = html_row[field]
+            filled.append(field)
+    if filled:
+        row["source"] = "json+html"
+    return filled
@@ -0,0 +1,139 @@
+"""
+Память на синтетическом обходе из 500 000 собак (tracemalloc):
+
+  строки  — список dict, как их возвращает parse_dog (так строки копились
+            в kennels_rows/dogs_rows), против ColumnarRows: колонки списками,
+            повторяющиеся значения (порода, окрас, питомник, родители) —
+            кодами в array('i') со словарём;
+  журнал  — готовые записи в памяти журнала (собаки, связи собака —
+            питомник, питомники): множество кортежей из трёх строк против
+            DoneIndex.
+
+    python bench_memory.py --dogs 500000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from columnar import ColumnarRows
+from crawl_journal import DoneIndex
+from parse_all import DOG_COLUMNS, INT_COLUMNS, PARQUET_DICTIONARY
+
+DOGS_PER_KENNEL = 8
+
+
+def synthetic_dog(i: int) -> dict:
+    """Строка собаки как из parse_dog: каждое значение — новый объект str."""
+    kennel = i // DOGS_PER_KENNEL
+    return {
+        "dog_id": str(i), "dog_url": f"https://top-dog.pro/dogs/{i}",
+        "dog_name": f"Dog {i}", "sex": ("Кобель", "Сука")[i % 2],
+        "breed": f"Порода {i % 40}", "color": f"Окрас {i % 12}",
+        "birthday": f"{1 + i % 28:02d}.{1 + i % 12:02d}.20{10 + i % 14}",
+        "father": f"Father {i % 500}", "mother": f"Mother {i % 700}",
+        "owner": f"Owner {i % 3000}", "co_owner": None,
+        "breeder_person": f"Breeder {kennel}", "kennel_name": f"Kennel {kennel}",
+        "kennel_id": str(kennel), "photo_url": f"https://top-dog.pro/img/{i}.jpg",
+    }
+
+
+def measure(build) -> tuple[object, int, float]:
+    """Собирает структуру, возвращает её, прирост памяти в байтах и время."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t0
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before, elapsed
+
+
+def build_dicts(n: int) -> list[dict]:
+    return [synthetic_dog(i) for i in range(n)]
+
+
+def build_columnar(n: int) -> ColumnarRows:
+    rows = ColumnarRows(DOG_COLUMNS, ints=INT_COLUMNS, dictionary=PARQUET_DICTIONARY)
+    for i in range(n):
+        rows.append(synthetic_dog(i))
+    return rows
+
+
+def journal_keys(n: int):
+    """(вид, ID, родитель) готовых записей, как они приходят из SQLite."""
+    for i in range(n):
+        kennel = str(i // DOGS_PER_KENNEL)
+        yield "dog", str(i), "".join(kennel)
+        yield "dog_kennel", str(i), "".join(kennel)
+    for k in range(n // DOGS_PER_KENNEL):
+        yield "kennel", str(k), ""
+
+
+def build_done_tuples(n: int) -> set:
+    # kind из SQLite — каждый раз новый объект str, как и ID
+    return {("".join(kind), item_id, parent) for kind, item_id, parent in journal_keys(n)}
+
+
+def build_done_index(n: int) -> DoneIndex:
+    index = DoneIndex()
+    for kind, item_id, parent in journal_keys(n):
+        index.add(kind, item_id, parent)
+    return index
+
+
+def mb(size: int) -> str:
+    return f"{size / 1024 / 1024:8.1f} МБ"
+
+
+def compare(title: str, n: int, old_name: str, old, new_name: str, new) -> dict:
+    old_obj, old_size, old_time = measure(lambda: old(n))
+    del old_obj
+    new_obj, new_size, new_time = measure(lambda: new(n))
+    del new_obj
+    print(f"\n=== {title} ===")
+    print(f"{old_name:24}: {mb(old_size)}  ({old_size / n:6.0f} байт на собаку, {old_time:.1f} c)")
+    print(f"{new_name:24}: {mb(new_size)}  ({new_size / n:6.0f} байт на собаку, {new_time:.1f} c)")
+    print(f"экономия: {mb(old_size - new_size)}, в {old_size / new_size:.1f} раза меньше")
+    return {"old": old_size, "new": new_size}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Память на синтетическом обходе собак")
+    parser.add_argument("--dogs", type=int, default=500_000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    n = args.dogs
+
+    # Сверка: из ColumnarRows возвращаются те же строки
+    sample = build_columnar(1000)
+    expected = []
+    for row in build_dicts(1000):
+        row = dict(row)
+        for col in INT_COLUMNS:
+            if col in row:
+                row[col] = int(row[col])
+        expected.append(row)
+    assert list(sample) == expected, "ColumnarRows вернул другие строки"
+
+    index = build_done_index(1000)
+    assert index.count("dog") == 1000 and index.contains("dog", "999", "124")
+    assert not index.contains("dog", "999", "123") and index.contains("kennel", "7")
+    assert index.ids("dog") == {str(i) for i in range(1000)}
+
+    print(f"Собак: {n}, питомников: {n // DOGS_PER_KENNEL}")
+    rows = compare("Строки собак в памяти", n,
+                   "список dict", build_dicts, "ColumnarRows", build_columnar)
+    done = compare("Готовые записи журнала", n,
+                   "set кортежей", build_done_tuples, "DoneIndex", build_done_index)
+    total_old, total_new = rows["old"] + done["old"], rows["new"] + done["new"]
+    print(f"\nИтого: {mb(total_old)} -> {mb(total_new)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Замер пропускной способности стадии разбора:
+dump.html прогоняется через parse_page в ProcessPoolExecutor
+с разным числом процессов, печатается страниц в секунду.
+
+    python bench_parse_pool.py [число_страниц]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from parse_all import parse_page
+
+DUMP_DOG = (Path(__file__).resolve().parent / "dump.html").read_bytes()
+DOG_URL = "https://ru.top-dog.pro/dogs/860"
+
+
+def run(workers: int, pages: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # прогрев: процессы стартуют и импортируют модули вне замера
+        list(pool.map(parse_page, ["dog"] * workers, [DUMP_DOG] * workers, [DOG_URL] * workers))
+        t0 = time.perf_counter()
+        list(pool.map(
+            parse_page, ["dog"] * pages, [DUMP_DOG] * pages, [DOG_URL] * pages,
+            chunksize=8,
+        ))
+        return pages / (time.perf_counter() - t0)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    cpus = os.cpu_count() or 1
+
+    counts = sorted({1, 2, 4, 8, cpus} & set(range(1, cpus + 1)))
+    print(f"=== Разбор dump.html, {pages} страниц, ядер: {cpus} ===")
+    base = None
+    for workers in counts:
+        rate = run(workers, pages)
+        base = base or rate
+        print(f"процессов {workers:>2}: {rate:8.1f} стр/с  (x{rate / base:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Набор микробенчмарков разбора по сохранённым страницам:
+  soup     — построение дерева (как get_soup) разными парсерами:
+             BeautifulSoup + lxml, BeautifulSoup + html.parser, lxml.html напрямую;
+  dog      — parse_dog_html на dump.html, каждым бэкендом extractors;
+  kennel   — parse_kennel_html на синтетическом питомнике из check_backends;
+  cattery  — parse_cattery_html (top-cat) на dump_cattery.html, full и partial;
+  contacts — parse_contacts_block на уже вырезанном блоке «Контакты».
+
+Для каждого случая — страниц в секунду и пик выделенной памяти
+(tracemalloc, отдельным прогоном; память, которую lxml выделяет в C,
+tracemalloc не видит — для lxml.html пик почти нулевой).
+Результат пишется в JSON, чтобы сравнивать запуски между коммитами:
+
+    python bench_parsers.py --output before.json
+    python bench_parsers.py --output after.json --compare before.json
+
+С --compare код возврата 1, если какой-то случай стал медленнее
+больше чем на --tolerance.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+from check_backends import SYNTHETIC_KENNEL
+from extractors import BACKENDS, parse_dog_html, parse_kennel_html
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parents[1]
+sys.path.append(str(ROOT / "Pars_sait_top-cat" / "src"))
+
+from parse_all_topcat import (  # noqa: E402
+    PARSE_MODES,
+    find_contacts_header,
+    parse_cattery_html,
+    parse_contacts_block,
+)
+
+DATA_DIR = HERE.parent / "data"
+
+DOG_URL = "https://ru.top-dog.pro/dogs/860"
+KENNEL_URL = "https://ru.top-dog.pro/kennels/14"
+CATTERY_URL = "https://ru.top-cat.org/catteries/1621"
+
+# Парсеры, которыми строится дерево BeautifulSoup
+SOUP_BUILDERS = ("lxml", "html.parser")
+
+
+def fixture(name: str) -> bytes:
+    return (HERE / name).read_bytes()
+
+
+def cases():
+    """
+    (случай, страница, бэкенд, функция без аргументов).
+    Всё, что не относится к замеру (чтение файлов, вырезание блока),
+    делается здесь, заранее.
+    """
+    for name in ("dump.html", "dump_cat.html", "dump_cattery.html"):
+        page = fixture(name)
+        text = page.decode("utf-8", errors="replace")
+        for builder in SOUP_BUILDERS:
+            yield "soup", name, f"bs4+{builder}", lambda t=text, b=builder: BeautifulSoup(t, b)
+        yield "soup", name, "lxml.html", lambda t=text: lxml.html.document_fromstring(t)
+
+    dog_page = fixture("dump.html")
+    for backend in BACKENDS:
+        yield "dog", "dump.html", backend, (
+            lambda b=backend: parse_dog_html(dog_page, DOG_URL, "14", "TripleMoon", backend=b)
+        )
+
+    for backend in BACKENDS:
+        yield "kennel", "synthetic kennel", backend, (
+            lambda b=backend: parse_kennel_html(SYNTHETIC_KENNEL, KENNEL_URL, backend=b)
+        )
+
+    cattery_html = fixture("dump_cattery.html").decode("utf-8")
+    for mode in PARSE_MODES:
+        yield "cattery", "dump_cattery.html", mode, (
+            lambda m=mode: parse_cattery_html(cattery_html, CATTERY_URL, m)
+        )
+
+    header = find_contacts_header(BeautifulSoup(cattery_html, "html.parser"))
+    block = header.find_parent("div")
+    yield "contacts", "dump_cattery.html", "bs4", lambda: parse_contacts_block(block)
+
+
+def measure(func, min_time: float) -> dict:
+    func()  # прогрев: импорты, ленивые кэши lxml/bs4
+
+    runs = 0
+    t0 = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        func()
+        runs += 1
+        elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "runs": runs,
+        "pages_per_sec": round(runs / elapsed, 1),
+        "ms_per_page": round(elapsed / runs * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(min_time: float, only: set[str] | None = None) -> dict:
+    results = []
+    print(f"{'случай':<9}{'страница':<20}{'бэкенд':<17}{'стр/с':>9}{'мс/стр':>9}{'пик КиБ':>10}")
+    for case, page, backend, func in cases():
+        if only and case not in only:
+            continue
+        stats = measure(func, min_time)
+        results.append({"case": case, "page": page, "backend": backend, **stats})
+        print(
+            f"{case:<9}{page:<20}{backend:<17}"
+            f"{stats['pages_per_sec']:>9.1f}{stats['ms_per_page']:>9.2f}{stats['peak_kib']:>10.1f}"
+        )
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "min_time": min_time,
+        "results": results,
+    }
+
+
+def compare(current: dict, previous: dict, tolerance: float) -> list[str]:
+    """
+    Сравнивает с прошлым запуском, возвращает список регрессий
+    (замедление больше tolerance, например 0.2 = на 20%).
+    """
+    key = lambda r: (r["case"], r["page"], r["backend"])
+    before = {key(r): r for r in previous["results"]}
+
+    print(f"\n=== Сравнение с {previous.get('commit') or 'прошлым запуском'} ===")
+    regressions = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None:
+            continue
+        ratio = r["pages_per_sec"] / old["pages_per_sec"]
+        mark = ""
+        if ratio < 1 - tolerance:
+            mark = "  <-- регрессия"
+            regressions.append(f"{r['case']}/{r['page']}/{r['backend']}: x{ratio:.2f}")
+        print(f"{r['case']:<9}{r['page']:<20}{r['backend']:<17}x{ratio:5.2f}{mark}")
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Микробенчмарки разбора страниц")
+    parser.add_argument(
+        "--output", type=Path, default=DATA_DIR / "bench_parsers.json",
+        help="куда сохранить результаты (JSON)",
+    )
+    parser.add_argument(
+        "--compare", type=Path, default=None,
+        help="JSON прошлого запуска для сравнения",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2,
+        help="допустимое замедление при сравнении (доля, 0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--min-time", type=float, default=0.5,
+        help="сколько секунд гонять каждый случай",
+    )
+    parser.add_argument(
+        "--case", action="append", choices=("soup", "dog", "kennel", "cattery", "contacts"),
+        help="запустить только эти случаи (можно несколько раз)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args.min_time, set(args.case or ()))
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nРезультаты сохранены: {args.output}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(report, previous, args.tolerance)
+        if regressions:
+            print("\nРегрессии:")
+            for line in regressions:
+                print(" -", line)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Сквозной замер парсеров на локальном стенде (replay_server.py):
+поднимаем стенд в этом же процессе, прогоняем обход top-dog (crawl_async)
+и/или top-cat (main парсера) и печатаем страниц в секунду, задержки
+запросов (p50/p90/p99/max, как их видит парсер) и коды ответов стенда.
+
+    python bench_replay.py --kennels 200 --latency-ms 80 --latency-dist lognormal
+    python bench_replay.py --only topcat --rate-limit-rate 0.05
+
+Параметры каталога и задержек — те же, что у replay_server.py.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import parse_all
+from crawl_journal import CrawlJournal
+from replay_server import ReplayServer, add_config_arguments, config_from_args
+
+HERE = Path(__file__).resolve().parent
+sys.path.append(str(HERE.parents[1] / "Pars_sait_top-cat" / "src"))
+
+import parse_all_topcat  # noqa: E402
+
+
+class LatencyRecorder:
+    """Оборачивает функцию запроса и запоминает длительность каждого вызова."""
+
+    def __init__(self, func):
+        self.func = func
+        self.samples: list[float] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.samples.append(elapsed)
+
+    def summary(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {"count": 0}
+
+        def pct(p: float) -> float:
+            idx = min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))
+            return round(samples[idx] * 1000, 1)
+
+        return {
+            "count": len(samples),
+            "p50_ms": pct(50),
+            "p90_ms": pct(90),
+            "p99_ms": pct(99),
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool):
+    """Построчный вывод парсеров на тысячах страниц сам по себе тормозит замер."""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_topdog(base_url: str, args, tmp: Path) -> dict:
+    parse_all.limiter.configure(0)
+    parse_all.cache.configure(enabled=False)
+    recorder = LatencyRecorder(parse_all.fetch_page)
+    parse_all.fetch_page = recorder
+
+    journal = CrawlJournal(tmp / "topdog.sqlite")
+    t0 = time.perf_counter()
+    try:
+        with quiet(not args.verbose):
+            asyncio.run(parse_all.crawl_async(
+                parse_all.iter_kennel_links(base_url=base_url), journal,
+                per_host=args.concurrency,
+                parse_workers=args.parse_workers,
+                backend=args.backend,
+            ))
+        elapsed = time.perf_counter() - t0
+        rows = {"kennels": journal.done_count("kennel"), "dogs": journal.done_count("dog")}
+    finally:
+        journal.close()
+        parse_all.fetch_page = recorder.func
+
+    return {"seconds": round(elapsed, 3), "rows": rows, "latency": recorder.summary()}
+
+
+def run_topcat(base_url: str, args, tmp: Path) -> dict:
+    recorder = LatencyRecorder(parse_all_topcat.http_get)
+    parse_all_topcat.http_get = recorder
+
+    t0 = time.perf_counter()
+    try:
+        with quiet(not args.verbose):
+            parse_all_topcat.main([
+                "--base-url", base_url,
+                "--no-cache", "--rps", "0",
+                "--journal", str(tmp / "topcat.sqlite"),
+                "--output", str(tmp / "topcat.xlsx"),
+                "--metrics-dir", str(tmp),
+            ])
+        elapsed = time.perf_counter() - t0
+    finally:
+        parse_all_topcat.http_get = recorder.func
+
+    return {"seconds": round(elapsed, 3), "latency": recorder.summary()}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Сквозной замер парсеров на локальном стенде")
+    add_config_arguments(parser)
+    parser.add_argument("--only", choices=("topdog", "topcat"), default=None)
+    parser.add_argument("--concurrency", type=int, default=parse_all.CONCURRENCY_PER_HOST)
+    parser.add_argument("--parse-workers", type=int, default=parse_all.PARSE_WORKERS)
+    parser.add_argument("--backend", choices=sorted(parse_all.BACKENDS),
+                        default=parse_all.DEFAULT_BACKEND)
+    parser.add_argument("--output", type=Path, default=None, help="сохранить результат в JSON")
+    parser.add_argument("--verbose", action="store_true", help="не глушить вывод парсеров")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tmp = Path(tempfile.mkdtemp())
+    report = {}
+
+    for name, run in (("topdog", run_topdog), ("topcat", run_topcat)):
+        if args.only and args.only != name:
+            continue
+        # На каждый обход — свой стенд, чтобы счётчики не смешивались
+        server = ReplayServer(("127.0.0.1", 0), config_from_args(args))
+        base_url = server.start_in_thread()
+        try:
+            result = run(base_url, args, tmp)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        stats = server.stats.snapshot()
+        result["server"] = stats
+        result["pages_per_sec"] = round(stats["requests"] / result["seconds"], 1)
+        report[name] = result
+
+        lat = result["latency"]
+        print(f"\n=== {name} ===")
+        print(f"запросов: {stats['requests']} за {result['seconds']:.2f} c "
+              f"-> {result['pages_per_sec']:.1f} стр/с")
+        if lat["count"]:
+            print(f"задержка, мс: p50 {lat['p50_ms']}  p90 {lat['p90_ms']}  "
+                  f"p99 {lat['p99_ms']}  max {lat['max_ms']}")
+        print(f"ответы стенда: {stats['by_status']}")
+        print(f"по видам: {stats['by_kind']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nРезультаты сохранены: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Проверка асинхронного обхода на локальном стенде:
+поднимаем http.server, который отдаёт синтетические страницы питомников
+и dump.html вместо страниц собак, и сравниваем результат
+crawl_async с последовательным crawl_sequential.
+Ошибка при записи результата (например, в выгрузке, подписанной
+на журнал) не должна подвешивать обход.
+"""
+import asyncio
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from crawl_journal import CrawlJournal
+from parse_all import cache, crawl_async, crawl_sequential, limiter, make_executors, metrics
+
+DUMP_DOG = (Path(__file__).resolve().parent / "dump.html").read_bytes()
+
+KENNEL_TEMPLATE = """
+<html><body>
+<div class="kennel-name"><h1>Kennel {kid}</h1></div>
+<div class="kennel-info">
+  <div class="photo"><img src="/img/{kid}.jpg"></div>
+  <div class="city">Москва, Россия</div>
+</div>
+<div class="details-container"><dl>
+  <dt>Заводчик:</dt><dd>Иванов Иван</dd>
+  <dt>Породы:</dt><dd>Австралийская овчарка</dd>
+</dl></div>
+{dogs}
+</body></html>
+"""
+
+DOG_ITEM = '<div class="dogs-grid-item"><div class="dog-name"><a href="/dogs/{did}">dog</a></div></div>'
+
+KENNELS = 6
+DOGS_PER_KENNEL = 4
+LATENCY = 0.05
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    in_flight = 0
+    max_in_flight = 0
+    requests = 0
+    first_kennel_at = None
+    # kid -> число собак, если у питомника оно не DOGS_PER_KENNEL
+    dogs_per_kennel: dict[int, int] = {}
+    # kid -> ID чужих собак, которые тоже показаны у этого питомника
+    shared_dogs: dict[int, list[int]] = {}
+    dog_requests = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.requests += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+
+        time.sleep(LATENCY)
+        parts = self.path.strip("/").split("/")
+        if parts[0] == "kennels":
+            if cls.first_kennel_at is None:
+                cls.first_kennel_at = time.perf_counter()
+            kid = int(parts[1])
+            dog_ids = [kid * 100 + n for n in range(cls.dogs_per_kennel.get(kid, DOGS_PER_KENNEL))]
+            dog_ids += cls.shared_dogs.get(kid, [])
+            dogs = "".join(DOG_ITEM.format(did=did) for did in dog_ids)
+            body = KENNEL_TEMPLATE.format(kid=kid, dogs=dogs).encode("utf-8")
+        elif parts[0] == "dogs":
+            with cls.lock:
+                cls.dog_requests += 1
+            body = DUMP_DOG
+        else:
+            body = None
+
+        # Запрос перестаёт считаться «в полёте» до того, как клиент получит
+        # ответ целиком, иначе следующий запрос клиента может попасть в счёт
+        with cls.lock:
+            cls.in_flight -= 1
+
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def slow_listing(links: list[str], done: list):
+    """Имитация пагинации: по две ссылки на «страницу», страница грузится не сразу."""
+    for i in range(0, len(links), 2):
+        time.sleep(LATENCY * 2)
+        yield from links[i:i + 2]
+    done.append(time.perf_counter())
+
+
+def blocked_listing(links: list[str], waited: list):
+    """
+    Пагинация, которая ждёт, пока скачается первый питомник: пока поток
+    списка ждёт, слот хоста свободен, и при одном слоте скачивание идёт.
+    """
+    yield links[0]
+    deadline = time.perf_counter() + 3
+    while StandInHandler.first_kennel_at is None and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    waited.append(StandInHandler.first_kennel_at is not None)
+    yield from links[1:]
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    kennel_links = [f"{base}/kennels/{k}" for k in range(1, KENNELS + 1)]
+    # На стенде бюджет вежливости не нужен — меряем чистую конкурентность
+    limiter.configure(0)
+    cache.configure(enabled=False)
+
+    tmp = Path(tempfile.mkdtemp())
+    seq_journal = CrawlJournal(tmp / "seq.sqlite")
+    par_journal = CrawlJournal(tmp / "par.sqlite")
+
+    try:
+        t0 = time.perf_counter()
+        crawl_sequential(kennel_links, seq_journal)
+        t_seq = time.perf_counter() - t0
+
+        StandInHandler.max_in_flight = 0
+        t0 = time.perf_counter()
+        asyncio.run(crawl_async(kennel_links, par_journal, per_host=4, parse_workers=2))
+        t_par = time.perf_counter() - t0
+
+        # Повторный запуск с тем же журналом (--resume) ничего не скачивает;
+        # пулы переданы снаружи, как у воркера шардового обхода, — и переживают обход
+        resumed = CrawlJournal(tmp / "par.sqlite", resume=True)
+        requests_before = StandInHandler.requests
+        parse_executor, discovery_executor = make_executors(2)
+        for _ in range(2):
+            asyncio.run(crawl_async(kennel_links, resumed, per_host=4, parse_workers=2,
+                                    parse_executor=parse_executor,
+                                    discovery_executor=discovery_executor))
+        assert StandInHandler.requests == requests_before, "resume скачал страницы заново"
+        assert parse_executor.submit(sum, (1, 2)).result() == 3, "пул закрыт после обхода"
+        parse_executor.shutdown()
+        discovery_executor.shutdown()
+
+        # Ленивый список питомников: обход должен начаться до конца пагинации
+        lazy_journal = CrawlJournal(tmp / "lazy.sqlite")
+        listing_done: list = []
+        StandInHandler.first_kennel_at = None
+        asyncio.run(crawl_async(
+            slow_listing(kennel_links, listing_done), lazy_journal,
+            per_host=4, parse_workers=2,
+        ))
+        assert StandInHandler.first_kennel_at < listing_done[0], "обход ждал конца пагинации"
+
+        # Ожидание следующей страницы списка не занимает слот хоста
+        single_journal = CrawlJournal(tmp / "single.sqlite")
+        waited: list = []
+        StandInHandler.first_kennel_at = None
+        asyncio.run(crawl_async(
+            blocked_listing(kennel_links, waited), single_journal,
+            per_host=1, parse_workers=0,
+        ))
+        assert waited == [True], "поиск ссылок держал единственный слот хоста"
+        assert single_journal.done_count("kennel") == KENNELS
+
+        # Выгрузка, подписанная на журнал, падает на одной собаке
+        broken = CrawlJournal(tmp / "broken.sqlite")
+
+        def failing_sink(kind, item_id, data, parent_id):
+            if kind == "dog" and item_id == "101":
+                raise RuntimeError("выгрузка недоступна")
+
+        broken.add_listener(failing_sink)
+        errors_before = metrics.errors.get("record", 0)
+        asyncio.run(asyncio.wait_for(
+            crawl_async(kennel_links, broken, per_host=4, parse_workers=0), timeout=30,
+        ))
+        assert metrics.errors.get("record", 0) == errors_before + 1, metrics.errors
+        assert broken.done_count("kennel") == KENNELS, "обход не закрыл питомники"
+    finally:
+        server.shutdown()
+
+    def rows(journal):
+        key = lambda r: (r.get("kennel_id"), r.get("dog_id") or "")
+        return (
+            sorted(journal.rows("kennel"), key=key),
+            sorted(journal.rows("dog"), key=key),
+        )
+
+    seq, par = rows(seq_journal), rows(par_journal)
+    assert seq == par, "результаты sequential и async различаются"
+    assert rows(lazy_journal) == seq, "результаты при ленивом списке различаются"
+    assert len(par[0]) == KENNELS
+    assert len(par[1]) == KENNELS * DOGS_PER_KENNEL
+    assert StandInHandler.max_in_flight <= 4, StandInHandler.max_in_flight
+
+    print("\n=== Результат ===")
+    print(f"sequential: {t_seq:.2f} c, async: {t_par:.2f} c")
+    print(f"макс. одновременных запросов: {StandInHandler.max_in_flight}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
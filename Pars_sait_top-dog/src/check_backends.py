@@ -0,0 +1,96 @@
+"""
+Проверка совпадения бэкендов извлечения (bs4 и lxml):
+обе реализации прогоняются по сохранённым страницам и по синтетической
+странице питомника, словари должны совпасть один в один.
+"""
+import time
+from pathlib import Path
+
+from extractors import BACKENDS
+
+HERE = Path(__file__).resolve().parent
+FIXTURES = ["dump.html", "dump_cat.html", "dump_cattery.html"]
+
+# На сайте нет сохранённой страницы питомника — собираем свою,
+# с теми же классами и «неудобными» местами: комментарии, script,
+# сущности, соцсети, dd внутри вложенных блоков.
+SYNTHETIC_KENNEL = """
+<html><body>
+<div class="kennel-name"><h1> Triple&amp;Moon <!-- старое имя --></h1></div>
+<div class="kennel-info">
+  <div class="photo"><img src="/images/kennels/14.jpg"></div>
+  <div class="city">Москва,
+      Россия<script>var x = 1;</script></div>
+</div>
+<div class="details-container">
+  <dl>
+    <dt>Заводчик:</dt><dd><a href="/users/579">Коваленко   Адина</a></dd>
+    <dt>Породы:</dt><dd>Австралийская овчарка, <b>Бордер-колли</b></dd>
+    <dt>Заводская приставка:</dt><dd>&#1058;&#1088;&#1080;</dd>
+    <dt>Веб-сайт:</dt><dd><a href="http://triplemoon.ru">triplemoon.ru</a></dd>
+    <dt>Эл. почта:</dt><dd>mail@triplemoon.ru</dd>
+    <dt>Соц. сети:</dt>
+    <dd class="profile-social-icons">
+      <a href="https://vk.com/triplemoon"></a><a href="https://t.me/triplemoon"></a><a>без ссылки</a>
+    </dd>
+    <dt>Телефон:</dt>
+  </dl>
+  <div><dd>+7 (900) 000-00-00</dd></div>
+</div>
+<div class="dogs-grid">
+  <div class="dogs-grid-item"><div class="dog-name"><a href="/dogs/860">Storm</a></div></div>
+  <div class="dogs-grid-item"><div class="dog-name"><a href="/dogs/861">Rain</a></div></div>
+  <div class="dogs-grid-item"><div class="dog-name"><a href="/kennels/14">не собака</a></div></div>
+</div>
+</body></html>
+""".encode("utf-8")
+
+
+def pages():
+    for name in FIXTURES:
+        yield name, (HERE / name).read_bytes()
+    yield "synthetic kennel", SYNTHETIC_KENNEL
+
+
+def main():
+    dog_url = "https://ru.top-dog.pro/dogs/860"
+    kennel_url = "https://ru.top-dog.pro/kennels/14"
+
+    failed = False
+    for name, page in pages():
+        results = {}
+        for backend, (parse_dog_page, parse_kennel_page) in BACKENDS.items():
+            results[backend] = (
+                parse_dog_page(page, dog_url, "14", "TripleMoon"),
+                parse_kennel_page(page, kennel_url),
+            )
+        reference = results["bs4"]
+        for backend, result in results.items():
+            if backend == "bs4":
+                continue
+            if result != reference:
+                failed = True
+                print(f"!! {name}: {backend} расходится с bs4")
+                for ref_part, part in zip(reference, result):
+                    if ref_part != part:
+                        print("   bs4 :", ref_part)
+                        print(f"   {backend}:", part)
+            else:
+                print(f"{name}: {backend} совпадает с bs4")
+
+    print("\n=== Скорость разбора dump.html ===")
+    page = (HERE / "dump.html").read_bytes()
+    for backend, (parse_dog_page, _) in BACKENDS.items():
+        n = 200
+        t0 = time.perf_counter()
+        for _ in range(n):
+            parse_dog_page(page, dog_url)
+        print(f"{backend:>5}: {n / (time.perf_counter() - t0):8.1f} стр/с")
+
+    if failed:
+        raise SystemExit("Бэкенды расходятся")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Проверка дедупликации собак на стенде check_async_crawl:
+часть собак показана сразу у нескольких питомников.
+  - каждая собака скачивается один раз (async и sequential);
+  - в dogs по строке на собаку, в dog_kennels — все связи;
+  - --resume с файлом dogs.bitset ничего не скачивает заново,
+    а рассинхронизированный файл пересобирается по журналу;
+  - IdBitset растёт под большие ID и переживает переоткрытие.
+"""
+import asyncio
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from check_async_crawl import DOGS_PER_KENNEL, KENNELS, StandInHandler
+from crawl_journal import CrawlJournal
+from dog_index import GROW_BYTES, IdBitset
+from parse_all import (
+    cache,
+    crawl_async,
+    crawl_sequential,
+    dog_bitset_path,
+    limiter,
+    open_seen_dogs,
+)
+
+# Собаки 101 и 102 (питомник 1) есть ещё у 2 и 5, 301 (питомник 3) — у 5
+SHARED = {2: [101, 102], 5: [101, 301]}
+UNIQUE_DOGS = KENNELS * DOGS_PER_KENNEL
+LINKS_TOTAL = UNIQUE_DOGS + sum(len(ids) for ids in SHARED.values())
+
+
+def check_journal(journal: CrawlJournal, fetched: int) -> None:
+    dog_ids = [row["dog_id"] for row in journal.rows("dog")]
+    links = {(r["dog_id"], r["kennel_id"]) for r in journal.rows("dog_kennel")}
+    assert fetched == UNIQUE_DOGS, f"скачано собак {fetched}, уникальных {UNIQUE_DOGS}"
+    assert len(dog_ids) == len(set(dog_ids)) == UNIQUE_DOGS, dog_ids
+    assert len(links) == LINKS_TOTAL, len(links)
+    assert ("101", "5") in links and ("101", "1") in links
+
+
+def check_bitset(tmp: Path) -> None:
+    path = tmp / "grow.bitset"
+    bits = IdBitset(path)
+    assert bits.add(7) and not bits.add(7)
+    big = GROW_BYTES * 8 * 5 + 3
+    assert bits.add(big)
+    assert bits.nbytes > GROW_BYTES and big in bits and 8 not in bits
+    bits.close()
+
+    bits = IdBitset(path)
+    assert len(bits) == 2 and 7 in bits and big in bits, "файл не сохранился"
+    bits.close()
+    assert len(IdBitset(path, reset=True)) == 0
+
+
+def main():
+    StandInHandler.shared_dogs = SHARED
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    links = [f"{base}/kennels/{k}" for k in range(1, KENNELS + 1)]
+    limiter.configure(0)
+    cache.configure(enabled=False)
+    tmp = Path(tempfile.mkdtemp())
+
+    try:
+        journal = CrawlJournal(tmp / "par.sqlite")
+        seen = open_seen_dogs(journal, resume=False)
+        before = StandInHandler.dog_requests
+        asyncio.run(crawl_async(links, journal, per_host=4, parse_workers=0, seen=seen))
+        check_journal(journal, StandInHandler.dog_requests - before)
+        assert seen.duplicates == LINKS_TOTAL - UNIQUE_DOGS, seen.duplicates
+        seen.close()
+        journal.close()
+
+        seq = CrawlJournal(tmp / "seq.sqlite")
+        before = StandInHandler.dog_requests
+        crawl_sequential(links, seq)
+        check_journal(seq, StandInHandler.dog_requests - before)
+        seq.close()
+
+        # Продолжение: множество берётся из файла, ничего не качается
+        journal = CrawlJournal(tmp / "par.sqlite", resume=True)
+        seen = open_seen_dogs(journal, resume=True)
+        assert len(seen) == UNIQUE_DOGS, len(seen)
+        before = StandInHandler.requests
+        asyncio.run(crawl_async(links, journal, per_host=4, parse_workers=0, seen=seen))
+        assert StandInHandler.requests == before, "resume скачал страницы заново"
+        seen.close()
+
+        # Файл потерял часть собак (падение между журналом и файлом)
+        bits = IdBitset(dog_bitset_path(journal))
+        bits.discard(101)
+        bits.close()
+        seen = open_seen_dogs(journal, resume=True)
+        assert len(seen) == UNIQUE_DOGS and not seen.claim("101")
+        seen.close()
+        journal.close()
+    finally:
+        server.shutdown()
+        StandInHandler.shared_dogs = {}
+
+    check_bitset(tmp)
+    print(f"собак {UNIQUE_DOGS}, связей с питомниками {LINKS_TOTAL}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
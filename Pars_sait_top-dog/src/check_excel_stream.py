@@ -0,0 +1,69 @@
+"""
+Проверка потоковой выгрузки в Excel:
+  - пиковая память не зависит от числа строк;
+  - при достижении предела строк запись переходит на новый лист.
+"""
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from excel_stream import StreamingExcelWriter
+from parse_all import DOG_COLUMNS
+
+
+def synthetic_dogs(n: int):
+    for i in range(n):
+        yield {
+            "dog_id": str(i),
+            "dog_url": f"https://ru.top-dog.pro/dogs/{i}",
+            "dog_name": f"Собака {i}",
+            "sex": "male" if i % 2 else "female",
+            "breed": "Австралийская овчарка",
+            "color": "блю мерль",
+            "birthday": "05.06.2009",
+            "father": f"Отец {i // 7}",
+            "mother": f"Мать {i // 5}",
+            "owner": "Коваленко Адина",
+            "breeder_person": "Коваленко Адина",
+            "kennel_name": "TripleMoon",
+            "kennel_id": str(i // 20),
+        }
+
+
+def peak_memory(path: Path, n: int) -> int:
+    tracemalloc.start()
+    with StreamingExcelWriter(path) as writer:
+        writer.add_sheet("dogs", DOG_COLUMNS)
+        writer.write_rows("dogs", synthetic_dogs(n))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp())
+
+    print("=== Пиковая память (tracemalloc) ===")
+    peaks = {}
+    for n in (2_000, 20_000):
+        peaks[n] = peak_memory(tmp / f"dogs_{n}.xlsx", n)
+        print(f"{n:>8} строк: {peaks[n] / 1024 / 1024:.1f} МБ")
+    assert peaks[20_000] < peaks[2_000] * 1.5, "память растёт вместе с выгрузкой"
+
+    print("\n=== Переход на новый лист ===")
+    path = tmp / "rollover.xlsx"
+    with StreamingExcelWriter(path, max_rows=4) as writer:
+        writer.add_sheet("dogs", DOG_COLUMNS)
+        writer.write_rows("dogs", synthetic_dogs(7))
+    wb = load_workbook(path, read_only=True)
+    sizes = {ws.title: sum(1 for _ in ws.iter_rows()) for ws in wb.worksheets}
+    print(sizes)
+    assert sizes == {"dogs": 4, "dogs_2": 4, "dogs_3": 2}, sizes
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
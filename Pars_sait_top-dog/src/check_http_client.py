@@ -0,0 +1,109 @@
+"""
+Проверка общего HTTP-клиента (http_client.py) на локальном сервере:
+  - 500 и 503 повторяются, пока не придёт 200;
+  - у 429 соблюдается Retry-After;
+  - таймаут повторяется;
+  - если сервер так и не ответил нормально — возвращается последний ответ;
+  - соединения переиспользуются (keep-alive), их не больше pool_size.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_client import HttpClient, retry_after_seconds
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    /fail/{status}/{n}/{key} — первые n запросов с этим key отвечают status,
+    дальше 200. /slow/{n}/{key} — первые n запросов висят дольше таймаута.
+    """
+    protocol_version = "HTTP/1.1"
+    seen: dict[str, int] = {}
+    ports: set[int] = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        parts = self.path.strip("/").split("/")
+        with cls.lock:
+            cls.ports.add(self.client_address[1])
+            cls.seen[self.path] = cls.seen.get(self.path, 0) + 1
+            count = cls.seen[self.path]
+
+        status, headers = 200, {}
+        if parts[0] == "fail" and count <= int(parts[2]):
+            status = int(parts[1])
+            if status == 429:
+                headers["Retry-After"] = "1"
+        elif parts[0] == "slow" and count <= int(parts[1]):
+            time.sleep(0.5)
+
+        body = f"{status} {count}".encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    retries = []
+    client = HttpClient(
+        pool_size=3, retries=3, backoff=0.01,
+        on_retry=lambda url, attempt, reason, delay: retries.append(reason),
+    )
+
+    try:
+        resp = client.get(f"{base}/fail/500/2/a", timeout=2)
+        assert resp.status_code == 200 and retries == ["HTTP 500"] * 2, retries
+
+        t0 = time.perf_counter()
+        resp = client.get(f"{base}/fail/429/1/b", timeout=2)
+        waited = time.perf_counter() - t0
+        assert resp.status_code == 200 and waited >= 1.0, waited
+
+        retries.clear()
+        resp = client.get(f"{base}/slow/1/c", timeout=0.2)
+        assert resp.status_code == 200 and retries == ["ReadTimeout"], retries
+
+        resp = client.get(f"{base}/fail/503/10/d", timeout=2)
+        assert resp.status_code == 503
+        assert FlakyHandler.seen["/fail/503/10/d"] == 4  # 1 попытка + 3 повтора
+
+        no_retry = HttpClient(retries=0)
+        try:
+            no_retry.get(f"{base}/slow/1/e", timeout=0.2)
+        except requests.Timeout:
+            pass
+        else:
+            raise AssertionError("без повторов таймаут должен пробрасываться")
+
+        FlakyHandler.ports.clear()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda i: client.get(f"{base}/ok/{i}", timeout=2), range(60)))
+        print(f"соединений на 60 запросов: {len(FlakyHandler.ports)}")
+        assert len(FlakyHandler.ports) <= 3, FlakyHandler.ports
+    finally:
+        server.shutdown()
+
+    assert retry_after_seconds("7") == 7.0
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("junk") is None
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Проверка поиска питомников перебором ID (id_probe.py, --discovery ids)
+на replay_server с «удалёнными» диапазонами ID:
+  - найдены ровно существующие питомники, в порядке ID;
+  - пустые диапазоны между ними записаны в файл пропусков, хвост — нет;
+  - повторный перебор пропуски не проверяет;
+  - ошибка проверки не превращается в пропуск;
+  - parse_all.py --discovery ids обходит всех, а страницы питомников,
+    скачанные при переборе, второй раз не скачивает — ни с кэшем,
+    ни с --no-cache.
+
+    python check_id_probe.py
+"""
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+
+import parse_all
+from crawl_journal import CrawlJournal
+from id_probe import IdGaps, IdRangeProbe
+from replay_server import ReplayConfig, ReplayServer
+
+KENNELS = 60
+MISSING = [(10, 19), (33, 33), (41, 45)]
+STOP_AFTER = 20
+
+
+def check_gaps(tmp: Path) -> None:
+    gaps = IdGaps(tmp / "gaps.json", "kennel")
+    for first, last in [(10, 12), (20, 25), (13, 19), (40, 40)]:
+        gaps.add(first, last)
+    assert gaps.ranges == [[10, 25], [40, 40]], gaps.ranges
+    assert gaps.skip(9) == 9 and gaps.skip(10) == 26 and gaps.skip(40) == 41
+    gaps.save()
+
+    other = IdGaps(tmp / "gaps.json", "cattery")
+    other.add(5, 6)
+    other.save()
+    assert IdGaps(tmp / "gaps.json", "kennel").ranges == [[10, 25], [40, 40]]
+    assert IdGaps(tmp / "gaps.json", "kennel", reset=True).ranges == []
+    assert IdGaps(tmp / "gaps.json", "cattery").ranges == [[5, 6]]
+
+
+def check_errors() -> None:
+    """ID 5 проверить не удалось: 4 в пропуски не попадает, 6 и 8..9 — попадают."""
+    def exists(url):
+        item = int(url.rsplit("/", 1)[1])
+        if item == 5:
+            raise ConnectionError("сбой")
+        return item in (1, 2, 3, 7, 10)
+
+    probe = IdRangeProbe(exists, "/kennels/{id}", stop_after=5, concurrency=3)
+    found = list(probe)
+    assert found == [f"/kennels/{i}" for i in (1, 2, 3, 7, 10)], found
+    assert probe.gaps.ranges == [[6, 6], [8, 9]], probe.gaps.ranges
+    assert [item for item, _ in probe.errors] == [5]
+
+
+def served(server: ReplayServer, kind: str) -> int:
+    return server.stats.snapshot()["by_kind"].get(kind, 0)
+
+
+def main():
+    config = ReplayConfig(
+        kennels=KENNELS, dogs_per_kennel=2, catteries=0,
+        page_size=10, latency_ms=30, missing_ids=MISSING,
+    )
+    server = ReplayServer(("127.0.0.1", 0), config)
+    base = server.start_in_thread()
+    existing = config.existing_ids(KENNELS)
+    parse_all.limiter.configure(0)
+    parse_all.cache.configure(enabled=False)
+    parse_all.client.configure(pool_size=9)
+    tmp = Path(tempfile.mkdtemp())
+
+    check_gaps(tmp)
+    check_errors()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            listed = list(parse_all.iter_kennel_links(base_url=base))
+
+        gaps_path = tmp / "topdog_id_gaps.json"
+        probe = IdRangeProbe(parse_all.kennel_exists, base + "/kennels/{id}",
+                             stop_after=STOP_AFTER, concurrency=8,
+                             gaps=IdGaps(gaps_path, "kennel"))
+        found = list(probe)
+        assert found == [f"{base}/kennels/{i}" for i in existing], found
+        assert sorted(found) == sorted(listed)
+        assert probe.probed == KENNELS + STOP_AFTER, probe.probed
+        assert IdGaps(gaps_path, "kennel").ranges == [list(r) for r in MISSING]
+        print(probe.report())
+
+        # Повторный перебор: известные пропуски не запрашиваются
+        before = served(server, "kennel")
+        again = IdRangeProbe(parse_all.kennel_exists, base + "/kennels/{id}",
+                             stop_after=STOP_AFTER, concurrency=8,
+                             gaps=IdGaps(gaps_path, "kennel"))
+        assert list(again) == found
+        missing_total = sum(last - first + 1 for first, last in MISSING)
+        assert again.skipped == missing_total, again.skipped
+        assert served(server, "kennel") - before == len(existing), "пропуски проверены снова"
+        print(again.report())
+
+        # Обход целиком: питомники со страниц перебора — из кэша
+        before = served(server, "kennel")
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all.main([
+                "--discovery", "ids", "--id-stop-after", str(STOP_AFTER),
+                "--id-gaps", str(gaps_path), "--base-url", base,
+                "--cache-dir", str(tmp / "cache"), "--rps", "0", "--no-metrics",
+                "--parse-workers", "0", "--journal", str(tmp / "journal.sqlite"),
+                "--output", str(tmp / "out.xlsx"),
+            ])
+        assert served(server, "kennel") - before == len(existing), "страницы питомников скачаны дважды"
+        journal = CrawlJournal(tmp / "journal.sqlite", resume=True)
+        assert journal.done_ids("kennel") == {str(i) for i in existing}
+        journal.close()
+
+        # Без кэша: страницы перебора обход получает в памяти (probed_pages)
+        before = served(server, "kennel")
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all.main([
+                "--discovery", "ids", "--id-stop-after", str(STOP_AFTER),
+                "--id-gaps", str(gaps_path), "--base-url", base, "--no-cache",
+                "--rps", "0", "--no-metrics", "--parse-workers", "0",
+                "--journal", str(tmp / "nocache.sqlite"),
+                "--output", str(tmp / "nocache.xlsx"),
+            ])
+        assert served(server, "kennel") - before == len(existing), "без кэша страницы скачаны дважды"
+        journal = CrawlJournal(tmp / "nocache.sqlite", resume=True)
+        assert journal.done_ids("kennel") == {str(i) for i in existing}
+        journal.close()
+        assert len(parse_all.probed_pages) == 0, len(parse_all.probed_pages)
+    finally:
+        server.shutdown()
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Проверка инкрементального обхода (--incremental) на стенде check_async_crawl:
+  - после полного обхода у одного питомника появляется новая собака;
+  - повторный обход скачивает страницы всех питомников,
+    но собак — только у изменившегося;
+  - итоговый журнал совпадает с полным обходом изменившегося сайта.
+"""
+import asyncio
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from check_async_crawl import DOGS_PER_KENNEL, KENNELS, StandInHandler
+from crawl_journal import CrawlJournal, JournalBaseline
+from parse_all import IncrementalPlan, cache, crawl_async, limiter
+
+CHANGED_KENNEL = 3
+
+
+def crawl(links, path: Path, incremental=None) -> CrawlJournal:
+    journal = CrawlJournal(path)
+    asyncio.run(crawl_async(links, journal, per_host=4, parse_workers=0,
+                            incremental=incremental))
+    journal.mark_finished()
+    return journal
+
+
+def rows(journal: CrawlJournal):
+    key = lambda r: (r.get("kennel_id"), r.get("dog_id") or "")
+    return (
+        sorted(journal.rows("kennel"), key=key),
+        sorted(journal.rows("dog"), key=key),
+    )
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    links = [f"{base}/kennels/{k}" for k in range(1, KENNELS + 1)]
+    limiter.configure(0)
+    cache.configure(enabled=False)
+
+    tmp = Path(tempfile.mkdtemp())
+    path = tmp / "journal.sqlite"
+    try:
+        crawl(links, path).close()
+
+        StandInHandler.dogs_per_kennel[CHANGED_KENNEL] = DOGS_PER_KENNEL + 1
+        before = StandInHandler.requests
+        journal = CrawlJournal(path)
+        assert journal.previous_path.exists(), "прошлый журнал не сохранён"
+        plan = IncrementalPlan(JournalBaseline(journal.previous_path))
+        asyncio.run(crawl_async(links, journal, per_host=4, parse_workers=0,
+                                incremental=plan))
+        fetched = StandInHandler.requests - before
+
+        full = crawl(links, tmp / "full.sqlite")
+    finally:
+        server.shutdown()
+
+    print(plan.report())
+    print(f"запросов при инкрементальном обходе: {fetched}")
+    assert fetched == KENNELS + DOGS_PER_KENNEL + 1, fetched
+    assert plan.unchanged == KENNELS - 1 and plan.changed == 1
+    assert plan.reused_dogs == (KENNELS - 1) * DOGS_PER_KENNEL
+    assert rows(journal) == rows(full), "инкрементальный результат неполный"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
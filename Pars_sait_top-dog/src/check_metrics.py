@@ -0,0 +1,110 @@
+"""
+Проверка метрик обхода: parse_all.main прогоняется на локальном стенде
+(replay_server.py) с долей ответов 500, затем проверяются
+topdog_metrics.json и topdog_metrics.prom. Повторный обход с дисковым
+кэшем: страницы из кэша идут в cache_hits, а не в ответы и скачанные байты.
+У воркера шардового обхода префикс метрик тот же, воркер — в метке и имени файлов.
+"""
+import contextlib
+import io
+import json
+import re
+import tempfile
+from pathlib import Path
+
+import parse_all
+from metrics import CrawlMetrics
+from replay_server import ReplayConfig, ReplayServer
+
+KENNELS = 4
+DOGS_PER_KENNEL = 5
+
+
+def crawl(tmp: Path, base_url: str, *extra: str) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_all.main([
+            "--base-url", base_url,
+            "--rps", "0", "--parse-workers", "0",
+            # без повторов каждый ответ стенда — ровно один ответ в метриках
+            "--retries", "0",
+            "--journal", str(tmp / "journal.sqlite"),
+            "--output", str(tmp / "out.xlsx"),
+            "--metrics-dir", str(tmp),
+            *extra,
+        ])
+    return json.loads((tmp / "topdog_metrics.json").read_text(encoding="utf-8"))
+
+
+def check_cached(base_url: str, server: ReplayServer) -> None:
+    """Второй обход берёт страницы из кэша — сайт их не отдаёт, байты не растут."""
+    tmp = Path(tempfile.mkdtemp())
+    cache_args = ("--cache-dir", str(tmp / "cache"))
+    crawl(tmp, base_url, *cache_args)
+    before = server.stats.snapshot()
+    snap = crawl(tmp, base_url, *cache_args)
+    after = server.stats.snapshot()
+
+    served_bytes = after["bytes_sent"] - before["bytes_sent"]
+    served_requests = after["requests"] - before["requests"]
+    assert snap["bytes_downloaded"] == served_bytes, (snap["bytes_downloaded"], served_bytes)
+    assert sum(snap["responses"].values()) == served_requests, snap["responses"]
+    assert snap["cache_hits"] > 0
+    assert snap["cache_hits"] + served_requests == snap["stages"]["fetch"]["count"]
+    print(f"с кэшем: из кэша {snap['cache_hits']}, запросов к сайту {served_requests}")
+
+
+def check_worker_names() -> None:
+    tmp = Path(tempfile.mkdtemp())
+    metrics = CrawlMetrics()
+    metrics.configure(tmp, name="topdog", labels={"worker": "host-1234"},
+                      file_name="topdog.host-1234")
+    metrics.count_response(200, 10)
+    metrics.write()
+    prom = (tmp / "topdog.host-1234_metrics.prom").read_text(encoding="utf-8")
+    names = {line.split("{")[0].split()[0] for line in prom.splitlines() if not line.startswith("#")}
+    bad = [n for n in names if not re.fullmatch(r"[a-zA-Z_:][a-zA-Z0-9_:]*", n)]
+    assert not bad, bad
+    assert 'topdog_http_responses_total{worker="host-1234",code="200"} 1' in prom
+    print("воркер: префикс topdog, метка worker, файл topdog.host-1234_metrics.prom")
+
+
+def main():
+    check_worker_names()
+    tmp = Path(tempfile.mkdtemp())
+    server = ReplayServer(("127.0.0.1", 0), ReplayConfig(
+        kennels=KENNELS, dogs_per_kennel=DOGS_PER_KENNEL, catteries=0,
+        latency_ms=5, error_rate=0.1, seed=7,
+    ))
+    base_url = server.start_in_thread()
+    try:
+        snap = crawl(tmp, base_url, "--no-cache")
+        served = server.stats.snapshot()
+        print(parse_all.metrics.report())
+        check_cached(base_url, server)
+    finally:
+        server.shutdown()
+
+    # Каждый ответ стенда учтён, байты сходятся до байта
+    assert snap["responses"] == served["by_status"], (snap["responses"], served["by_status"])
+    assert snap["bytes_downloaded"] == served["bytes_sent"]
+    assert snap["stages"]["fetch"]["count"] == served["requests"]
+    assert snap["cache_hits"] == 0
+    assert snap["errors"].get("fetch", 0) == served["by_status"].get("500", 0)
+
+    ok_pages = served["by_status"]["200"]
+    listing_pages = served["by_kind"]["listing"]
+    assert snap["stages"]["parse"]["count"] == ok_pages - listing_pages
+    assert snap["stages"]["clean"]["count"] == ok_pages - listing_pages
+    assert snap["stages"]["export"]["count"] == 1
+    assert snap["rows"]["dog"] + snap["errors"].get("fetch", 0) >= DOGS_PER_KENNEL
+
+    prom = (tmp / "topdog_metrics.prom").read_text(encoding="utf-8")
+    assert 'topdog_stage_seconds_count{mode="async",backend="bs4",stage="fetch"}' in prom
+    assert f'topdog_bytes_downloaded_total{{mode="async",backend="bs4"}} {served["bytes_sent"]}' in prom
+    assert 'topdog_http_responses_total{mode="async",backend="bs4",code="200"}' in prom
+    assert 'topdog_cache_hits_total{mode="async",backend="bs4"} 0' in prom
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Проверка параллельного обхода страниц списка (pagination.py):
+  - последняя страница подбором находится за O(log N) запросов,
+    каждая страница скачивается не больше раза;
+  - страницы за концом списка, которые отвечают ошибкой (404), при подборе
+    считаются пустыми — поиск ссылок не обрывается;
+  - повторы между страницами отбрасываются, порядок страниц сохраняется,
+    упавшая страница пропускается, выросший хвост списка дочитывается;
+  - на replay_server питомники top-dog находятся все и по порядку —
+    и по разметке пагинации, и подбором; с несколькими потоками быстрее;
+  - то же для питомников top-cat.
+
+    python check_pagination.py
+"""
+import contextlib
+import io
+import time
+
+import requests
+
+import parse_all
+import shard_crawl
+from pagination import ListingPages, iter_listing, last_page_from_markup
+from replay_server import ReplayConfig, ReplayServer
+
+KENNELS = 300
+CATTERIES = 45
+PAGE_SIZE = 10
+MISSING = [(15, 40), (101, 101)]
+
+
+def fake_listing(pages: dict[int, list[str]], failing=(), calls=None, markup=""):
+    def fetch(page):
+        if calls is not None:
+            calls.append(page)
+        if page in failing:
+            raise ConnectionError("сбой")
+        return (markup if page == 1 else ""), pages.get(page, [])
+    return fetch
+
+
+def check_probe() -> None:
+    for last in (1, 2, 3, 37, 64, 100):
+        calls = []
+        pages = {p: [f"/x/{p}"] for p in range(1, last + 1)}
+        listing = ListingPages(fake_listing(pages, calls=calls))
+        assert listing.probe_last() == last, last
+        assert len(calls) == len(set(calls)), "страница скачана дважды"
+        assert len(calls) <= 2 * last.bit_length() + 1, (last, calls)
+
+    listing = ListingPages(fake_listing({p: ["x"] for p in range(1, 101)}))
+    assert listing.probe_last(limit=30) == 30
+    listing = ListingPages(fake_listing({p: ["x"] for p in range(1, 11)}))
+    assert listing.probe_last(limit=30) == 10
+
+    assert last_page_from_markup('<a href="/kennels?page=2">2</a> <a href="/kennels?page=17">17</a>') == 17
+    assert last_page_from_markup('<a href="/list?sort=name&amp;page=9">9</a>') == 9
+    assert last_page_from_markup('<a href="/kennels/5">5</a>') is None
+
+
+def check_probe_past_end() -> None:
+    """Без разметки пагинации подбор уходит за последнюю страницу, а там 404."""
+    pages = {p: [f"/x/{p}"] for p in range(1, 6)}
+
+    def fetch(page):
+        if page > 5:
+            raise requests.HTTPError(f"404 Client Error: Not Found for page {page}")
+        return "", pages[page]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert ListingPages(fetch).probe_last() == 5
+        found = list(iter_listing(fetch, key=lambda url: url, concurrency=2))
+    assert found == [f"/x/{p}" for p in range(1, 6)], found
+
+
+def check_listing() -> None:
+    # на второй странице повтор с первой (список сдвинулся), третья падает,
+    # пятой нет в разметке (список вырос) — она дочитывается после
+    pages = {
+        1: ["/x/1", "/x/2"],
+        2: ["/x/2", "/x/3"],
+        3: ["/x/4"],
+        4: ["/x/5", "/x/1"],
+        5: ["/x/6"],
+    }
+    calls = []
+    fetch = fake_listing(pages, failing={3}, calls=calls, markup='<a href="?page=4">4</a>')
+    with contextlib.redirect_stdout(io.StringIO()):
+        found = list(iter_listing(fetch, key=lambda url: url, concurrency=3))
+    assert found == ["/x/1", "/x/2", "/x/3", "/x/5", "/x/6"], found
+    assert sorted(calls) == [1, 2, 3, 4, 5, 6], calls
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        limited = list(iter_listing(fake_listing(pages), key=lambda url: url, max_pages=2))
+    assert limited == ["/x/1", "/x/2", "/x/3"], limited
+
+
+def listing_requests(server: ReplayServer) -> int:
+    return server.stats.snapshot()["by_kind"].get("listing", 0)
+
+
+def crawl_listing(server: ReplayServer, base: str, concurrency: int) -> tuple[list[str], int, float]:
+    before = listing_requests(server)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        found = list(parse_all.iter_kennel_links(base_url=base, concurrency=concurrency))
+    return found, listing_requests(server) - before, time.perf_counter() - started
+
+
+def start(pagination: bool) -> tuple[ReplayServer, ReplayConfig, str]:
+    config = ReplayConfig(
+        kennels=KENNELS, catteries=CATTERIES, page_size=PAGE_SIZE,
+        latency_ms=30, missing_ids=MISSING, pagination=pagination,
+    )
+    server = ReplayServer(("127.0.0.1", 0), config)
+    return server, config, server.start_in_thread()
+
+
+def main():
+    check_probe()
+    check_probe_past_end()
+    check_listing()
+
+    parse_all.limiter.configure(0)
+    parse_all.cache.configure(enabled=False)
+    parse_all.client.configure(pool_size=8)
+    topcat = shard_crawl.SITES["topcat"].module
+    topcat.limiter.configure(0)
+    topcat.cache.configure(enabled=False)
+    topcat.client.configure(pool_size=8)
+
+    timings = {}
+    for pagination in (True, False):
+        server, config, base = start(pagination)
+        try:
+            expected = [f"{base}/kennels/{i}" for i in config.existing_ids(KENNELS)]
+            pages = -(-len(expected) // PAGE_SIZE)
+
+            found, requests, elapsed = crawl_listing(server, base, concurrency=8)
+            assert found == expected, found[:5]
+            how = "разметка" if pagination else "подбор"
+            if pagination:
+                # все страницы и одна пустая после последней
+                assert requests == pages + 1, requests
+            else:
+                assert requests <= pages + 2 * pages.bit_length() + 2, requests
+            print(f"{how}: страниц {pages}, запросов {requests}, {elapsed:.2f} с")
+
+            if pagination:
+                serial, _, timings[1] = crawl_listing(server, base, concurrency=1)
+                assert serial == expected
+                timings[8] = elapsed
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    cats = list(topcat.iter_cattery_links(base_url=base, concurrency=4))
+                assert [topcat.cattery_id(url) for url in cats] == \
+                    [str(i) for i in config.existing_ids(CATTERIES)], cats
+        finally:
+            server.shutdown()
+
+    speedup = timings[1] / timings[8]
+    print(f"1 поток: {timings[1]:.2f} с, 8 потоков: {timings[8]:.2f} с, ускорение {speedup:.1f}x")
+    assert speedup > 3, speedup
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Проверка выгрузки в Parquet (--parquet-dir):
+  - parse_all.main и parse_all_topcat.main на локальном стенде
+    (replay_server.py): в .parquet те же строки, что и в Excel,
+    ID — int64, порода/окрас/город — словарём;
+  - --resume: готовые записи журнала попадают в новые файлы;
+  - на синтетических 30 000 собак — группы строк и время загрузки
+    в pandas: read_parquet против read_excel.
+
+    python check_parquet.py
+"""
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+import parse_all
+from bench_memory import synthetic_dog
+from excel_stream import StreamingExcelWriter
+from parquet_stream import StreamingParquetWriter
+from replay_server import ReplayConfig, ReplayServer
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Pars_sait_top-cat" / "src"))
+
+import parse_all_topcat  # noqa: E402
+
+SYNTHETIC_DOGS = 30_000
+ROW_GROUP = 5_000
+
+
+def same_rows(parquet_path: Path, excel_path: Path, sheet: str, key: str) -> int:
+    """Сравнивает таблицу Parquet с листом Excel (значения как строки)."""
+    a = pd.read_parquet(parquet_path).astype("string").fillna("")
+    b = pd.read_excel(excel_path, sheet_name=sheet, dtype=str).astype("string").fillna("")
+    a = a.sort_values(key).reset_index(drop=True)
+    b = b.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a, b, check_dtype=False)
+    return len(a)
+
+
+def check_topdog(tmp: Path) -> None:
+    server = ReplayServer(("127.0.0.1", 0), ReplayConfig(
+        kennels=5, dogs_per_kennel=6, catteries=0, latency_ms=0, seed=3,
+    ))
+    base_url = server.start_in_thread()
+    args = [
+        "--base-url", base_url, "--no-cache", "--rps", "0", "--parse-workers", "0",
+        "--journal", str(tmp / "topdog.sqlite"),
+        "--output", str(tmp / "topdog.xlsx"),
+        "--parquet-dir", str(tmp / "topdog"),
+        "--no-metrics",
+    ]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all.main(args)
+            # Повтор с --resume: всё уже в журнале, файлы собираются из него
+            parse_all.main(args + ["--resume"])
+    finally:
+        server.shutdown()
+
+    out = tmp / "topdog"
+    assert not list(out.glob("*.part")), "остались недописанные файлы"
+    dogs = same_rows(out / "dogs.parquet", tmp / "topdog.xlsx", "dogs", "dog_id")
+    kennels = same_rows(out / "kennels.parquet", tmp / "topdog.xlsx", "kennels", "kennel_id")
+    assert (kennels, dogs) == (5, 30), (kennels, dogs)
+
+    schema = pq.read_schema(out / "dogs.parquet")
+    assert str(schema.field("dog_id").type) == "int64"
+    assert str(schema.field("breed").type).startswith("dictionary")
+    print(f"top-dog: питомников {kennels}, собак {dogs} — совпадают с Excel")
+
+
+def check_topcat(tmp: Path) -> None:
+    server = ReplayServer(("127.0.0.1", 0), ReplayConfig(
+        kennels=0, catteries=4, cats_per_cattery=3, latency_ms=0, seed=3,
+    ))
+    base_url = server.start_in_thread()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all_topcat.main([
+                "--base-url", base_url, "--no-cache", "--rps", "0",
+                "--journal", str(tmp / "topcat.sqlite"),
+                "--output", str(tmp / "topcat.xlsx"),
+                "--parquet-dir", str(tmp / "topcat"),
+                "--no-metrics",
+            ])
+    finally:
+        server.shutdown()
+
+    out = tmp / "topcat"
+    catteries = same_rows(out / "catteries.parquet", tmp / "topcat.xlsx", "catteries", "cattery_id")
+    cats = same_rows(out / "cats.parquet", tmp / "topcat.xlsx", "cats", "cat_id")
+    assert (catteries, cats) == (4, 12), (catteries, cats)
+    print(f"top-cat: питомников {catteries}, кошек {cats} — совпадают с Excel")
+
+
+def check_load_time(tmp: Path) -> None:
+    rows = [synthetic_dog(i) for i in range(SYNTHETIC_DOGS)]
+
+    with StreamingExcelWriter(tmp / "dogs.xlsx") as writer:
+        writer.add_sheet("dogs", parse_all.DOG_COLUMNS)
+        writer.write_rows("dogs", rows)
+    with StreamingParquetWriter(tmp / "synthetic", row_group_size=ROW_GROUP) as writer:
+        writer.add_table("dogs", parse_all.DOG_COLUMNS,
+                         ints=parse_all.INT_COLUMNS, dictionary=parse_all.PARQUET_DICTIONARY)
+        writer.write_rows("dogs", rows)
+
+    parquet_path = tmp / "synthetic" / "dogs.parquet"
+    meta = pq.ParquetFile(parquet_path).metadata
+    assert meta.num_row_groups == SYNTHETIC_DOGS // ROW_GROUP, meta.num_row_groups
+    assert meta.num_rows == SYNTHETIC_DOGS
+
+    t0 = time.perf_counter()
+    excel = pd.read_excel(tmp / "dogs.xlsx")
+    t_excel = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    parquet = pd.read_parquet(parquet_path)
+    t_parquet = time.perf_counter() - t0
+    assert len(excel) == len(parquet) == SYNTHETIC_DOGS
+    assert str(parquet["breed"].dtype) == "category"
+
+    xlsx_kb = (tmp / "dogs.xlsx").stat().st_size / 1024
+    parquet_kb = parquet_path.stat().st_size / 1024
+    print(f"{SYNTHETIC_DOGS} собак: xlsx {xlsx_kb:.0f} КБ, загрузка {t_excel:.2f} c; "
+          f"parquet {parquet_kb:.0f} КБ, загрузка {t_parquet:.3f} c "
+          f"(в {t_excel / t_parquet:.0f} раз быстрее)")
+    assert t_parquet < t_excel / 5, "Parquet грузится не быстрее Excel"
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp())
+    check_topdog(tmp)
+    check_topcat(tmp)
+    check_load_time(tmp)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Проверка родословного графа (pedigree.py):
+  - father_id/mother_id берутся из ссылок на странице собаки;
+  - родители по кличке находятся, если кличка однозначна;
+  - коэффициенты инбридинга совпадают с известными (полусибсы, сибсы,
+    родитель × потомок) и с полной матрицей родства на случайной родословной;
+  - цикл в данных разрывается, а не вешает запросы;
+  - на 300 тыс. собак запросы идут за миллисекунды, граф переживает save/load;
+  - parse_all.py --pedigree строит граф по журналу обхода;
+  - pedigree.py --generations меньше 1 отвергает, а не подменяет на 10.
+
+    python check_pedigree.py
+"""
+import contextlib
+import io
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import parse_all
+from extractors import BACKENDS
+import pedigree
+from pedigree import PedigreeGraph
+from replay_server import ReplayConfig, ReplayServer
+
+HERE = Path(__file__).resolve().parent
+
+BIG_GENERATIONS = 30
+BIG_PER_GENERATION = 10_000
+
+
+def dog(dog_id, father_id=None, mother_id=None, name=None, father=None, mother=None) -> dict:
+    return {
+        "dog_id": str(dog_id), "dog_name": name or f"Dog {dog_id}",
+        "father_id": None if father_id is None else str(father_id),
+        "mother_id": None if mother_id is None else str(mother_id),
+        "father": father, "mother": mother,
+    }
+
+
+def check_extract() -> None:
+    page = (HERE / "dump.html").read_bytes()
+    for backend, (parse_dog_page, _) in BACKENDS.items():
+        row = parse_dog_page(page, "https://top-dog.pro/dogs/1")
+        assert (row["father_id"], row["mother_id"]) == ("855", "1334"), (backend, row)
+
+
+def check_known() -> None:
+    rows = [
+        dog(1), dog(2), dog(3), dog(4),
+        dog(10, 1, 2), dog(11, 1, 3),          # полусибсы по отцу 1
+        dog(12, 10, 11),                       # их потомок: F = 1/8
+        dog(20, 1, 2), dog(21, 1, 2),          # полные сибсы
+        dog(22, 20, 21),                       # F = 1/4
+        dog(30, 1, 20),                        # отец × дочь: F = 1/4
+        dog(40, 22, 4), dog(41, 22, 3),        # полусибсы от инбредного 22
+        dog(42, 40, 41),                       # F = 1/8 * (1 + 1/4)
+    ]
+    graph = PedigreeGraph.from_rows(rows)
+    expected = {1: 0, 10: 0, 12: 1 / 8, 22: 1 / 4, 30: 1 / 4, 42: 1 / 8 * (1 + 1 / 4)}
+    for dog_id, f in expected.items():
+        assert abs(graph.inbreeding(dog_id) - f) < 1e-12, (dog_id, graph.inbreeding(dog_id), f)
+    assert abs(graph.kinship(20, 21) - 1 / 4) < 1e-12
+    assert graph.ancestors(42) == [1, 2, 3, 4, 20, 21, 22, 40, 41]
+    assert graph.ancestors(42, generations=1) == [40, 41]
+    assert graph.descendants(1) == [10, 11, 12, 20, 21, 22, 30, 40, 41, 42]
+    assert graph.descendants(22, generations=1) == [40, 41]
+    assert graph.children(1) == [10, 11, 20, 21, 30]
+    assert graph.parents(12) == (10, 11) and graph.parents(1) == (None, None)
+
+
+def check_names() -> None:
+    rows = [
+        dog(1, name="Thornapple Dr Thunder"),
+        dog(2, name="Twin"), dog(3, name="twin"),
+        # отец по кличке (регистр и пробелы не важны), мать — неоднозначна
+        dog(5, father="thornapple  dr THUNDER", mother="Twin"),
+        # ссылка на собаку, которой нет в выгрузке, — тоже вершина
+        dog(6, father_id=999, mother_id=5),
+        dog(7, 7, None),                       # сам себе отец — не связь
+    ]
+    graph = PedigreeGraph.from_rows(rows)
+    assert graph.parents(5) == (1, None)
+    assert graph.parents(6) == (999, 5) and graph.parents(999) == (None, None)
+    assert graph.parents(7) == (None, None)
+    assert graph.stats == {"dogs": 6, "by_link": 3, "by_name": 1, "unresolved": 1}, graph.stats
+
+
+def check_cycle() -> None:
+    rows = [dog(1, 3, None), dog(2, 1, None), dog(3, 2, None), dog(4, 3, 5), dog(5)]
+    graph = PedigreeGraph.from_rows(rows)
+    assert graph.cycles_broken == 1
+    assert len(graph.ancestors(4)) <= 4
+    graph.inbreeding(4)
+    for v in range(len(graph)):
+        for p in (graph.father[v], graph.mother[v]):
+            assert p < 0 or graph.rank[p] < graph.rank[v]
+
+
+def random_rows(generations: int, per_generation: int, seed: int, founders: int = None):
+    """Поколения собак; родители — из 1-3 предыдущих поколений, иногда неизвестны."""
+    rnd = random.Random(seed)
+    founders = founders or per_generation
+    gens = [list(range(1, founders + 1))]
+    rows = [dog(i) for i in gens[0]]
+    next_id = founders + 1
+    for _ in range(1, generations):
+        pool = [d for g in gens[-3:] for d in g]
+        current = []
+        for _ in range(per_generation):
+            sire = rnd.choice(pool) if rnd.random() > 0.02 else None
+            dam = rnd.choice(pool) if rnd.random() > 0.02 else None
+            if sire is not None and sire == dam:
+                dam = None
+            rows.append(dog(next_id, sire, dam))
+            current.append(next_id)
+            next_id += 1
+        gens.append(current)
+    return rows
+
+
+def tabular_inbreeding(rows: list[dict]) -> dict[int, float]:
+    """Табличный метод: полная матрица родства в порядке рождения (O(n^2))."""
+    order = [int(r["dog_id"]) for r in rows]
+    pos = {d: i for i, d in enumerate(order)}
+    parents = [(pos.get(int(r["father_id"])) if r["father_id"] else None,
+                pos.get(int(r["mother_id"])) if r["mother_id"] else None) for r in rows]
+    n = len(order)
+    kin = np.zeros((n, n))
+    for i, (s, d) in enumerate(parents):
+        for j in range(i):
+            parts = [kin[p, j] for p in (s, d) if p is not None]
+            kin[i, j] = kin[j, i] = sum(parts) / 2
+        kin[i, i] = (1 + (kin[s, d] if s is not None and d is not None else 0)) / 2
+    return {order[i]: (kin[s, d] if s is not None and d is not None else 0.0)
+            for i, (s, d) in enumerate(parents)}
+
+
+def check_tabular() -> None:
+    rows = random_rows(generations=12, per_generation=30, seed=7, founders=8)
+    graph = PedigreeGraph.from_rows(rows)
+    expected = tabular_inbreeding(rows)
+    assert max(expected.values()) > 0.1, "родословная без инбридинга ничего не проверяет"
+    for dog_id, f in expected.items():
+        full = graph.inbreeding(dog_id, generations=None)
+        assert abs(full - f) < 1e-9, (dog_id, full, f)
+    # предки дальше 3 поколений считаются неизвестными: F только меньше
+    short = {dog_id: graph.inbreeding(dog_id, generations=3) for dog_id in expected}
+    assert all(short[d] <= expected[d] + 1e-12 for d in expected)
+    assert any(short[d] < expected[d] - 1e-6 for d in expected)
+
+
+def timed(calls) -> list[float]:
+    out = []
+    for call in calls:
+        t0 = time.perf_counter()
+        call()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def check_scale(tmp: Path) -> None:
+    rows = random_rows(BIG_GENERATIONS, BIG_PER_GENERATION, seed=1)
+    t0 = time.perf_counter()
+    graph = PedigreeGraph.from_rows(rows)
+    built = time.perf_counter() - t0
+    size = sum(a.nbytes for a in (graph.ids, graph.father, graph.mother,
+                                  graph.child_ptr, graph.child_idx, graph.rank))
+    print(f"{graph.report()}; построен за {built:.1f} с, массивы {size / 1024 / 1024:.1f} МБ")
+
+    path = tmp / "pedigree.npz"
+    graph.save(path)
+    loaded = PedigreeGraph.load(path)
+    assert np.array_equal(loaded.father, graph.father) and np.array_equal(loaded.child_idx, graph.child_idx)
+
+    rnd = random.Random(2)
+    last = len(rows) - BIG_PER_GENERATION
+    sample = [int(rows[rnd.randrange(last, len(rows))]["dog_id"]) for _ in range(200)]
+    middle = [int(rows[rnd.randrange(last - 3 * BIG_PER_GENERATION, last)]["dog_id"]) for _ in range(200)]
+
+    queries = {
+        "предки (5 поколений)": [lambda d=d: loaded.ancestors(d, generations=5) for d in sample],
+        "потомки (3 поколения)": [lambda d=d: loaded.descendants(d, generations=3) for d in middle],
+        "инбридинг (10 поколений)": [lambda d=d: loaded.inbreeding(d) for d in sample],
+    }
+    for name, calls in queries.items():
+        cold = timed(calls)
+        warm = timed(calls)
+        print(f"  {name}: медиана {statistics.median(cold):.2f} мс, "
+              f"повторно {statistics.median(warm):.3f} мс")
+        assert statistics.median(cold) < 50, (name, statistics.median(cold))
+        assert statistics.median(warm) < 1, (name, statistics.median(warm))
+
+
+def check_crawl(tmp: Path) -> None:
+    config = ReplayConfig(kennels=4, dogs_per_kennel=3, catteries=0, latency_ms=1)
+    server = ReplayServer(("127.0.0.1", 0), config)
+    base = server.start_in_thread()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all.main([
+                "--base-url", base, "--rps", "0", "--no-cache", "--no-metrics",
+                "--parse-workers", "0", "--journal", str(tmp / "journal.sqlite"),
+                "--output", str(tmp / "out.xlsx"), "--pedigree", str(tmp / "crawl.npz"),
+            ])
+    finally:
+        server.shutdown()
+    graph = PedigreeGraph.load(tmp / "crawl.npz")
+    # у всех собак стенда одни и те же родители (страница-образец)
+    dogs = list(range(1, 4 * 3 + 1))
+    assert graph.descendants(855) == dogs and graph.descendants(1334) == dogs
+    assert graph.parents(5) == (855, 1334)
+
+
+def check_cli(tmp: Path) -> None:
+    graph_path = tmp / "crawl.npz"
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        pedigree.main(["--graph", str(graph_path), "--ancestors", "5", "--generations", "1"])
+        pedigree.main(["--graph", str(graph_path), "--inbreeding", "5"])
+    assert "Предков у 5: 2: [855, 1334]" in out.getvalue(), out.getvalue()
+    assert "(10 поколений)" in out.getvalue(), out.getvalue()
+
+    with contextlib.redirect_stderr(io.StringIO()):
+        for bad in ("0", "-1"):
+            try:
+                pedigree.main(["--graph", str(graph_path), "--inbreeding", "5", "--generations", bad])
+            except SystemExit as e:
+                assert e.code == 2, e.code
+            else:
+                raise AssertionError(f"--generations {bad} принят")
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp())
+    check_extract()
+    check_known()
+    check_names()
+    check_cycle()
+    check_tabular()
+    check_crawl(tmp)
+    check_cli(tmp)
+    check_scale(tmp)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
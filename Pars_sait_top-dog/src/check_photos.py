@@ -0,0 +1,167 @@
+"""
+Проверка скачивания фото (photo_store.py, parse_all.py --photos-dir):
+  - submit() не ждёт загрузки, файл пишется кусками, без resp.content;
+  - файл называется sha256 содержимого, одинаковые картинки хранятся один раз;
+  - ошибка загрузки не оставляет ни файла, ни записи в индексе;
+  - обход с --photos-dir скачивает фото всех питомников и собак,
+    повторный обход их не перекачивает, удалённый файл скачивается снова;
+  - фото идут через свой клиент и не расходуют бюджет запросов страниц.
+
+    python check_photos.py
+"""
+import contextlib
+import hashlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+import parse_all
+from photo_store import PhotoStore
+from replay_server import ReplayConfig, ReplayServer
+
+KENNELS = 12
+DOGS_PER_KENNEL = 5
+VARIANTS = 7
+
+
+class SlowResponse:
+    """Ответ, который отдаётся только кусками: обращение к content — ошибка."""
+
+    def __init__(self, body: bytes, status_code: int = 200):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {"Content-Type": "image/png"}
+
+    @property
+    def content(self):
+        raise AssertionError("фото прочитано в память целиком")
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class SlowClient:
+    def __init__(self, bodies: dict[str, bytes], delay: float):
+        self.bodies = bodies
+        self.delay = delay
+        self.calls: list[str] = []
+
+    def get(self, url, stream=False, timeout=None):
+        assert stream, "фото запрошено без stream=True"
+        self.calls.append(url)
+        time.sleep(self.delay)
+        if url not in self.bodies:
+            return SlowResponse(b"", 404)
+        return SlowResponse(self.bodies[url])
+
+
+def stored_files(root: Path) -> list[Path]:
+    return [p for p in root.glob("*/*") if p.is_file()]
+
+
+def check_store(tmp: Path) -> None:
+    same = b"\x89PNG" + bytes(range(256)) * 1000
+    other = b"\x89PNG" + bytes(range(255, -1, -1)) * 1000
+    bodies = {"http://x/a": same, "http://x/b": same, "http://x/c": other}
+    client = SlowClient(bodies, delay=0.2)
+    store = PhotoStore(tmp / "unit", client, workers=2)
+
+    started = time.perf_counter()
+    for url in ["http://x/a", "http://x/b", "http://x/c", "http://x/missing", "http://x/a"]:
+        store.submit(url)
+    assert time.perf_counter() - started < 0.1, "submit() ждал загрузки"
+    store.close()
+
+    assert sorted(client.calls) == ["http://x/a", "http://x/b", "http://x/c", "http://x/missing"]
+    files = stored_files(tmp / "unit")
+    assert sorted(p.name for p in files) == sorted(
+        f"{hashlib.sha256(body).hexdigest()}.png" for body in (same, other)
+    ), files
+    assert store.downloaded == 2 and store.shared == 1, store.report()
+    assert [url for url, _ in store.failed] == ["http://x/missing"]
+    assert not list((tmp / "unit").glob(".*.part"))
+
+    again = PhotoStore(tmp / "unit", client, workers=2)
+    assert again.lookup("http://x/missing") is None
+    assert again.fetch("http://x/b") == again.lookup("http://x/a")
+    assert again.skipped == 1
+    again.close()
+
+
+def crawl(base: str, tmp: Path, photos: Path) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        parse_all.main([
+            "--base-url", base, "--rps", "0", "--no-cache", "--no-metrics",
+            "--parse-workers", "0", "--journal", str(tmp / "journal.sqlite"),
+            "--output", str(tmp / "out.xlsx"), "--photos-dir", str(photos),
+            "--photo-rps", "0",
+        ])
+    return out.getvalue()
+
+
+def images_served(server: ReplayServer) -> int:
+    return server.stats.snapshot()["by_kind"].get("image", 0)
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp())
+    check_store(tmp)
+
+    config = ReplayConfig(kennels=KENNELS, dogs_per_kennel=DOGS_PER_KENNEL, catteries=0,
+                          latency_ms=10, photo_variants=VARIANTS, photo_kb=64)
+    server = ReplayServer(("127.0.0.1", 0), config)
+    base = server.start_in_thread()
+    photos = tmp / "photos"
+    records = KENNELS + KENNELS * DOGS_PER_KENNEL
+    # Сколько запросов прошло через бюджет страниц
+    page_budget = []
+    parse_all.client.before_request = lambda: page_budget.append(1)
+    try:
+        output = crawl(base, tmp, photos)
+        print(next(line for line in output.splitlines() if line.startswith("Фото:")))
+        assert images_served(server) == records, images_served(server)
+        served = server.stats.snapshot()["requests"]
+        assert len(page_budget) == served - records, (len(page_budget), served, records)
+        files = stored_files(photos)
+        assert len(files) == VARIANTS, len(files)
+        for path in files:
+            assert hashlib.sha256(path.read_bytes()).hexdigest() == path.stem, path
+
+        store = PhotoStore(photos, client=None, workers=1)
+        kennel_photo = store.lookup(f"{base}/images/kennels/3.jpg")
+        assert kennel_photo == store.lookup(f"{base}/images/dogs/{3 + VARIANTS}.jpg")
+        store.close()
+
+        # повторный обход: все фото уже на диске
+        crawl(base, tmp, photos)
+        assert images_served(server) == records, "фото скачаны повторно"
+
+        # удалённый файл скачивается снова, и только по ссылкам на эту картинку
+        # (после первой из них файл снова на месте, остальные пропускаются)
+        kennel_photo.unlink()
+        crawl(base, tmp, photos)
+        same_picture = sum(1 for i in range(1, KENNELS + 1) if (i - 1) % VARIANTS == 2)
+        same_picture += sum(1 for i in range(1, records - KENNELS + 1) if (i - 1) % VARIANTS == 2)
+        assert records < images_served(server) <= records + same_picture, images_served(server)
+        assert kennel_photo.exists()
+    finally:
+        server.shutdown()
+        parse_all.client.before_request = parse_all.limiter.acquire
+
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
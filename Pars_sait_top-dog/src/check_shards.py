@@ -0,0 +1,204 @@
+"""
+Проверка шардового обхода (shard_crawl.py + WorkQueue) на replay_server:
+  - очередь: повторный ID не добавляется, истёкшая аренда выдаётся снова,
+    подтверждение от потерявшего аренду воркера не принимается,
+    после max_attempts шард уходит в failed;
+  - «упавший» воркер обошёл шард, но не подтвердил — шард обходится
+    повторно, а в общей выгрузке нет повторов;
+  - 1 воркер против 3: одинаковая выгрузка, время обхода падает почти
+    пропорционально числу воркеров (страницы отдаются с задержкой);
+  - собака, показанная у питомников из разных шардов, в общем журнале
+    одна, а связей с питомниками — столько, сколько питомников;
+  - top-cat: те же очередь и сборка с воркерами parse_all_topcat.py.
+
+    python check_shards.py
+"""
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import parse_all
+import shard_crawl
+from crawl_journal import CrawlJournal
+from replay_server import ReplayConfig, ReplayServer
+from work_queue import WorkQueue
+
+KENNELS = 30
+DOGS_PER_KENNEL = 4
+CATTERIES = 8
+CATS_PER_CATTERY = 3
+SHARD_SIZE = 3
+# Собаки питомника 1 (шард 1) показаны ещё у 5 и 29 (шарды 2 и 10),
+# собака 60 (питомник 15) — у 29
+SHARED_DOGS = {5: [1, 2], 29: [1, 60]}
+LINKS_TOTAL = KENNELS * DOGS_PER_KENNEL + sum(len(ids) for ids in SHARED_DOGS.values())
+
+WORKER_ARGS = [
+    "--", "--no-cache", "--rps", "0", "--no-metrics", "--retries", "0",
+    "--concurrency", "2", "--parse-workers", "0", "--backend", "lxml",
+]
+
+
+def check_queue(tmp: Path) -> None:
+    queue = WorkQueue(tmp / "unit.sqlite", lease=0.3, max_attempts=2)
+    urls = [f"/kennels/{i}" for i in range(1, 6)]
+    key = lambda url: url.rsplit("/", 1)[1]
+    assert queue.add(urls, key, shard_size=2) == 5
+    assert queue.add(urls[:3], key, shard_size=2) == 0, "повторные ID попали в очередь"
+
+    dead = queue.lease_shard("dead")
+    assert dead.items == urls[:2] and dead.attempt == 1
+    alive = [queue.lease_shard("alive"), queue.lease_shard("alive")]
+    assert queue.lease_shard("alive") is None, "шард выдан при живой аренде"
+    for shard in alive:
+        assert queue.ack(shard)
+
+    time.sleep(0.35)
+    again = queue.lease_shard("alive")
+    assert again.shard_id == dead.shard_id and again.attempt == 2, again
+    assert not queue.ack(dead), "принято подтверждение от потерявшего аренду"
+    assert not queue.renew(dead)
+
+    # вторая выдача тоже истекла — попытки кончились
+    time.sleep(0.35)
+    assert queue.lease_shard("alive") is None
+    assert queue.stats()["shards"] == {"done": 2, "failed": 1}, queue.stats()
+
+    queue.close_discovery()
+    assert list(queue.iter_shards("alive", poll=0.01)) == []
+    queue.close()
+
+
+def table_ids(db: Path, table: str, columns: str) -> list:
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(f"SELECT {columns} FROM {table}").fetchall()
+    finally:
+        conn.close()
+
+
+def check_output(output: Path, db: Path) -> dict:
+    """Выгрузка полная и без повторов — в Excel и в базе."""
+    sheets = pd.read_excel(output, sheet_name=None, dtype=str)
+    dogs = sheets["dogs"]["dog_id"].tolist()
+    kennels = sheets["kennels"]["kennel_id"].tolist()
+    links = list(zip(sheets["dog_kennels"]["dog_id"], sheets["dog_kennels"]["kennel_id"]))
+    assert len(kennels) == len(set(kennels)) == KENNELS, len(kennels)
+    assert len(dogs) == len(set(dogs)) == KENNELS * DOGS_PER_KENNEL, len(dogs)
+    assert len(links) == len(set(links)) == LINKS_TOTAL, len(links)
+    assert {("1", "1"), ("1", "5"), ("1", "29")} <= set(links)
+    assert len(table_ids(db, "dogs", "dog_id")) == KENNELS * DOGS_PER_KENNEL
+    assert len(table_ids(db, "dog_kennels", "dog_id, kennel_id")) == LINKS_TOTAL
+    assert len(table_ids(db, "kennels", "kennel_id")) == KENNELS
+    return {"kennels": sorted(kennels), "dogs": sorted(dogs)}
+
+
+def run(tmp: Path, name: str, workers: int, base: str, *extra: str) -> tuple[float, dict]:
+    t0 = time.perf_counter()
+    shard_crawl.main([
+        "run", "--workers", str(workers), "--queue", str(tmp / f"{name}.sqlite"),
+        "--shard-size", str(SHARD_SIZE), "--base-url", base, "--rps", "0", "--no-cache",
+        "--output", str(tmp / f"{name}.xlsx"), "--db", str(tmp / f"{name}.db"),
+        *extra, *WORKER_ARGS,
+    ])
+    elapsed = time.perf_counter() - t0
+    return elapsed, check_output(tmp / f"{name}.xlsx", tmp / f"{name}.db")
+
+
+def check_crashed_worker(tmp: Path, base: str) -> None:
+    """Воркер обошёл шард в свой журнал и «упал» до подтверждения."""
+    queue_path = tmp / "crash.sqlite"
+    shard_crawl.main([
+        "enqueue", "--queue", str(queue_path), "--shard-size", str(SHARD_SIZE),
+        "--base-url", base, "--rps", "0", "--no-cache",
+    ])
+    queue = WorkQueue(queue_path, lease=1)
+    shard = queue.lease_shard("ghost")
+    ghost = CrawlJournal(tmp / "ghost.sqlite")
+    queue.register_worker("ghost", ghost.path)
+    parse_all.crawl_sequential(shard.items, ghost)
+    ghost.close()
+    queue.close()
+
+    run(tmp, "crash", 2, base, "--resume", "--lease", "1")
+    queue = WorkQueue(queue_path)
+    stats = queue.stats()
+    queue.close()
+    assert stats["redelivered"] == 1 and stats["shards"] == {"done": KENNELS // SHARD_SIZE}, stats
+    print(f"упавший воркер: шард {shard.shard_id} обойден повторно, повторов в выгрузке нет")
+
+
+def check_merge_shared_dogs(tmp: Path) -> None:
+    """Одну собаку скачали два воркера — через питомники из разных шардов."""
+    paths = []
+    for worker, kennel_id in (("a", "1"), ("b", "2")):
+        journal = CrawlJournal(tmp / f"shared.{worker}.sqlite")
+        journal.record("dog_kennel", "603", {"dog_id": "603", "kennel_id": kennel_id},
+                       parent_id=kennel_id)
+        journal.record("dog", "603", {"dog_id": "603", "kennel_id": kennel_id},
+                       parent_id=kennel_id)
+        journal.record("kennel", kennel_id, {"kennel_id": kennel_id})
+        journal.close()
+        paths.append(journal.path)
+
+    merged = CrawlJournal(tmp / "shared.merged.sqlite")
+    for path in paths:
+        merged.merge_from(path, shard_crawl.SITES["topdog"].unique_kinds)
+    dogs = [row["dog_id"] for row in merged.rows("dog")]
+    links = [(row["dog_id"], row["kennel_id"]) for row in merged.rows("dog_kennel")]
+    merged.close()
+    assert dogs == ["603"], f"собаки в общем журнале: {dogs}"
+    assert links == [("603", "1"), ("603", "2")], links
+    print("общая собака двух шардов: в журнале одна, связей две")
+
+
+def check_topcat(tmp: Path, base: str) -> None:
+    output = tmp / "topcat.xlsx"
+    shard_crawl.main([
+        "run", "--site", "topcat", "--workers", "2", "--queue", str(tmp / "topcat.sqlite"),
+        "--shard-size", str(SHARD_SIZE), "--base-url", base, "--rps", "0", "--no-cache",
+        "--output", str(output),
+        "--", "--no-cache", "--rps", "0", "--no-metrics", "--retries", "0", "--no-cat-html",
+    ])
+    sheets = pd.read_excel(output, sheet_name=None, dtype=str)
+    catteries = sheets["catteries"]["cattery_id"].tolist()
+    cats = list(zip(sheets["cats"]["cat_id"], sheets["cats"]["cattery_id"]))
+    assert len(catteries) == len(set(catteries)) == CATTERIES, catteries
+    assert len(cats) == len(set(cats)) == CATTERIES * CATS_PER_CATTERY, len(cats)
+    print(f"top-cat: питомников {len(catteries)}, кошек {len(cats)}")
+
+
+def main():
+    config = ReplayConfig(
+        kennels=KENNELS, dogs_per_kennel=DOGS_PER_KENNEL,
+        catteries=CATTERIES, cats_per_cattery=CATS_PER_CATTERY,
+        page_size=10, latency_ms=100, shared_dogs=SHARED_DOGS,
+    )
+    server = ReplayServer(("127.0.0.1", 0), config)
+    base = server.start_in_thread()
+    parse_all.limiter.configure(0)
+    parse_all.cache.configure(enabled=False)
+    tmp = Path(tempfile.mkdtemp())
+
+    try:
+        check_queue(tmp)
+        check_merge_shared_dogs(tmp)
+        check_crashed_worker(tmp, base)
+        check_topcat(tmp, base)
+        one, rows_one = run(tmp, "one", 1, base)
+        three, rows_three = run(tmp, "three", 3, base)
+    finally:
+        server.shutdown()
+
+    assert rows_one == rows_three, "выгрузки 1 и 3 воркеров различаются"
+    print(f"\n1 воркер: {one:.1f} c, 3 воркера: {three:.1f} c (быстрее в {one / three:.1f} раза)")
+    # запуск процессов и опрос очереди — постоянные накладные расходы
+    assert one / three > 1.6, "3 воркера почти не ускорили обход"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
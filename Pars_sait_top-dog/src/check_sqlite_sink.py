@@ -0,0 +1,171 @@
+"""
+Проверка базы SQLite (--db):
+  - parse_all.main и parse_all_topcat.main на локальном стенде
+    (replay_server.py) пополняют базу, строк столько же, сколько в Excel;
+  - повторный обход обновляет строки, а не дублирует их;
+  - нераспарсенный питомник top-cat есть заглушкой и в Excel, и в базе,
+    а завершённый журнал top-cat уходит в .prev;
+  - индексы и внешние ключи на месте, поиск по породе идёт по индексу;
+  - SqliteSink пишет пачками из фонового потока, upsert меняет строку;
+  - выгрузка из базы в Excel и CSV.
+"""
+import contextlib
+import csv
+import io
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+import parse_all
+import sqlite_sink
+from replay_server import ReplayConfig, ReplayServer
+from sqlite_sink import SinkTable, SqliteSink, foreign_key_violations
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Pars_sait_top-cat" / "src"))
+
+import parse_all_topcat  # noqa: E402
+
+
+def count(db: Path, table: str) -> int:
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def check_topdog(tmp: Path) -> Path:
+    server = ReplayServer(("127.0.0.1", 0), ReplayConfig(
+        kennels=5, dogs_per_kennel=6, catteries=0, latency_ms=0, seed=3,
+    ))
+    base_url = server.start_in_thread()
+    db = tmp / "topdog.db"
+    args = [
+        "--base-url", base_url, "--no-cache", "--rps", "0", "--parse-workers", "0",
+        "--journal", str(tmp / "topdog.sqlite"),
+        "--output", str(tmp / "topdog.xlsx"),
+        "--db", str(db),
+        "--no-metrics",
+    ]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all.main(args)
+            parse_all.main(args)
+    finally:
+        server.shutdown()
+
+    excel = pd.read_excel(tmp / "topdog.xlsx", sheet_name=None)
+    for table in ("kennels", "dogs", "dog_kennels"):
+        assert count(db, table) == len(excel[table]), table
+    assert count(db, "dogs") == 30
+
+    conn = sqlite3.connect(db)
+    try:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(dogs)")}
+        assert {"dogs_kennel_id", "dogs_breed", "dogs_breeder_person"} <= indexes, indexes
+        fk = conn.execute("PRAGMA foreign_key_list(dogs)").fetchone()
+        assert fk[2:5] == ("kennels", "kennel_id", "kennel_id"), fk
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM dogs WHERE breed = ?", ("x",)
+        ).fetchall()
+        assert "dogs_breed" in str(plan), plan
+        # ID хранятся числами
+        assert conn.execute("SELECT typeof(dog_id) FROM dogs LIMIT 1").fetchone()[0] == "integer"
+    finally:
+        conn.close()
+    assert foreign_key_violations(db) == []
+    print("top-dog: база совпадает с Excel, повторный обход без дублей")
+    return db
+
+
+def check_topcat(tmp: Path) -> None:
+    server = ReplayServer(("127.0.0.1", 0), ReplayConfig(
+        kennels=0, catteries=4, cats_per_cattery=3, latency_ms=0, seed=3,
+    ))
+    base_url = server.start_in_thread()
+    db = tmp / "topcat.db"
+    args = [
+        "--base-url", base_url, "--no-cache", "--rps", "0",
+        "--journal", str(tmp / "topcat.sqlite"),
+        "--output", str(tmp / "topcat.xlsx"),
+        "--db", str(db),
+        "--no-metrics",
+    ]
+    parse_cattery = parse_all_topcat.parse_cattery
+
+    def failing_parse(url, *a, **kw):
+        if url.endswith("/catteries/2"):
+            raise RuntimeError("страница не разобралась")
+        return parse_cattery(url, *a, **kw)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_all_topcat.parse_cattery = failing_parse
+            try:
+                parse_all_topcat.main(args)
+            finally:
+                parse_all_topcat.parse_cattery = parse_cattery
+            excel = pd.read_excel(tmp / "topcat.xlsx", sheet_name="catteries", dtype=str)
+            assert count(db, "catteries") == len(excel) == 4, (count(db, "catteries"), len(excel))
+            conn = sqlite3.connect(db)
+            stub = conn.execute("SELECT cattery_name FROM catteries WHERE cattery_id = 2").fetchone()
+            conn.close()
+            assert stub == (None,), stub
+
+            parse_all_topcat.main(args)
+    finally:
+        server.shutdown()
+    assert (count(db, "catteries"), count(db, "cats")) == (4, 12)
+    conn = sqlite3.connect(db)
+    stubs = conn.execute("SELECT COUNT(*) FROM catteries WHERE cattery_name IS NULL").fetchone()[0]
+    conn.close()
+    assert stubs == 0, stubs
+    assert (tmp / "topcat.prev.sqlite").exists(), "журнал top-cat не отмечен завершённым"
+    print("top-cat: питомников 4, кошек 12; заглушка в базе заменена при повторном обходе")
+
+
+def check_batches(tmp: Path) -> None:
+    table = SinkTable("items", ["item_id", "name"], key=("item_id",), ints=("item_id",))
+    db = tmp / "items.db"
+    sink = SqliteSink(db, [table], batch_size=1000, flush_interval=0.05)
+    for i in range(10_000):
+        sink.upsert("items", {"item_id": str(i), "name": f"item {i}"})
+    sink.flush()
+    assert sink.rows_written == 10_000 and count(db, "items") == 10_000
+    sink.upsert("items", {"item_id": "5", "name": "renamed"})
+    sink.close()
+
+    conn = sqlite3.connect(db)
+    try:
+        name = conn.execute("SELECT name FROM items WHERE item_id = 5").fetchone()[0]
+    finally:
+        conn.close()
+    assert name == "renamed" and count(db, "items") == 10_000
+
+
+def check_export(tmp: Path, db: Path) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        sqlite_sink.main([str(db), "--excel", str(tmp / "export.xlsx"), "--csv", str(tmp / "csv")])
+    sheets = pd.read_excel(tmp / "export.xlsx", sheet_name=None)
+    assert set(sheets) == {"kennels", "dogs", "dog_kennels"}, set(sheets)
+    assert len(sheets["dogs"]) == count(db, "dogs")
+    with open(tmp / "csv" / "dogs.csv", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == count(db, "dogs") and rows[0]["dog_id"]
+    print("выгрузка из базы в Excel и CSV")
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp())
+    db = check_topdog(tmp)
+    check_topcat(tmp)
+    check_batches(tmp)
+    check_export(tmp, db)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from array import array
+
+
+class ColumnarRows:
+    """
+    Строки одной таблицы, сложенные по колонкам, — вместо списка dict.
+
+    dict на строку — это хеш-таблица ключей плюс отдельный объект на каждое
+    значение, даже если в сотнях тысяч строк порода одна и та же.
+    Здесь у таблицы по одному списку на колонку, а колонки из dictionary
+    (порода, окрас, питомник, ...) хранятся кодами в array('i') —
+    4 байта на строку — и словарём различных значений.
+    Колонки из ints хранятся числами (None — пропуск).
+
+        rows = ColumnarRows(DOG_COLUMNS, ints=("dog_id",), dictionary=("breed",))
+        rows.append(dog_row)
+        rows.codes("breed"), rows.dictionary("breed")  # для Arrow
+        for row in rows: ...                           # снова dict
+    """
+
+    __slots__ = ("columns", "ints", "_values", "_codes", "_lookup", "_dictionary", "_len")
+
+    def __init__(self, columns: list[str], ints=(), dictionary=()):
+        self.columns = list(columns)
+        self.ints = frozenset(c for c in ints if c in self.columns)
+        # колонка -> список значений (обычные и числовые колонки)
+        self._values: dict[str, list] = {}
+        # колонка -> коды, значение -> код, код -> значение (словарные колонки)
+        self._codes: dict[str, array] = {}
+        self._lookup: dict[str, dict] = {}
+        self._dictionary: dict[str, list] = {}
+        for col in self.columns:
+            if col in dictionary and col not in self.ints:
+                self._codes[col] = array("i")
+                self._lookup[col] = {}
+                self._dictionary[col] = []
+            else:
+                self._values[col] = []
+        self._len = 0
+
+    def append(self, row: dict) -> None:
+        for col, values in self._values.items():
+            value = row.get(col)
+            if col in self.ints:
+                value = _to_int(value)
+            elif value is not None and not isinstance(value, str):
+                value = str(value)
+            values.append(value)
+        for col, codes in self._codes.items():
+            value = row.get(col)
+            if value is None:
+                codes.append(-1)
+                continue
+            lookup = self._lookup[col]
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(lookup)
+                self._dictionary[col].append(str(value))
+            codes.append(code)
+        self._len += 1
+
+    def __len__(self) -> int:
+        return self._len
+
+    def is_dictionary(self, column: str) -> bool:
+        return column in self._codes
+
+    def values(self, column: str) -> list:
+        """Значения колонки (для словарной — раскодированные)."""
+        if column in self._codes:
+            dictionary = self._dictionary[column]
+            return [dictionary[c] if c >= 0 else None for c in self._codes[column]]
+        return self._values[column]
+
+    def codes(self, column: str) -> array:
+        """Коды словарной колонки, -1 — пропуск."""
+        return self._codes[column]
+
+    def dictionary(self, column: str) -> list[str]:
+        return self._dictionary[column]
+
+    def __iter__(self):
+        columns = [self.values(col) for col in self.columns]
+        for values in zip(*columns):
+            yield dict(zip(self.columns, values))
+
+    def clear(self) -> None:
+        """Очищает строки; словари значений тоже — у каждой пачки свой."""
+        for values in self._values.values():
+            values.clear()
+        for col in self._codes:
+            self._codes[col] = array("i")
+            self._lookup[col].clear()
+            self._dictionary[col].clear()
+        self._len = 0
+
+
+def _to_int(value):
+    if value is None or isinstance(value, int):
+        return value
+    value = str(value).strip()
+    return int(value) if value.isdigit() else None
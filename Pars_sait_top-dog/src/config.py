@@ -1,3 +1,5 @@
+import os
+
 BASE_URL = "https://ru.top-dog.pro"
 
 HEADERS = {
@@ -7,3 +9,19 @@ HEADERS = {
         "Chrome/120.0 Safari/537.36"
     )
 }
+
+# Сколько запросов к одному хосту может выполняться одновременно (--concurrency)
+CONCURRENCY_PER_HOST = 4
+
+# Бюджет вежливости: в среднем не больше REQUESTS_PER_SECOND запросов в секунду,
+# подряд без ожидания — не больше RATE_BURST (--rps / --burst)
+REQUESTS_PER_SECOND = 2.0
+RATE_BURST = 4
+
+# Повторы запроса на 5xx/429/таймаутах: сколько раз и начальная пауза, секунды
+# (дальше пауза удваивается, --retries / --backoff)
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+# Сколько процессов разбирают HTML в асинхронном режиме (--parse-workers)
+PARSE_WORKERS = os.cpu_count() or 1
@@ -0,0 +1,335 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind        TEXT NOT NULL,
+    item_id     TEXT NOT NULL,
+    parent_id   TEXT NOT NULL DEFAULT '',
+    status      TEXT NOT NULL,
+    data        TEXT,
+    content_hash TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_kind ON records (kind, status);
+CREATE INDEX IF NOT EXISTS records_parent ON records (kind, parent_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def content_hash(*parts) -> str:
+    """
+    Хеш содержимого записи (того, что попадёт в выгрузку),
+    по нему инкрементальный режим понимает, изменилось ли что-то.
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _plain_int(value: str) -> int | None:
+    """int, если строка — число без ведущих нулей (обратимо через str())."""
+    if value.isascii() and value.isdigit() and (value[0] != "0" or value == "0"):
+        return int(value)
+    return None
+
+
+class DoneIndex:
+    """
+    Готовые записи журнала в памяти: множество ключей на каждый вид записи.
+
+    Кортеж (вид, ID, родитель) из трёх строк — около 220 байт на запись;
+    на сотнях тысяч собак и связей это сотни мегабайт. Здесь числовой ID
+    с числовым родителем (как на сайте) хранится одним int:
+    ID << 32 | (родитель + 1), без родителя — ID << 32. Остальное —
+    одной строкой «ID\x1fродитель».
+    """
+
+    __slots__ = ("_kinds",)
+
+    def __init__(self):
+        self._kinds: dict[str, set] = {}
+
+    @staticmethod
+    def _key(item_id: str, parent_id: str):
+        item = _plain_int(item_id)
+        parent = _plain_int(parent_id) if parent_id else -1
+        if item is not None and parent is not None and parent + 1 < 1 << 32:
+            return item << 32 | (parent + 1)
+        return f"{item_id}\x1f{parent_id}"
+
+    def add(self, kind: str, item_id: str, parent_id: str = "") -> None:
+        keys = self._kinds.get(kind)
+        if keys is None:
+            keys = self._kinds[kind] = set()
+        keys.add(self._key(item_id, parent_id))
+
+    def contains(self, kind: str, item_id: str, parent_id: str = "") -> bool:
+        keys = self._kinds.get(kind)
+        return keys is not None and self._key(item_id, parent_id) in keys
+
+    def count(self, kind: str) -> int:
+        return len(self._kinds.get(kind, ()))
+
+    def ids(self, kind: str) -> set[str]:
+        """ID записей вида kind (без учёта родителя)."""
+        return {
+            str(key >> 32) if isinstance(key, int) else key.split("\x1f", 1)[0]
+            for key in self._kinds.get(kind, ())
+        }
+
+
+def _remove_sidecars(path: Path) -> None:
+    for suffix in ("-wal", "-shm"):
+        side = path.with_name(path.name + suffix)
+        if side.exists():
+            side.unlink()
+
+
+class CrawlJournal:
+    """
+    Журнал обхода в SQLite: только дописывание, одна строка на каждый
+    обработанный питомник/собаку/кошачий питомник.
+
+    status = 'ok'    — запись готова, data содержит строку для выгрузки;
+    status = 'error' — обработать не удалось, при --resume повторим.
+
+    Без resume обход начинается с чистого журнала. Прежний журнал, если
+    тот обход был доведён до конца (mark_finished), сохраняется рядом как
+    previous_path — это база для инкрементального режима; незавершённый
+    просто удаляется.
+    Итоговый Excel строится по журналу (rows()). Выгрузки, которые пишутся
+    по ходу обхода (Parquet и т.п.), подписываются на готовые записи
+    через add_listener().
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not resume and self.path.exists():
+            self._rotate()
+
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(records)")}
+        if "content_hash" not in columns:
+            # журнал, начатый до появления хешей
+            self.conn.execute("ALTER TABLE records ADD COLUMN content_hash TEXT")
+
+        self._done = DoneIndex()
+        for kind, item_id, parent_id in self.conn.execute(
+            "SELECT kind, item_id, parent_id FROM records WHERE status = 'ok'"
+        ):
+            self._done.add(kind, item_id, parent_id)
+
+    @property
+    def previous_path(self) -> Path:
+        return self.path.with_name(f"{self.path.stem}.prev{self.path.suffix}")
+
+    def _rotate(self) -> None:
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finished = conn.execute(
+                "SELECT value FROM meta WHERE key = 'finished_at'"
+            ).fetchone()
+        except sqlite3.DatabaseError:
+            finished = None
+        finally:
+            conn.close()
+        _remove_sidecars(self.path)
+
+        if finished:
+            os.replace(self.path, self.previous_path)
+            _remove_sidecars(self.previous_path)
+        else:
+            self.path.unlink()
+
+    def mark_finished(self) -> None:
+        """Обход доведён до конца — журнал годится как база для следующего."""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('finished_at', ?)",
+                (str(time.time()),),
+            )
+            self.conn.commit()
+
+    def done_count(self, kind: str) -> int:
+        return self._done.count(kind)
+
+    def done_ids(self, kind: str) -> set[str]:
+        """ID готовых записей вида kind (без учёта родителя)."""
+        return self._done.ids(kind)
+
+    def is_done(self, kind: str, item_id: str, parent_id: str = "") -> bool:
+        return self._done.contains(kind, item_id, parent_id or "")
+
+    def _append(self, kind: str, item_id: str, parent_id: str,
+                status: str, data, digest: str | None = None) -> None:
+        payload = json.dumps(data, ensure_ascii=False) if data is not None else None
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO records "
+                "(kind, item_id, parent_id, status, data, content_hash, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, item_id, parent_id or "", status, payload, digest, time.time()),
+            )
+            self.conn.commit()
+            if status == "ok":
+                self._done.add(kind, item_id, parent_id or "")
+
+    def record(self, kind: str, item_id: str, data: dict,
+               parent_id: str | None = None, digest: str | None = None) -> None:
+        """
+        Отмечает запись как готовую. digest — хеш содержимого;
+        если не передан, считается по data.
+        """
+        self._append(kind, item_id, parent_id or "", "ok", data,
+                     digest or content_hash(data))
+        for listener in self._listeners:
+            listener(kind, item_id, data, parent_id or "")
+
+    def add_listener(self, listener, replay_kinds=()) -> None:
+        """
+        listener(kind, item_id, data, parent_id) вызывается после каждой
+        готовой записи. Записи видов replay_kinds, уже лежащие в журнале
+        (при --resume), сначала передаются ему по порядку.
+        """
+        for kind in replay_kinds:
+            cur = self.conn.execute(
+                "SELECT item_id, parent_id, data FROM records "
+                "WHERE kind = ? AND status = 'ok' ORDER BY seq",
+                (kind,),
+            )
+            for item_id, parent_id, data in cur:
+                listener(kind, item_id, json.loads(data), parent_id)
+        self._listeners.append(listener)
+
+    def record_error(self, kind: str, item_id: str, error: str,
+                     parent_id: str | None = None) -> None:
+        """Отмечает неудачу; при --resume запись будет обработана снова."""
+        self._append(kind, item_id, parent_id or "", "error", {"error": error})
+
+    def rows(self, kind: str) -> Iterator[dict]:
+        """Готовые строки в порядке записи в журнал."""
+        cur = self.conn.execute(
+            "SELECT data FROM records WHERE kind = ? AND status = 'ok' ORDER BY seq",
+            (kind,),
+        )
+        for (data,) in cur:
+            yield json.loads(data)
+
+    def failed_ids(self, kind: str) -> list[str]:
+        """ID, по которым были ошибки и так и не появилось готовой записи."""
+        cur = self.conn.execute(
+            "SELECT item_id, parent_id FROM records "
+            "WHERE kind = ? AND status = 'error' ORDER BY seq",
+            (kind,),
+        )
+        failed: list[str] = []
+        seen: set[str] = set()
+        for item_id, parent_id in cur:
+            if item_id in seen or self.is_done(kind, item_id, parent_id):
+                continue
+            seen.add(item_id)
+            failed.append(item_id)
+        return failed
+
+    def merge_from(self, path: Path, unique_kinds=()) -> dict[str, int]:
+        """
+        Дописывает готовые записи другого журнала (воркера шардового обхода),
+        которых здесь ещё нет, и ошибки по тем, что так и не удались.
+        Запись, сделанная несколькими воркерами (шард выдан повторно),
+        попадает один раз. Записи видов unique_kinds сверяются только по ID:
+        собака, которую скачали воркеры разных питомников, — одна запись,
+        а её связи с питомниками остаются отдельными записями своего вида.
+        Возвращает, сколько записей каждого вида добавлено.
+        """
+        source = sqlite3.connect(f"file:{Path(path)}?mode=ro", uri=True)
+        added: dict[str, int] = {}
+        try:
+            with self._lock:
+                unique = {kind: self._done.ids(kind) for kind in unique_kinds}
+                cur = source.execute(
+                    "SELECT kind, item_id, parent_id, status, data, content_hash, recorded_at "
+                    "FROM records ORDER BY status = 'error', seq"
+                )
+                rows = []
+                for record in cur:
+                    kind, item_id, parent_id, status = record[:4]
+                    if self._done.contains(kind, item_id, parent_id):
+                        continue
+                    ids = unique.get(kind)
+                    if ids is not None and item_id in ids:
+                        continue
+                    if status == "ok":
+                        self._done.add(kind, item_id, parent_id)
+                        if ids is not None:
+                            ids.add(item_id)
+                        added[kind] = added.get(kind, 0) + 1
+                    rows.append(record)
+                self.conn.executemany(
+                    "INSERT INTO records "
+                    "(kind, item_id, parent_id, status, data, content_hash, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self.conn.commit()
+        finally:
+            source.close()
+        return added
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+class JournalBaseline:
+    """
+    Готовые записи прошлого завершённого обхода — только чтение.
+    Нужен инкрементальному режиму: хеши записей и дочерние записи
+    (собаки питомника) берутся отсюда без повторного скачивания.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._hashes: dict[str, dict[str, str]] = {}
+
+    def content_hash(self, kind: str, item_id: str) -> str | None:
+        hashes = self._hashes.get(kind)
+        if hashes is None:
+            hashes = dict(self.conn.execute(
+                "SELECT item_id, content_hash FROM records "
+                "WHERE kind = ? AND status = 'ok'",
+                (kind,),
+            ))
+            self._hashes[kind] = hashes
+        return hashes.get(item_id)
+
+    def children(self, kind: str, parent_id: str) -> list[tuple[str, dict, str]]:
+        """Готовые записи вида kind с данным parent_id: (id, data, хеш)."""
+        cur = self.conn.execute(
+            "SELECT item_id, data, content_hash FROM records "
+            "WHERE kind = ? AND parent_id = ? AND status = 'ok' ORDER BY seq",
+            (kind, parent_id),
+        )
+        return [(item_id, json.loads(data), digest) for item_id, data, digest in cur]
+
+    def close(self) -> None:
+        self.conn.close()
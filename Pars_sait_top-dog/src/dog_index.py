@@ -0,0 +1,165 @@
+import mmap
+import os
+import threading
+from pathlib import Path
+
+# Начальный размер и шаг роста битового множества: 128 КиБ = ~1 млн ID
+GROW_BYTES = 128 * 1024
+
+
+class IdBitset:
+    """
+    Множество неотрицательных целых ID в виде битовой карты: бит N = ID N.
+    Миллион ID занимает 128 КиБ вне кучи Python.
+
+    С path карта лежит в файле через mmap: записи сразу попадают в кэш
+    страниц ОС и переживают падение процесса, а следующий запуск открывает
+    файл без загрузки в память. Без path — анонимная mmap, только на этот запуск.
+    Файл растёт по мере появления больших ID.
+    """
+
+    def __init__(self, path: Path | None = None, reset: bool = False):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self.path is None:
+            self._size = GROW_BYTES
+            self._mm = mmap.mmap(-1, self._size)
+            self._count = 0
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if reset and self.path.exists():
+            self.path.unlink()
+        self._file = open(self.path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            size = GROW_BYTES
+            self._file.truncate(size)
+        self._size = size
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._count = int.from_bytes(self._mm, "little").bit_count()
+
+    def _grow(self, need_bytes: int) -> None:
+        size = self._size
+        while size < need_bytes:
+            size = max(size * 2, size + GROW_BYTES)
+        if self._file is None:
+            mm = mmap.mmap(-1, size)
+            mm[:self._size] = self._mm[:]
+        else:
+            self._mm.flush()
+            self._file.truncate(size)
+            mm = mmap.mmap(self._file.fileno(), size)
+        self._mm.close()
+        self._mm = mm
+        self._size = size
+
+    def add(self, item: int) -> bool:
+        """Добавляет ID. True — если его ещё не было."""
+        byte, bit = divmod(item, 8)
+        mask = 1 << bit
+        with self._lock:
+            if byte >= self._size:
+                self._grow(byte + 1)
+            value = self._mm[byte]
+            if value & mask:
+                return False
+            self._mm[byte] = value | mask
+            self._count += 1
+            return True
+
+    def discard(self, item: int) -> None:
+        byte, bit = divmod(item, 8)
+        with self._lock:
+            if byte >= self._size:
+                return
+            value = self._mm[byte]
+            if value & (1 << bit):
+                self._mm[byte] = value & ~(1 << bit)
+                self._count -= 1
+
+    def __contains__(self, item: int) -> bool:
+        byte, bit = divmod(item, 8)
+        with self._lock:
+            return byte < self._size and bool(self._mm[byte] & (1 << bit))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return self._size
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._mm.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._mm.flush()
+            self._mm.close()
+            if self._file is not None:
+                self._file.close()
+
+
+class SeenIds:
+    """
+    Общее на все потоки обхода множество уже взятых в работу собак.
+
+    claim(id)   — True, если собаку ещё никто не брал: тогда её качает
+                  вызвавший, остальные питомники только добавляют связь;
+    done(id)    — собака записана в журнал (попадает в битовую карту);
+    release(id) — скачать не удалось, собаку можно взять снова.
+
+    Готовые ID хранятся в IdBitset (при файле — и между запусками,
+    для --resume), взятые, но ещё не готовые — в обычном множестве:
+    после падения они не должны считаться готовыми.
+    ID не из цифр (на сайте таких нет) держатся в обычном множестве.
+    """
+
+    def __init__(self, bitset: IdBitset | None = None):
+        self.bitset = bitset if bitset is not None else IdBitset()
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()
+        self._other_done: set[str] = set()
+        self.duplicates = 0
+
+    def _is_done(self, item_id: str) -> bool:
+        if item_id.isdigit():
+            return int(item_id) in self.bitset
+        return item_id in self._other_done
+
+    def claim(self, item_id: str) -> bool:
+        with self._lock:
+            if item_id in self._in_flight or self._is_done(item_id):
+                self.duplicates += 1
+                return False
+            self._in_flight.add(item_id)
+            return True
+
+    def done(self, item_id: str) -> None:
+        with self._lock:
+            self._in_flight.discard(item_id)
+            if item_id.isdigit():
+                self.bitset.add(int(item_id))
+            else:
+                self._other_done.add(item_id)
+
+    def release(self, item_id: str) -> None:
+        with self._lock:
+            self._in_flight.discard(item_id)
+
+    def mark_done(self, ids) -> None:
+        """Отмечает готовыми ID из журнала (продолжение обхода)."""
+        for item_id in ids:
+            self.done(item_id)
+
+    def __len__(self) -> int:
+        return len(self.bitset) + len(self._other_done)
+
+    def close(self) -> None:
+        self.bitset.close()
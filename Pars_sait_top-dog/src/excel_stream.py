@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from openpyxl import Workbook
+
+# Предел строк на листе Excel (вместе со строкой заголовка)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+class StreamingExcelWriter:
+    """
+    Потоковая запись в Excel с постоянным расходом памяти.
+
+    Используется write-only книга openpyxl: строки сразу уходят во временные
+    файлы листов, в памяти ничего не копится. Когда лист заполняется до
+    предела Excel, запись продолжается на новом листе того же вида
+    (dogs, dogs_2, dogs_3, ...), у каждого — своя строка заголовка.
+
+        with StreamingExcelWriter(path) as writer:
+            writer.add_sheet("dogs", DOG_COLUMNS)
+            for row in rows:
+                writer.append("dogs", row)
+    """
+
+    def __init__(self, path: Path, max_rows: int = EXCEL_MAX_ROWS):
+        self.path = Path(path)
+        self.max_rows = max_rows
+        self.wb = Workbook(write_only=True)
+        # имя листа -> [колонки, текущий лист, строк на нём, номер части]
+        self._sheets: dict[str, list] = {}
+
+    def add_sheet(self, name: str, columns: list[str]) -> None:
+        ws = self.wb.create_sheet(title=name)
+        ws.append(list(columns))
+        self._sheets[name] = [list(columns), ws, 1, 1]
+
+    def _roll_over(self, name: str) -> None:
+        state = self._sheets[name]
+        columns, _, _, part = state
+        part += 1
+        ws = self.wb.create_sheet(title=f"{name}_{part}")
+        ws.append(columns)
+        state[1:] = [ws, 1, part]
+
+    def append(self, name: str, row: dict) -> None:
+        state = self._sheets[name]
+        if state[2] >= self.max_rows:
+            self._roll_over(name)
+            state = self._sheets[name]
+        state[1].append([row.get(col) for col in state[0]])
+        state[2] += 1
+
+    def write_rows(self, name: str, rows) -> int:
+        count = 0
+        for row in rows:
+            self.append(name, row)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.wb.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
@@ -0,0 +1,332 @@
+"""
+Извлечение данных со страниц собак и питомников top-dog.
+
+Два взаимозаменяемых бэкенда, дающих одинаковые словари:
+  bs4  — BeautifulSoup + CSS-селекторы (исходная реализация);
+  lxml — напрямую по дереву lxml через XPath, без построения дерева bs4.
+
+Сами строки собираются общими функциями build_dog_row/build_kennel_row,
+бэкенд отвечает только за поиск элементов и текст.
+Совпадение результатов проверяет check_backends.py.
+"""
+from urllib.parse import urljoin, urlparse
+
+import lxml.etree
+import lxml.html
+from bs4 import BeautifulSoup
+
+DEFAULT_BACKEND = "bs4"
+
+# Строки таблицы собаки со ссылкой на другую собаку: из ссылки берётся её dog_id
+PARENT_KEYS = ("Отец", "Мать")
+
+
+def extract_id_from_url(url: str) -> str:
+    path = urlparse(url).path.rstrip("/")
+    last = path.split("/")[-1]
+    return last
+
+
+def dog_id_from_href(href: str | None) -> str | None:
+    """dog_id из ссылки вида /dogs/123; None, если ссылки нет или она другая."""
+    if not href:
+        return None
+    dog_id = extract_id_from_url(href)
+    return dog_id if dog_id.isdigit() else None
+
+
+def build_dog_row(dog_url: str,
+                  photo_src: str | None,
+                  name: str | None,
+                  data: dict[str, str],
+                  kennel_id: str | None = None,
+                  kennel_name_from_kennel: str | None = None,
+                  parent_hrefs: dict[str, str] | None = None) -> dict:
+    photo_url = urljoin(dog_url, photo_src) if photo_src else None
+    parent_hrefs = parent_hrefs or {}
+
+    # Питомник
+    kennel_name = data.get("Питомник") or kennel_name_from_kennel
+
+    return {
+        "dog_id": extract_id_from_url(dog_url),
+        "dog_url": dog_url,
+        "dog_name": name,
+        "sex": data.get("Пол"),
+        "breed": data.get("Порода"),
+        "color": data.get("Окрас"),
+        "birthday": data.get("День рождения"),
+        "father": data.get("Отец"),
+        "mother": data.get("Мать"),
+        "father_id": dog_id_from_href(parent_hrefs.get("Отец")),
+        "mother_id": dog_id_from_href(parent_hrefs.get("Мать")),
+        "owner": data.get("Владелец"),
+        "co_owner": data.get("Совладелец"),
+        "breeder_person": data.get("Заводчик"),
+        "kennel_name": kennel_name,
+        "kennel_id": kennel_id,
+        "photo_url": photo_url,
+    }
+
+
+def build_kennel_row(kennel_url: str,
+                     photo_src: str | None,
+                     name: str | None,
+                     city: str | None,
+                     details: dict[str, str],
+                     dog_hrefs: list[str]) -> tuple[dict, list[str]]:
+    photo_url = urljoin(kennel_url, photo_src) if photo_src else None
+    dog_links = [urljoin(kennel_url, href) for href in dog_hrefs]
+
+    kennel_data = {
+        "kennel_id": extract_id_from_url(kennel_url),
+        "kennel_url": kennel_url,
+        "kennel_name": name,
+        "city_country": city,
+        "breeder_person": details.get("Заводчик"),
+        "breeds": details.get("Породы"),
+        "kennel_prefix": details.get("Заводская приставка"),
+        "website": details.get("Веб-сайт"),
+        "email": details.get("Эл. почта"),
+        "phone": details.get("Телефон"),
+        "social_links": details.get("Соц. сети"),
+        "photo_url": photo_url,
+        "dogs_count_on_page": len(dog_links),
+    }
+
+    return kennel_data, dog_links
+
+
+# ====================== bs4 ======================
+
+def make_soup(page: bytes) -> BeautifulSoup:
+    return BeautifulSoup(page.decode("utf-8", errors="replace"), "lxml")
+
+
+def parse_dog_bs4(page: bytes,
+                  dog_url: str,
+                  kennel_id: str | None = None,
+                  kennel_name_from_kennel: str | None = None) -> dict:
+    soup = make_soup(page)
+
+    # Фото
+    img = soup.select_one(".primary-info-section .avatar img")
+    photo_src = img["src"] if img and img.get("src") else None
+
+    # Имя
+    name_tag = soup.select_one(".primary-info-section .name h1")
+    name = name_tag.get_text(strip=True) if name_tag else None
+
+    # Таблицы с данными; у родителей — ещё и ссылка на их страницу
+    data = {}
+    parent_hrefs = {}
+    for row in soup.select(".secondary-info .info-column table tr"):
+        def_td = row.select_one("td.definition")
+        val_td = row.select_one("td.value")
+        if not def_td or not val_td:
+            continue
+        key = def_td.get_text(strip=True).rstrip(":")
+        value = val_td.get_text(" ", strip=True)
+        data[key] = value
+        if key in PARENT_KEYS:
+            a = val_td.select_one("a[href^='/dogs/']")
+            if a is not None and a.get("href"):
+                parent_hrefs[key] = a["href"]
+
+    return build_dog_row(dog_url, photo_src, name, data, kennel_id, kennel_name_from_kennel,
+                         parent_hrefs)
+
+
+def parse_kennel_bs4(page: bytes, kennel_url: str) -> tuple[dict, list[str]]:
+    soup = make_soup(page)
+
+    # Фото
+    img = soup.select_one(".kennel-info .photo img")
+    photo_src = img["src"] if img and img.get("src") else None
+
+    # Название
+    name_tag = soup.select_one(".kennel-name h1")
+    name = name_tag.get_text(strip=True) if name_tag else None
+
+    # Город/страна
+    city_tag = soup.select_one(".kennel-info .city")
+    city = city_tag.get_text(strip=True) if city_tag else None
+
+    # Детали (dt/dd)
+    details: dict[str, str] = {}
+    for dt in soup.select(".details-container dt"):
+        key = dt.get_text(strip=True).rstrip(":")
+        dd = dt.find_next("dd")
+        if not dd:
+            continue
+
+        # Соцсети — href всех ссылок
+        if "profile-social-icons" in (dd.get("class") or []):
+            links = [a.get("href") for a in dd.select("a[href]")]
+            value = ", ".join(links)
+        else:
+            value = dd.get_text(" ", strip=True)
+
+        details[key] = value
+
+    # Ссылки на собак
+    dog_hrefs = [
+        a["href"] for a in soup.select(".dogs-grid-item .dog-name a[href^='/dogs/']")
+    ]
+
+    return build_kennel_row(kennel_url, photo_src, name, city, details, dog_hrefs)
+
+
+# ====================== lxml ======================
+
+# Содержимое этих тегов bs4 не считает текстом (get_text его пропускает)
+SKIP_TEXT_TAGS = {"script", "style", "template"}
+
+
+def _has_class(name: str) -> str:
+    """XPath-условие «в атрибуте class есть класс name» — аналог .name в CSS."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _xpath(expr: str) -> lxml.etree.XPath:
+    return lxml.etree.XPath(expr)
+
+
+DOG_PHOTO = _xpath(
+    f"//*[{_has_class('primary-info-section')}]//*[{_has_class('avatar')}]//img"
+)
+DOG_NAME = _xpath(
+    f"//*[{_has_class('primary-info-section')}]//*[{_has_class('name')}]//h1"
+)
+DOG_ROWS = _xpath(
+    f"//*[{_has_class('secondary-info')}]//*[{_has_class('info-column')}]//table//tr"
+)
+ROW_DEFINITION = _xpath(f".//td[{_has_class('definition')}]")
+ROW_VALUE = _xpath(f".//td[{_has_class('value')}]")
+DOG_LINK = _xpath(".//a[starts-with(@href, '/dogs/')]")
+
+KENNEL_PHOTO = _xpath(f"//*[{_has_class('kennel-info')}]//*[{_has_class('photo')}]//img")
+KENNEL_NAME = _xpath(f"//*[{_has_class('kennel-name')}]//h1")
+KENNEL_CITY = _xpath(f"//*[{_has_class('kennel-info')}]//*[{_has_class('city')}]")
+KENNEL_DT = _xpath(f"//*[{_has_class('details-container')}]//dt")
+# find_next("dd") у bs4 ищет и среди потомков dt, и дальше по документу
+NEXT_DD = _xpath("(descendant::dd | following::dd)[1]")
+LINKS_WITH_HREF = _xpath(".//a[@href]")
+KENNEL_DOG_LINKS = _xpath(
+    f"//*[{_has_class('dogs-grid-item')}]//*[{_has_class('dog-name')}]"
+    "//a[starts-with(@href, '/dogs/')]"
+)
+
+
+def make_tree(page: bytes):
+    return lxml.html.document_fromstring(page.decode("utf-8", errors="replace"))
+
+
+def _strings(el):
+    """Текстовые узлы элемента в порядке документа, как их видит bs4."""
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in SKIP_TEXT_TAGS:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def get_text(el, separator: str = "") -> str:
+    """Аналог tag.get_text(separator, strip=True) из bs4."""
+    return separator.join(s for s in (t.strip() for t in _strings(el)) if s)
+
+
+def _first(found):
+    return found[0] if found else None
+
+
+def parse_dog_lxml(page: bytes,
+                   dog_url: str,
+                   kennel_id: str | None = None,
+                   kennel_name_from_kennel: str | None = None) -> dict:
+    tree = make_tree(page)
+
+    img = _first(DOG_PHOTO(tree))
+    photo_src = img.get("src") if img is not None and img.get("src") else None
+
+    name_tag = _first(DOG_NAME(tree))
+    name = get_text(name_tag) if name_tag is not None else None
+
+    data = {}
+    parent_hrefs = {}
+    for row in DOG_ROWS(tree):
+        def_td = _first(ROW_DEFINITION(row))
+        val_td = _first(ROW_VALUE(row))
+        if def_td is None or val_td is None:
+            continue
+        key = get_text(def_td).rstrip(":")
+        data[key] = get_text(val_td, " ")
+        if key in PARENT_KEYS:
+            a = _first(DOG_LINK(val_td))
+            if a is not None and a.get("href"):
+                parent_hrefs[key] = a.get("href")
+
+    return build_dog_row(dog_url, photo_src, name, data, kennel_id, kennel_name_from_kennel,
+                         parent_hrefs)
+
+
+def parse_kennel_lxml(page: bytes, kennel_url: str) -> tuple[dict, list[str]]:
+    tree = make_tree(page)
+
+    img = _first(KENNEL_PHOTO(tree))
+    photo_src = img.get("src") if img is not None and img.get("src") else None
+
+    name_tag = _first(KENNEL_NAME(tree))
+    name = get_text(name_tag) if name_tag is not None else None
+
+    city_tag = _first(KENNEL_CITY(tree))
+    city = get_text(city_tag) if city_tag is not None else None
+
+    details: dict[str, str] = {}
+    for dt in KENNEL_DT(tree):
+        key = get_text(dt).rstrip(":")
+        dd = _first(NEXT_DD(dt))
+        if dd is None:
+            continue
+
+        if "profile-social-icons" in (dd.get("class") or "").split():
+            value = ", ".join(a.get("href") for a in LINKS_WITH_HREF(dd))
+        else:
+            value = get_text(dd, " ")
+
+        details[key] = value
+
+    dog_hrefs = [a.get("href") for a in KENNEL_DOG_LINKS(tree)]
+
+    return build_kennel_row(kennel_url, photo_src, name, city, details, dog_hrefs)
+
+
+# ====================== выбор бэкенда ======================
+
+BACKENDS = {
+    "bs4": (parse_dog_bs4, parse_kennel_bs4),
+    "lxml": (parse_dog_lxml, parse_kennel_lxml),
+}
+
+
+def parse_dog_html(page: bytes,
+                   dog_url: str,
+                   kennel_id: str | None = None,
+                   kennel_name_from_kennel: str | None = None,
+                   backend: str = DEFAULT_BACKEND) -> dict:
+    """
+    Разбор уже скачанной страницы собаки (без сети).
+    """
+    parse_dog_page = BACKENDS[backend][0]
+    return parse_dog_page(page, dog_url, kennel_id, kennel_name_from_kennel)
+
+
+def parse_kennel_html(page: bytes, kennel_url: str,
+                      backend: str = DEFAULT_BACKEND) -> tuple[dict, list[str]]:
+    """
+    Разбор уже скачанной страницы питомника (без сети).
+    """
+    parse_kennel_page = BACKENDS[backend][1]
+    return parse_kennel_page(page, kennel_url)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Общий кэш обоих парсеров — в корне репозитория
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".http_cache"
+
+# Сколько секунд запись считается свежей и отдаётся без обращения к сайту.
+# По истечении — условный запрос (If-None-Match / If-Modified-Since).
+DEFAULT_TTL = 12 * 60 * 60
+
+# Какие заголовки ответа сохраняем вместе с телом
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class HttpCache:
+    """
+    Дисковый кэш HTTP-ответов.
+
+    Запись по URL (meta/<sha256(url)>.json) хранит заголовки, статус и время
+    загрузки, а тело лежит отдельно и адресуется хешем содержимого
+    (bodies/<sha256(body)>), так что одинаковые страницы хранятся один раз.
+
+    Свежая запись (моложе ttl) отдаётся сразу. Устаревшая перепроверяется
+    условным запросом: на 304 отдаём тело из кэша, на 200 — перезаписываем.
+    У ответа, тело которого взято из кэша, from_cache = True.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR,
+                 ttl: float = DEFAULT_TTL, enabled: bool = True):
+        self._lock = threading.Lock()
+        self.configure(cache_dir, ttl, enabled)
+
+    def configure(self, cache_dir: Path = DEFAULT_CACHE_DIR,
+                  ttl: float = DEFAULT_TTL, enabled: bool = True) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.enabled = enabled
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.revalidated = 0
+
+    # ---------- хранение ----------
+
+    def _meta_path(self, url: str) -> Path:
+        key = _sha256(url.encode("utf-8"))
+        return self.cache_dir / "meta" / key[:2] / f"{key}.json"
+
+    def _body_path(self, digest: str) -> Path:
+        return self.cache_dir / "bodies" / digest[:2] / digest
+
+    def load(self, url: str) -> tuple[dict, bytes] | None:
+        try:
+            meta = json.loads(self._meta_path(url).read_text(encoding="utf-8"))
+            body = self._body_path(meta["body"]).read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+        return meta, body
+
+    def store(self, url: str, headers, body: bytes) -> dict:
+        digest = _sha256(body)
+        body_path = self._body_path(digest)
+        if not body_path.exists():
+            _write_atomic(body_path, body)
+        meta = {
+            "url": url,
+            "fetched_at": time.time(),
+            "headers": {h: headers[h] for h in KEPT_HEADERS if h in headers},
+            "body": digest,
+        }
+        self._save_meta(url, meta)
+        return meta
+
+    def _save_meta(self, url: str, meta: dict) -> None:
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        _write_atomic(self._meta_path(url), data)
+
+    # ---------- запросы ----------
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    @staticmethod
+    def _as_response(url: str, meta: dict, body: bytes) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        resp._content = body
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.from_cache = True
+        return resp
+
+    def get(self, session, url: str, before_request=None, on_response=None,
+            headers: dict | None = None, **kwargs) -> requests.Response:
+        """
+        GET через кэш. session — requests.Session или сам модуль requests.
+        before_request вызывается перед каждым реальным обращением к сайту
+        (например, limiter.acquire), попадания в кэш его не расходуют.
+        on_response(resp) — после каждого ответа сайта, включая 304;
+        для ответов из кэша не вызывается (например, учёт скачанных байт).
+        """
+        def network(extra: dict):
+            if before_request is not None:
+                before_request()
+            resp = session.get(url, headers={**(headers or {}), **extra}, **kwargs)
+            resp.from_cache = False
+            if on_response is not None:
+                on_response(resp)
+            return resp
+
+        if not self.enabled:
+            return network({})
+
+        cached = self.load(url)
+        if cached is None:
+            resp = network({})
+            self._count("misses")
+            if resp.status_code == 200:
+                self.store(url, resp.headers, resp.content)
+            return resp
+
+        meta, body = cached
+        if self.ttl > 0 and time.time() - meta["fetched_at"] < self.ttl:
+            self._count("hits")
+            return self._as_response(url, meta, body)
+
+        conditional = {}
+        cached_headers = CaseInsensitiveDict(meta.get("headers") or {})
+        if "ETag" in cached_headers:
+            conditional["If-None-Match"] = cached_headers["ETag"]
+        if "Last-Modified" in cached_headers:
+            conditional["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+        resp = network(conditional)
+        if resp.status_code == 304:
+            self._count("revalidated")
+            meta["fetched_at"] = time.time()
+            self._save_meta(url, meta)
+            return self._as_response(url, meta, body)
+
+        self._count("misses")
+        if resp.status_code == 200:
+            self.store(url, resp.headers, resp.content)
+        return resp
+
+    def report(self) -> str:
+        return (
+            f"Кэш HTTP: попаданий {self.hits}, промахов {self.misses}, "
+            f"перепроверено (304) {self.revalidated}"
+        )
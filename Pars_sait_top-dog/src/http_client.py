@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Ответы, после которых запрос стоит повторить
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Сетевые ошибки, после которых запрос стоит повторить
+RETRY_EXCEPTIONS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_BACKOFF_MAX = 60.0
+
+
+def retry_after_seconds(value: str | None) -> float | None:
+    """
+    Значение заголовка Retry-After в секундах:
+    либо число секунд, либо HTTP-дата. None, если разобрать не удалось.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class HttpClient:
+    """
+    Общий HTTP-клиент обоих парсеров.
+
+    - keep-alive: одна requests.Session, пул соединений к хосту
+      размером pool_size (по числу одновременных запросов);
+    - повторы на 5xx/429, таймаутах и обрывах соединения:
+      экспоненциальная пауза backoff * 2^(попытка-1) со случайным
+      разбросом (jitter), не больше backoff_max;
+    - Retry-After у 429/503 важнее собственной паузы;
+    - before_request (например, limiter.acquire) вызывается перед каждой
+      попыткой, так что повторы тоже укладываются в бюджет запросов;
+    - on_retry(url, попытка, причина, пауза) — для метрик.
+
+    Интерфейс get() как у requests.Session, поэтому клиент можно
+    передавать в HttpCache.get() вместо сессии.
+    """
+
+    def __init__(self, headers: dict | None = None, pool_size: int = 10,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 before_request=None, on_retry=None):
+        self.headers = dict(headers or {})
+        self.before_request = before_request
+        self.on_retry = on_retry
+        self._random = random.Random()
+        self._random_lock = threading.Lock()
+        self.session = None
+        self.configure(pool_size, retries, backoff, backoff_max)
+
+    def configure(self, pool_size: int = 10, retries: int = DEFAULT_RETRIES,
+                  backoff: float = DEFAULT_BACKOFF,
+                  backoff_max: float = DEFAULT_BACKOFF_MAX) -> None:
+        self.pool_size = max(1, pool_size)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+        if self.session is not None:
+            self.session.close()
+        session = requests.Session()
+        session.headers.update(self.headers)
+        # Повторы делаем сами (нужны jitter, Retry-After и limiter на каждую попытку)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self.session = session
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Пауза перед попыткой attempt+1: экспонента с разбросом 50–100%."""
+        base = min(self.backoff_max, self.backoff * 2 ** (attempt - 1))
+        with self._random_lock:
+            return base * self._random.uniform(0.5, 1.0)
+
+    def _retry(self, url: str, attempt: int, reason: str, delay: float) -> None:
+        print(f"  ~ повтор {attempt}/{self.retries} через {delay:.1f} c ({reason}): {url}")
+        if self.on_retry is not None:
+            self.on_retry(url, attempt, reason, delay)
+        time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET с повторами. После последней попытки возвращается последний
+        ответ (даже 5xx/429) или пробрасывается последняя сетевая ошибка.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.before_request is not None:
+                self.before_request()
+            try:
+                resp = self.session.get(url, **kwargs)
+            except RETRY_EXCEPTIONS as e:
+                if attempt > self.retries:
+                    raise
+                self._retry(url, attempt, type(e).__name__, self.backoff_delay(attempt))
+                continue
+
+            if resp.status_code not in RETRY_STATUSES or attempt > self.retries:
+                return resp
+
+            delay = self.backoff_delay(attempt)
+            retry_after = retry_after_seconds(resp.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = min(max(delay, retry_after), self.backoff_max)
+            resp.close()
+            self._retry(url, attempt, f"HTTP {resp.status_code}", delay)
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,260 @@
+"""
+Поиск записей перебором ID (/kennels/{id}, /catteries/{id}) вместо
+пагинации списка: страницы списка идут строго одна за другой, а проверки
+ID независимы и выполняются параллельно.
+
+Запись, на которую сайт ответил 404, считается отсутствующей. Пустые
+диапазоны между найденными записями сохраняются в файл пропусков
+(IdGaps) — следующий перебор их не проверяет. Перебор без верхней
+границы останавливается после stop_after подряд отсутствующих ID:
+это конец каталога, и хвост в пропуски не записывается — там появятся
+новые записи.
+"""
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+DEFAULT_STOP_AFTER = 500
+DEFAULT_PROBE_CONCURRENCY = 8
+DEFAULT_PROBED_PAGES = 256
+
+# ответы, означающие «такой записи нет»
+MISSING_STATUSES = (404, 410)
+
+
+class IdGaps:
+    """
+    Известные пустые диапазоны ID [первый, последний] по видам записей
+    в JSON-файле:  {"kennel": [[10, 19], [40, 44]], ...}.
+    Соседние и пересекающиеся диапазоны сливаются.
+    reset=True — забыть пропуски этого вида (файл перезапишется свежими).
+    """
+
+    def __init__(self, path: Path | None = None, kind: str = "id", reset: bool = False):
+        self.path = Path(path) if path else None
+        self.kind = kind
+        self._all: dict[str, list[list[int]]] = {}
+        if self.path and self.path.exists():
+            self._all = json.loads(self.path.read_text(encoding="utf-8"))
+        if reset:
+            self._all[kind] = []
+        self.ranges: list[list[int]] = self._all.setdefault(kind, [])
+
+    def add(self, first: int, last: int) -> None:
+        merged = [first, last]
+        kept = []
+        for r in self.ranges:
+            if r[1] + 1 < merged[0] or merged[1] + 1 < r[0]:
+                kept.append(r)
+            else:
+                merged = [min(merged[0], r[0]), max(merged[1], r[1])]
+        kept.append(merged)
+        kept.sort()
+        self.ranges[:] = kept
+
+    def skip(self, item: int) -> int:
+        """Первый ID не меньше item, не попадающий в известный пропуск."""
+        for first, last in self.ranges:
+            if first <= item <= last:
+                return last + 1
+            if first > item:
+                break
+        return item
+
+    @property
+    def total(self) -> int:
+        return sum(last - first + 1 for first, last in self.ranges)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._all), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class ProbedPages:
+    """
+    Страницы найденных записей, уже скачанные перебором: обход забирает
+    их отсюда (take) и не запрашивает второй раз — без кэша (--no-cache)
+    или с истёкшим --cache-ttl иначе каждая найденная запись скачивалась бы
+    дважды. Хранится не больше max_pages последних страниц (0 — выключено):
+    если обход всё же отстал, старые вытесняются и скачиваются как обычно.
+    Потокобезопасно.
+    """
+
+    def __init__(self, max_pages: int = DEFAULT_PROBED_PAGES):
+        self.max_pages = max_pages
+        self._pages: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_pages: int) -> None:
+        with self._lock:
+            self.max_pages = max_pages
+            self._pages.clear()
+
+    def put(self, url: str, page) -> None:
+        with self._lock:
+            if not self.max_pages:
+                return
+            self._pages[url] = page
+            self._pages.move_to_end(url)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def take(self, url: str):
+        """Страница url (и забыть её) или None, если её нет."""
+        with self._lock:
+            return self._pages.pop(url, None)
+
+    def backlog(self) -> bool:
+        """Занята половина места: перебору пора подождать обход."""
+        return bool(self.max_pages) and len(self._pages) >= self.max_pages // 2
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+
+class IdRangeProbe:
+    """
+    Перебор ID от start до end (или до stop_after подряд отсутствующих)
+    в concurrency потоков; итерация отдаёт ссылки на найденные записи
+    в порядке ID, не дожидаясь конца перебора.
+
+    exists(url) -> bool: True — запись есть, False — нет (404);
+    исключение — проверить не удалось: такой ID не считается ни найденным,
+    ни пропуском (errors), а серия отсутствующих ID на нём прерывается.
+
+        probe = IdRangeProbe(kennel_exists, base_url + "/kennels/{id}", gaps=IdGaps(path, "kennel"))
+        for url in probe: ...      # по окончании пропуски сохраняются в файл
+        print(probe.report())
+    """
+
+    def __init__(self, exists, url_template: str, start: int = 1, end: int | None = None,
+                 stop_after: int = DEFAULT_STOP_AFTER,
+                 concurrency: int = DEFAULT_PROBE_CONCURRENCY,
+                 gaps: IdGaps | None = None):
+        self.exists = exists
+        self.url_template = url_template
+        self.start = max(1, start)
+        self.end = end
+        self.stop_after = max(1, stop_after)
+        self.concurrency = max(1, concurrency)
+        self.gaps = gaps if gaps is not None else IdGaps()
+        self.probed = 0
+        self.found = 0
+        self.skipped = 0
+        self.errors: list[tuple[int, str]] = []
+        self.last_found: int | None = None
+
+    def url(self, item: int) -> str:
+        return self.url_template.format(id=item)
+
+    def _check(self, item: int):
+        try:
+            return self.exists(self.url(item))
+        except Exception as e:
+            return e
+
+    def _ids(self) -> Iterator[int]:
+        item = self.start
+        while self.end is None or item <= self.end:
+            nxt = self.gaps.skip(item)
+            if nxt != item:
+                self.skipped += nxt - item
+                item = nxt
+                continue
+            yield item
+            item += 1
+
+    def __iter__(self) -> Iterator[str]:
+        ids = self._ids()
+        pending: deque = deque()
+        # серия подряд отсутствующих ID: [первый, последний, сколько проверено]
+        run: list | None = None
+        window = self.concurrency * 4
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            def submit() -> bool:
+                item = next(ids, None)
+                if item is None:
+                    return False
+                pending.append((item, pool.submit(self._check, item)))
+                return True
+
+            while len(pending) < window and submit():
+                pass
+            try:
+                while pending:
+                    item, future = pending.popleft()
+                    result = future.result()
+                    self.probed += 1
+                    if isinstance(result, Exception):
+                        self.errors.append((item, str(result)))
+                        run = None
+                    elif result:
+                        if run is not None:
+                            # пустой диапазон между двумя найденными записями
+                            self.gaps.add(run[0], run[1])
+                            run = None
+                        self.found += 1
+                        self.last_found = item
+                        yield self.url(item)
+                    else:
+                        run = [item, item, 1] if run is None else [run[0], item, run[2] + 1]
+                        if self.end is None and run[2] >= self.stop_after:
+                            break
+                    submit()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+                self.gaps.save()
+
+    def report(self) -> str:
+        return (
+            f"Перебор ID: проверено {self.probed}, найдено {self.found}, "
+            f"пропущено по известным пропускам {self.skipped}, ошибок {len(self.errors)}; "
+            f"последний найденный ID {self.last_found}; "
+            f"пропусков в файле {len(self.gaps.ranges)} ({self.gaps.total} ID)"
+        )
+
+
+def add_probe_arguments(parser: argparse.ArgumentParser, default_gaps: Path) -> None:
+    """Аргументы перебора ID — общие для парсеров и shard_crawl.py."""
+    parser.add_argument(
+        "--discovery", choices=("listing", "ids"), default="listing",
+        help="listing — по страницам списка, ids — перебором ID страниц записей",
+    )
+    parser.add_argument("--id-start", type=int, default=1, help="с какого ID начинать перебор")
+    parser.add_argument("--id-end", type=int, default=None,
+                        help="последний ID (по умолчанию — до --id-stop-after подряд 404)")
+    parser.add_argument(
+        "--id-stop-after", type=int, default=DEFAULT_STOP_AFTER,
+        help="сколько ID подряд без записи считать концом каталога",
+    )
+    parser.add_argument(
+        "--probe-concurrency", type=int, default=DEFAULT_PROBE_CONCURRENCY,
+        help="сколько ID проверять одновременно",
+    )
+    parser.add_argument(
+        "--id-gaps", type=Path, default=default_gaps,
+        help="файл известных пустых диапазонов ID — их перебор пропускает",
+    )
+    parser.add_argument(
+        "--no-id-gaps", action="store_true",
+        help="проверить все ID заново, не глядя на известные пропуски",
+    )
+
+
+def probe_from_args(args: argparse.Namespace, exists, url_template: str, kind: str) -> IdRangeProbe:
+    gaps = IdGaps(args.id_gaps, kind, reset=args.no_id_gaps)
+    return IdRangeProbe(
+        exists, url_template, start=args.id_start, end=args.id_end,
+        stop_after=args.id_stop_after, concurrency=args.probe_concurrency, gaps=gaps,
+    )
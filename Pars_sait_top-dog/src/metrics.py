@@ -0,0 +1,281 @@
+import contextlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+
+from http_cache import _write_atomic
+
+# Границы корзин гистограмм длительности, секунды (как у Prometheus по умолчанию)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Стадии обхода, для которых ведутся гистограммы
+STAGES = ("fetch", "parse", "clean", "export")
+
+
+class Histogram:
+    """Гистограмма с накопительными корзинами, как histogram в Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Оценка квантиля по корзинам (верхняя граница нужной корзины)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": {str(b): c for b, c in zip(self.buckets, self.counts)},
+        }
+
+
+class CrawlMetrics:
+    """
+    Метрики обхода по стадиям: fetch, parse, clean, export.
+
+    Гистограммы длительности, скачанные байты, коды ответов, повторы
+    запросов, ответы из кэша, ошибки по стадиям и число готовых строк.
+    Байты и коды — только по ответам сайта, страницы из кэша считаются
+    отдельно (cache_hits). Пишутся в два файла —
+    JSON и текстовый формат Prometheus — в конце обхода и, если задан
+    interval, периодически в фоне.
+
+    Один экземпляр (metrics) на процесс, как limiter и cache:
+    настраивается через configure() из main(), потокобезопасен.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.configure()
+
+    def configure(self, directory: Path | None = None, name: str = "crawl",
+                  interval: float = 0, labels: dict | None = None,
+                  file_name: str | None = None) -> None:
+        """
+        directory — куда писать <file_name>_metrics.json и <file_name>_metrics.prom
+                    (None — никуда, метрики только копятся в памяти);
+        name      — префикс метрик Prometheus (буквы, цифры, «_»);
+        file_name — имя файлов, по умолчанию name (например, своё у каждого
+                    воркера шардового обхода, а сам воркер — в labels);
+        interval  — раз во сколько секунд сбрасывать файлы во время обхода.
+        """
+        if not re.fullmatch(r"[a-zA-Z_][a-zA-Z0-9_]*", name):
+            raise ValueError(f"недопустимый префикс метрик Prometheus: {name!r}")
+        self.directory = Path(directory) if directory else None
+        self.name = name
+        self.file_name = file_name or name
+        self.interval = interval
+        self.labels = dict(labels or {})
+        with self._lock:
+            self.started_at = time.time()
+            self.histograms = {stage: Histogram() for stage in STAGES}
+            self.bytes_downloaded = 0
+            self.statuses: dict[str, int] = {}
+            self.retries = 0
+            self.cache_hits = 0
+            self.errors: dict[str, int] = {}
+            self.rows: dict[str, int] = {}
+
+    # ---------- сбор ----------
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, stage: str):
+        """
+        with metrics.timer("export"): ...
+        Длительность попадает в гистограмму стадии, исключение — в errors.
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count_error(stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def count_response(self, status: int, size: int) -> None:
+        with self._lock:
+            key = str(status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            self.bytes_downloaded += size
+
+    def count_http_response(self, resp) -> None:
+        """Ответ сайта (requests.Response) — для HttpCache.get(on_response=...)."""
+        self.count_response(resp.status_code, len(resp.content))
+
+    def count_cache_hit(self) -> None:
+        with self._lock:
+            self.cache_hits += 1
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def count_error(self, stage: str) -> None:
+        with self._lock:
+            self.errors[stage] = self.errors.get(stage, 0) + 1
+
+    def count_rows(self, kind: str, n: int = 1) -> None:
+        with self._lock:
+            self.rows[kind] = self.rows.get(kind, 0) + n
+
+    # ---------- выгрузка ----------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = max(time.time() - self.started_at, 1e-9)
+            return {
+                "name": self.name,
+                "labels": dict(self.labels),
+                "started_at": self.started_at,
+                "elapsed_seconds": round(elapsed, 3),
+                "stages": {s: h.snapshot() for s, h in self.histograms.items()},
+                "bytes_downloaded": self.bytes_downloaded,
+                "responses": dict(self.statuses),
+                "retries": self.retries,
+                "cache_hits": self.cache_hits,
+                "errors": dict(self.errors),
+                "rows": dict(self.rows),
+                "rows_per_sec": {k: round(n / elapsed, 3) for k, n in self.rows.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        prefix = self.name
+
+        def labels(**extra) -> str:
+            merged = {**self.labels, **extra}
+            if not merged:
+                return ""
+            inner = ",".join(f'{k}="{v}"' for k, v in merged.items())
+            return "{" + inner + "}"
+
+        lines = [
+            f"# HELP {prefix}_stage_seconds Длительность стадий обхода.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        with self._lock:
+            histograms = {s: (h.buckets, list(h.counts), h.count, h.sum)
+                          for s, h in self.histograms.items()}
+        for stage, (buckets, counts, count, total) in histograms.items():
+            for bound, c in zip(buckets, counts):
+                lines.append(f"{prefix}_stage_seconds_bucket{labels(stage=stage, le=bound)} {c}")
+            lines.append(f"{prefix}_stage_seconds_bucket{labels(stage=stage, le='+Inf')} {count}")
+            lines.append(f"{prefix}_stage_seconds_sum{labels(stage=stage)} {total}")
+            lines.append(f"{prefix}_stage_seconds_count{labels(stage=stage)} {count}")
+
+        lines += [
+            f"# TYPE {prefix}_bytes_downloaded_total counter",
+            f"{prefix}_bytes_downloaded_total{labels()} {snap['bytes_downloaded']}",
+            f"# TYPE {prefix}_http_responses_total counter",
+        ]
+        lines += [
+            f"{prefix}_http_responses_total{labels(code=code)} {n}"
+            for code, n in sorted(snap["responses"].items())
+        ]
+        lines += [
+            f"# TYPE {prefix}_retries_total counter",
+            f"{prefix}_retries_total{labels()} {snap['retries']}",
+            f"# TYPE {prefix}_cache_hits_total counter",
+            f"{prefix}_cache_hits_total{labels()} {snap['cache_hits']}",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        lines += [
+            f"{prefix}_errors_total{labels(stage=stage)} {n}"
+            for stage, n in sorted(snap["errors"].items())
+        ]
+        lines.append(f"# TYPE {prefix}_rows_total counter")
+        lines += [
+            f"{prefix}_rows_total{labels(kind=kind)} {n}"
+            for kind, n in sorted(snap["rows"].items())
+        ]
+        lines.append(f"# TYPE {prefix}_rows_per_second gauge")
+        lines += [
+            f"{prefix}_rows_per_second{labels(kind=kind)} {rate}"
+            for kind, rate in sorted(snap["rows_per_sec"].items())
+        ]
+        lines += [
+            f"# TYPE {prefix}_elapsed_seconds gauge",
+            f"{prefix}_elapsed_seconds{labels()} {snap['elapsed_seconds']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Атомарно перезаписывает JSON и .prom (если задан каталог)."""
+        if self.directory is None:
+            return
+        # не with_suffix: в имени файла воркера есть точка (topdog.w1)
+        base = f"{self.file_name}_metrics"
+        data = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        _write_atomic(self.directory / f"{base}.json", data.encode("utf-8"))
+        _write_atomic(self.directory / f"{base}.prom", self.to_prometheus().encode("utf-8"))
+
+    def start(self) -> None:
+        """Фоновый сброс файлов раз в interval секунд (если interval > 0)."""
+        if self.interval <= 0 or self.directory is None or self._thread:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.write()
+                except OSError as e:
+                    print(f"!! Не удалось записать метрики: {e}")
+
+        self._thread = threading.Thread(target=loop, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает фоновый сброс и пишет итоговые файлы."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def report(self) -> str:
+        snap = self.snapshot()
+        parts = []
+        for stage, h in snap["stages"].items():
+            if h["count"]:
+                parts.append(f"{stage} {h['count']} шт., в среднем {h['avg'] * 1000:.1f} мс")
+        rows = ", ".join(f"{k} {v}/с" for k, v in snap["rows_per_sec"].items())
+        return (
+            "Метрики: " + "; ".join(parts)
+            + f"\n  скачано {snap['bytes_downloaded'] / 1024 / 1024:.1f} МБ, "
+            f"ответы {snap['responses']}, из кэша {snap['cache_hits']}, "
+            f"повторов {snap['retries']}, "
+            f"ошибки {snap['errors'] or 'нет'}; строк в секунду: {rows or '—'}"
+        )
@@ -0,0 +1,156 @@
+"""
+Параллельный обход постраничного списка (/kennels?page=N, /catteries?page=N).
+
+Раньше страницы шли строго по одной: 1, 2, 3... до первой страницы без
+новых ссылок — N последовательных запросов. Здесь сначала определяется
+номер последней страницы:
+  - по разметке пагинации на первой странице (наибольший ?page=N в ссылках);
+  - если её нет — подбором: страницы 2, 4, 8... до первой пустой,
+    затем делением пополам (около 2·log2(N) запросов);
+после чего остальные страницы скачиваются параллельно. Ссылки отдаются
+в порядке страниц, повторы отбрасываются по множеству ключей.
+Страницы после последней (список успел вырасти) дочитываются по одной,
+пока на них есть новые ссылки.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
+DEFAULT_LISTING_CONCURRENCY = 4
+
+PAGE_LINK_RE = re.compile(r"""href=["'][^"']*[?&](?:amp;)?page=(\d+)""")
+
+
+def last_page_from_markup(html: str) -> int | None:
+    """Наибольший номер страницы в ссылках пагинации; None — ссылок нет."""
+    pages = [int(n) for n in PAGE_LINK_RE.findall(html)]
+    return max(pages) if pages else None
+
+
+class ListingPages:
+    """
+    Ссылки страниц списка с запоминанием: каждая страница скачивается
+    не больше раза, в том числе при подборе последней страницы
+    (хранятся только ссылки, не HTML).
+
+    fetch(page) -> (html, links): html — текст страницы (для разметки
+    пагинации), links — ссылки на записи в порядке на странице;
+    исключение — страницу получить не удалось. При подборе последней
+    страницы такая страница считается пустой: за концом списка сайт
+    может отвечать и 404.
+    """
+
+    def __init__(self, fetch: Callable[[int], tuple[str, list[str]]], label: str = "LIST"):
+        self.fetch = fetch
+        self.label = label
+        self.pages: dict[int, list[str]] = {}
+
+    def get(self, page: int) -> list[str]:
+        if page not in self.pages:
+            self.pages[page] = self.fetch(page)[1]
+        return self.pages[page]
+
+    def pop(self, page: int) -> list[str]:
+        links = self.get(page)
+        self.pages.pop(page, None)
+        return links
+
+    def has_items(self, page: int) -> bool:
+        try:
+            return bool(self.get(page))
+        except Exception as e:
+            print(f"[{self.label}] Страница {page}: ошибка ({e}), считаем её концом списка.")
+            return False
+
+    def probe_last(self, known: int = 1, limit: int | None = None) -> int:
+        """
+        Последняя непустая страница: known — заведомо непустая,
+        limit — дальше неё не смотреть.
+        """
+        lo = known
+        if limit is not None:
+            if self.has_items(limit):
+                return limit
+            hi = limit
+        else:
+            hi = known * 2
+            while self.has_items(hi):
+                lo, hi = hi, hi * 2
+        # lo непустая, hi пустая
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.has_items(mid):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+
+def iter_listing(fetch: Callable[[int], tuple[str, list[str]]], key: Callable[[str], str],
+                 concurrency: int = DEFAULT_LISTING_CONCURRENCY,
+                 max_pages: int | None = None, label: str = "LIST") -> Iterator[str]:
+    """
+    Ссылки всех страниц списка в порядке страниц, без повторов (по key(url)).
+    Первая страница отдаётся сразу, остальные уже качаются параллельно.
+    """
+    listing = ListingPages(fetch, label)
+    seen: set[str] = set()
+
+    def fresh(links: list[str]) -> list[str]:
+        result = []
+        for url in links:
+            k = key(url)
+            if k not in seen:
+                seen.add(k)
+                result.append(url)
+        return result
+
+    try:
+        html, links = fetch(1)
+    except Exception as e:
+        print(f"[{label}] Страница 1 недоступна ({e}), список пуст.")
+        return
+    if not links:
+        print(f"[{label}] На первой странице нет ссылок.")
+        return
+    listing.pages[1] = links
+
+    last = last_page_from_markup(html)
+    how = "по разметке"
+    if last is None or last < 1:
+        last, how = listing.probe_last(limit=max_pages), "подбором"
+    if max_pages is not None:
+        last = min(last, max_pages)
+    print(f"[{label}] Страниц в списке: {last} ({how})")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        def load(page: int):
+            try:
+                return listing.pop(page)
+            except Exception as e:
+                return e
+
+        # map отдаёт результаты в порядке страниц, скачивая их параллельно
+        for page, result in zip(range(1, last + 1), pool.map(load, range(1, last + 1))):
+            if isinstance(result, Exception):
+                print(f"[{label}] Страница {page}: ошибка ({result}), пропускаем.")
+                continue
+            page_links = fresh(result)
+            print(f"[{label}] Страница {page}: новых ссылок {len(page_links)}")
+            yield from page_links
+
+    # Список мог вырасти, пока его читали: дочитываем, пока есть новое
+    page = last + 1
+    while max_pages is None or page <= max_pages:
+        try:
+            page_links = fresh(listing.pop(page))
+        except Exception as e:
+            print(f"[{label}] Страница {page}: ошибка ({e}), прекращаем.")
+            break
+        if not page_links:
+            break
+        print(f"[{label}] Страница {page}: новых ссылок {len(page_links)}")
+        yield from page_links
+        page += 1
+
+    print(f"\n[{label}] Всего найдено: {len(seen)}\n")
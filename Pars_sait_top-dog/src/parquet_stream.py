@@ -0,0 +1,128 @@
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from columnar import ColumnarRows
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow нужен только для --parquet-dir
+    pa = pq = None
+
+# Строк в одной группе строк (row group): столько держится в памяти
+# на таблицу, прежде чем уйти в файл
+DEFAULT_ROW_GROUP_SIZE = 10_000
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+class StreamingParquetWriter:
+    """
+    Потоковая запись таблиц в Parquet — по файлу <name>.parquet на таблицу
+    в каталоге directory. Строки копятся до row_group_size (по колонкам,
+    в ColumnarRows) и уходят в файл группой строк, так что память не растёт
+    с размером обхода, а запись идёт по ходу обхода, а не в конце.
+
+    Колонки типизированы: перечисленные в ints — int64 (ID, счётчики),
+    остальные — строки; колонки из dictionary (порода, окрас, город...)
+    хранятся словарём: в файле каждое значение один раз, в pandas — category.
+
+    Пока таблица пишется, файл называется <name>.parquet.part;
+    в <name>.parquet он переименовывается в close(), когда записан footer, —
+    читатели никогда не видят недописанный файл.
+
+        with StreamingParquetWriter(directory) as writer:
+            writer.add_table("dogs", DOG_COLUMNS, ints=("dog_id",), dictionary=("breed",))
+            writer.append("dogs", row)
+    """
+
+    def __init__(self, directory: Path, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 compression: str = "zstd"):
+        if pa is None:
+            raise RuntimeError("Для выгрузки в Parquet нужен pyarrow: pip install pyarrow")
+        self.directory = Path(directory)
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self._lock = threading.Lock()
+        # имя таблицы -> [схема, writer, буфер ColumnarRows, строк всего]
+        self._tables: dict[str, list] = {}
+
+    def add_table(self, name: str, columns: list[str],
+                  ints=(), dictionary=()) -> None:
+        buffer = ColumnarRows(columns, ints=ints, dictionary=dictionary)
+        fields = []
+        for col in columns:
+            if col in buffer.ints:
+                fields.append(pa.field(col, pa.int64()))
+            elif buffer.is_dictionary(col):
+                fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(col, pa.string()))
+        schema = pa.schema(fields)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        writer = pq.ParquetWriter(
+            self.directory / f"{name}.parquet.part", schema,
+            compression=self.compression,
+        )
+        self._tables[name] = [schema, writer, buffer, 0]
+
+    def path(self, name: str) -> Path:
+        return self.directory / f"{name}.parquet"
+
+    def _flush(self, state: list) -> None:
+        schema, writer, buffer, _ = state
+        if not len(buffer):
+            return
+        arrays = []
+        for field in schema:
+            if buffer.is_dictionary(field.name):
+                # коды уже посчитаны при добавлении строк — Arrow их только оборачивает
+                codes = np.frombuffer(buffer.codes(field.name), dtype=np.int32)
+                indices = pa.array(codes, mask=codes < 0, type=pa.int32())
+                dictionary = pa.array(buffer.dictionary(field.name), type=pa.string())
+                arrays.append(pa.DictionaryArray.from_arrays(indices, dictionary))
+            else:
+                arrays.append(pa.array(buffer.values(field.name), type=field.type))
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        state[3] += len(buffer)
+        buffer.clear()
+
+    def append(self, name: str, row: dict) -> None:
+        with self._lock:
+            state = self._tables[name]
+            state[2].append(row)
+            if len(state[2]) >= self.row_group_size:
+                self._flush(state)
+
+    def write_rows(self, name: str, rows) -> int:
+        count = 0
+        for row in rows:
+            self.append(name, row)
+            count += 1
+        return count
+
+    def rows_written(self, name: str) -> int:
+        with self._lock:
+            state = self._tables[name]
+            return state[3] + len(state[2])
+
+    def close(self) -> None:
+        with self._lock:
+            for name, state in self._tables.items():
+                self._flush(state)
+                state[1].close()
+                os.replace(self.directory / f"{name}.parquet.part", self.path(name))
+            self._tables.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
@@ -1,32 +1,168 @@
-import time
+import argparse
+import asyncio
+import contextlib
+import itertools
+import os
+import socket
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator
 from urllib.parse import urljoin, urlparse
 import html
+import time
 
-import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 
-from config import BASE_URL, HEADERS
+from config import (
+    BASE_URL,
+    HEADERS,
+    CONCURRENCY_PER_HOST,
+    PARSE_WORKERS,
+    REQUESTS_PER_SECOND,
+    RATE_BURST,
+    RETRIES,
+    RETRY_BACKOFF,
+)
+from crawl_journal import CrawlJournal, JournalBaseline, content_hash
+from dog_index import IdBitset, SeenIds
+from excel_stream import StreamingExcelWriter
+from extractors import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    extract_id_from_url,
+    make_soup,
+    parse_dog_html,
+    parse_kennel_html,
+)
+from http_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL, HttpCache
+from http_client import HttpClient
+from id_probe import (
+    DEFAULT_PROBED_PAGES, MISSING_STATUSES, ProbedPages, add_probe_arguments, probe_from_args,
+)
+from metrics import CrawlMetrics
+from pagination import DEFAULT_LISTING_CONCURRENCY, iter_listing
+from parquet_stream import StreamingParquetWriter, parquet_available
+from pedigree import PedigreeGraph
+from photo_store import DEFAULT_PHOTO_RPS, DEFAULT_PHOTO_WORKERS, PhotoStore, attach, photo_client
+from rate_limit import TokenBucket
+from sqlite_sink import SinkTable, SqliteSink
+from work_queue import DEFAULT_LEASE, WorkQueue
 
 
 
 
-session = requests.Session()
-session.headers.update(HEADERS)
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 
+# Колонки листов итогового файла (в порядке ключей parse_kennel/parse_dog)
+KENNEL_COLUMNS = [
+    "kennel_id", "kennel_url", "kennel_name", "city_country",
+    "breeder_person", "breeds", "kennel_prefix", "website", "email",
+    "phone", "social_links", "photo_url", "dogs_count_on_page",
+]
+DOG_COLUMNS = [
+    "dog_id", "dog_url", "dog_name", "sex", "breed", "color", "birthday",
+    "father", "mother", "owner", "co_owner", "breeder_person",
+    "kennel_name", "kennel_id", "photo_url", "father_id", "mother_id",
+]
+# Связи собака — питомник: собака скачивается один раз, а встретиться
+# может у нескольких питомников (kennel_id в dogs — первый из них)
+DOG_KENNEL_COLUMNS = ["dog_id", "kennel_id"]
 
-def get_soup(url: str) -> BeautifulSoup:
-    resp = session.get(url, timeout=20)
+# Выгрузки по ходу обхода (Parquet, база): вид записи в журнале -> (таблица, колонки)
+EXPORT_TABLES = {
+    "kennel": ("kennels", KENNEL_COLUMNS),
+    "dog": ("dogs", DOG_COLUMNS),
+    "dog_kennel": ("dog_kennels", DOG_KENNEL_COLUMNS),
+}
+INT_COLUMNS = ("kennel_id", "dog_id", "dogs_count_on_page", "father_id", "mother_id")
+# Повторяющиеся значения — в Parquet храним словарём
+PARQUET_DICTIONARY = (
+    "city_country", "breeds", "breed", "sex", "color",
+    "kennel_name", "breeder_person", "father", "mother", "owner", "co_owner",
+)
+
+# База SQLite (--db): ключи, индексы для поиска и связи таблиц
+DB_TABLES = [
+    SinkTable("kennels", KENNEL_COLUMNS, key=("kennel_id",), ints=INT_COLUMNS,
+              indexes=("kennel_name", "breeder_person")),
+    SinkTable("dogs", DOG_COLUMNS, key=("dog_id",), ints=INT_COLUMNS,
+              indexes=("kennel_id", "breed", "breeder_person", "father_id", "mother_id"),
+              references={"kennel_id": "kennels"}),
+    SinkTable("dog_kennels", DOG_KENNEL_COLUMNS, key=("dog_id", "kennel_id"), ints=INT_COLUMNS,
+              indexes=("kennel_id",),
+              references={"dog_id": "dogs", "kennel_id": "kennels"}),
+]
+
+# Общий бюджет запросов к сайту: через него проходит каждый get_soup,
+# в том числе из потоков асинхронного обхода.
+limiter = TokenBucket(REQUESTS_PER_SECOND, RATE_BURST)
+
+# Дисковый кэш страниц, общий с парсером top-cat
+cache = HttpCache()
+
+# Метрики по стадиям: fetch, parse, clean, export
+metrics = CrawlMetrics()
+
+# Страницы питомников, найденные перебором ID, — обходу, без второго скачивания.
+# Включается, только когда обход сам перебирает ID: координатору shard_crawl.py
+# передать их воркерам некому.
+probed_pages = ProbedPages(max_pages=0)
+
+# Общий клиент: keep-alive, повторы с паузой; limiter — на каждую попытку.
+# Пул соединений: потоки скачивания плюс потоки страниц списка.
+client = HttpClient(
+    HEADERS,
+    pool_size=CONCURRENCY_PER_HOST + DEFAULT_LISTING_CONCURRENCY,
+    retries=RETRIES,
+    backoff=RETRY_BACKOFF,
+    before_request=limiter.acquire,
+    on_retry=lambda *_: metrics.count_retry(),
+)
+
+
+def http_get(url: str):
+    """
+    GET через дисковый кэш и общий клиент. В метрики ответов и байт
+    попадают только ответы сайта, страницы из кэша — в cache_hits.
+    """
+    resp = cache.get(client, url, on_response=metrics.count_http_response, timeout=20)
+    if resp.from_cache:
+        metrics.count_cache_hit()
+    return resp
+
+
+def fetch_page(url: str) -> bytes:
+    """
+    Скачивает страницу (через кэш и limiter) и возвращает сырые байты.
+    Разбор HTML сюда не входит — его можно делать в другом процессе.
+    Страница, уже скачанная перебором ID, берётся из probed_pages.
+    """
+    page = probed_pages.take(url)
+    if page is not None:
+        return page
+    with metrics.timer("fetch"):
+        resp = http_get(url)
+        resp.raise_for_status()
+    return resp.content
+
+
+def kennel_exists(url: str) -> bool:
+    """
+    Проверка ID для перебора (--discovery ids): 404 — питомника нет.
+    Найденная страница передаётся обходу через probed_pages, и второй раз
+    он её не скачивает — даже без кэша.
+    """
+    with discovery_gate.slot(url), metrics.timer("fetch"):
+        resp = http_get(url)
+    if resp.status_code in MISSING_STATUSES:
+        return False
     resp.raise_for_status()
-    resp.encoding = "utf-8"
-    return BeautifulSoup(resp.text, "lxml")
+    probed_pages.put(url, resp.content)
+    return True
 
 
-def extract_id_from_url(url: str) -> str:
-    path = urlparse(url).path.rstrip("/")
-    last = path.split("/")[-1]
-    return last
+def get_soup(url: str) -> BeautifulSoup:
+    return make_soup(fetch_page(url))
 
 
 def clean_dict(d: dict) -> dict:
@@ -46,215 +182,904 @@ def clean_dict(d: dict) -> dict:
 
 def parse_dog(dog_url: str,
               kennel_id: str | None = None,
-              kennel_name_from_kennel: str | None = None) -> dict:
+              kennel_name_from_kennel: str | None = None,
+              backend: str = DEFAULT_BACKEND) -> dict:
     """
     Парсим страницу конкретной собаки.
     Возвращаем dict с нужными полями.
     """
-    soup = get_soup(dog_url)
+    return parse_dog_html(fetch_page(dog_url), dog_url, kennel_id,
+                          kennel_name_from_kennel, backend=backend)
 
-    # Фото
-    img = soup.select_one(".primary-info-section .avatar img")
-    photo_url = urljoin(BASE_URL, img["src"]) if img and img.get("src") else None
 
-    # Имя
-    name_tag = soup.select_one(".primary-info-section .name h1")
-    name = name_tag.get_text(strip=True) if name_tag else None
-
-    # Таблицы с данными
-    data = {}
-    for row in soup.select(".secondary-info .info-column table tr"):
-        def_td = row.select_one("td.definition")
-        val_td = row.select_one("td.value")
-        if not def_td or not val_td:
-            continue
-        key = def_td.get_text(strip=True).rstrip(":")
-        value = val_td.get_text(" ", strip=True)
-        data[key] = value
-
-    # Питомник
-    kennel_name = data.get("Питомник") or kennel_name_from_kennel
-
-    dog_id = extract_id_from_url(dog_url)
-
-    return {
-        "dog_id": dog_id,
-        "dog_url": dog_url,
-        "dog_name": name,
-        "sex": data.get("Пол"),
-        "breed": data.get("Порода"),
-        "color": data.get("Окрас"),
-        "birthday": data.get("День рождения"),
-        "father": data.get("Отец"),
-        "mother": data.get("Мать"),
-        "owner": data.get("Владелец"),
-        "co_owner": data.get("Совладелец"),
-        "breeder_person": data.get("Заводчик"),
-        "kennel_name": kennel_name,
-        "kennel_id": kennel_id,
-        "photo_url": photo_url,
-    }
-
-
-def parse_kennel(kennel_url: str) -> tuple[dict, list[str]]:
+def parse_kennel(kennel_url: str,
+                 backend: str = DEFAULT_BACKEND) -> tuple[dict, list[str]]:
     """
     Парсим страницу питомника.
     Возвращаем:
       - dict с данными питомника
       - список URL собак этого питомника
     """
-    soup = get_soup(kennel_url)
+    return parse_kennel_html(fetch_page(kennel_url), kennel_url, backend=backend)
 
-    # Фото
-    img = soup.select_one(".kennel-info .photo img")
-    photo_url = urljoin(BASE_URL, img["src"]) if img and img.get("src") else None
 
-    # Название
-    name_tag = soup.select_one(".kennel-name h1")
-    name = name_tag.get_text(strip=True) if name_tag else None
+def kennel_links_on_page(page: int, base_url: str = BASE_URL) -> tuple[str, list[str]]:
+    """HTML страницы /kennels?page=N и ссылки на питомники на ней (по порядку)."""
+    url = f"{base_url}/kennels?page={page}"
+    with discovery_gate.slot(url):
+        content = fetch_page(url)
+    links: list[str] = []
+    for a in make_soup(content).select("a[href^='/kennels/']"):
+        href = a.get("href")
+        if not href:
+            continue
+        full_url = urljoin(base_url, href)
+        if extract_id_from_url(full_url).isdigit():
+            links.append(full_url)
+    return content.decode("utf-8", errors="replace"), links
 
-    # Город/страна
-    city_tag = soup.select_one(".kennel-info .city")
-    city = city_tag.get_text(strip=True) if city_tag else None
 
-    # Детали (dt/dd)
-    details: dict[str, str] = {}
-    for dt in soup.select(".details-container dt"):
-        key = dt.get_text(strip=True).rstrip(":")
-        dd = dt.find_next("dd")
-        if not dd:
-            continue
+def iter_kennel_links(max_pages: int | None = None,
+                      base_url: str = BASE_URL,
+                      concurrency: int = DEFAULT_LISTING_CONCURRENCY) -> Iterator[str]:
+    """
+    Обходит страницы /kennels?page=N и отдаёт ссылки по мере разбора
+    страниц — обход питомников может начинаться, не дожидаясь конца
+    пагинации. Число страниц определяется заранее (pagination.py),
+    и страницы скачиваются в concurrency потоков.
+    Если max_pages задан, ограничивает число страниц.
+    base_url — адрес сайта (другой — например, для локального replay_server).
+    """
+    return iter_listing(
+        lambda page: kennel_links_on_page(page, base_url),
+        key=extract_id_from_url, concurrency=concurrency,
+        max_pages=max_pages, label="KENNELS",
+    )
 
-        # Соцсети — href всех ссылок
-        if "profile-social-icons" in (dd.get("class") or []):
-            links = [a.get("href") for a in dd.select("a[href]")]
-            value = ", ".join(links)
-        else:
-            value = dd.get_text(" ", strip=True)
 
-        details[key] = value
+def collect_all_kennel_links(max_pages: int | None = None,
+                             base_url: str = BASE_URL) -> list[str]:
+    """
+    Все ссылки на питомники одним списком.
+    """
+    return list(iter_kennel_links(max_pages, base_url))
 
-    # Ссылки на собак
-    dog_links: list[str] = [
-        urljoin(BASE_URL, a["href"])
-        for a in soup.select(".dogs-grid-item .dog-name a[href^='/dogs/']")
-    ]
 
-    kennel_id = extract_id_from_url(kennel_url)
+def kennel_hash(kennel_row: dict, dog_links: list[str]) -> str:
+    """Хеш питомника: строка для выгрузки плюс список его собак."""
+    return content_hash(kennel_row, dog_links)
 
-    kennel_data = {
-        "kennel_id": kennel_id,
-        "kennel_url": kennel_url,
-        "kennel_name": name,
-        "city_country": city,
-        "breeder_person": details.get("Заводчик"),
-        "breeds": details.get("Породы"),
-        "kennel_prefix": details.get("Заводская приставка"),
-        "website": details.get("Веб-сайт"),
-        "email": details.get("Эл. почта"),
-        "phone": details.get("Телефон"),
-        "social_links": details.get("Соц. сети"),
-        "photo_url": photo_url,
-        "dogs_count_on_page": len(dog_links),
-    }
 
-    return kennel_data, dog_links
+def seen_dogs_from_journal(journal: CrawlJournal) -> SeenIds:
+    """Множество готовых собак в памяти — для обхода без файла dogs.bitset."""
+    seen = SeenIds()
+    seen.mark_done(journal.done_ids("dog"))
+    return seen
 
 
-def collect_all_kennel_links(max_pages: int | None = None) -> list[str]:
+def claim_kennel_dogs(journal: CrawlJournal, seen: SeenIds,
+                      kennel_id: str, dog_links: list[str]) -> list[str]:
     """
-    Обходит страницы /kennels?page=N, пока есть новые питомники.
-    Если max_pages задан, ограничивает число страниц.
+    Записывает связи собак с питомником и возвращает только тех собак,
+    которых ещё никто не скачал и не взял в работу. Остальные питомники,
+    где встретилась та же собака, получают лишь строку в dog_kennels.
     """
-    all_links: list[str] = []
-    seen_ids: set[str] = set()
-    page = 1
-
-    while True:
-        if max_pages is not None and page > max_pages:
-            break
+    todo = []
+    for dog_url in dog_links:
+        dog_id = extract_id_from_url(dog_url)
+        if not journal.is_done("dog_kennel", dog_id, kennel_id):
+            journal.record("dog_kennel", dog_id, {"dog_id": dog_id, "kennel_id": kennel_id},
+                           parent_id=kennel_id)
+        if seen.claim(dog_id):
+            todo.append(dog_url)
+    return todo
 
-        url = f"{BASE_URL}/kennels?page={page}"
-        print(f"[KENNELS] Страница {page}: {url}")
-        try:
-            soup = get_soup(url)
-        except requests.HTTPError as e:
-            print(f"  Ошибка HTTP ({e}), прекращаем обход.")
-            break
-
-        page_links: list[str] = []
-        for a in soup.select("a[href^='/kennels/']"):
-            href = a.get("href")
-            if not href:
-                continue
-            full_url = urljoin(BASE_URL, href)
-            kid = extract_id_from_url(full_url)
-            if not kid.isdigit():
-                continue
-            if kid in seen_ids:
-                continue
-            seen_ids.add(kid)
-            page_links.append(full_url)
 
-        if not page_links:
-            print("  На странице не найдено новых питомников, выходим.")
-            break
+class IncrementalPlan:
+    """
+    Инкрементальный обход (--incremental) относительно прошлого журнала.
 
-        print(f"  Найдено питомников на странице: {len(page_links)}")
-        all_links.extend(page_links)
+    Страница питомника скачивается всегда (с HTTP-кэшем это обычно 304).
+    Если её содержимое, включая список собак, совпадает с прошлым обходом,
+    собаки этого питомника переносятся в новый журнал из старого без
+    скачивания; качаются только те, которых в прошлый раз не удалось получить.
+    Изменившиеся и новые питомники обходятся полностью, пропавшие с сайта
+    в новый журнал не попадают — выгрузка остаётся полной и актуальной.
+    """
 
-        page += 1
-        time.sleep(0.5)
+    def __init__(self, baseline: JournalBaseline):
+        self.baseline = baseline
+        self.unchanged = 0
+        self.changed = 0
+        self.reused_dogs = 0
 
-    print(f"\nВсего найдено питомников: {len(all_links)}\n")
-    return all_links
+    def dogs_to_fetch(self, journal: CrawlJournal, seen: SeenIds, kennel_id: str,
+                      digest: str, dog_links: list[str]) -> list[str]:
+        """dog_links — собаки, уже взятые этим питомником (claim_kennel_dogs)."""
+        if self.baseline.content_hash("kennel", kennel_id) != digest:
+            self.changed += 1
+            return dog_links
 
+        self.unchanged += 1
+        previous = {}
+        for dog_id, row, dog_digest in self.baseline.children("dog", kennel_id):
+            previous[dog_id] = (row, dog_digest)
 
+        todo = []
+        for dog_url in dog_links:
+            dog_id = extract_id_from_url(dog_url)
+            if dog_id not in previous:
+                todo.append(dog_url)
+                continue
+            row, dog_digest = previous[dog_id]
+            journal.record("dog", dog_id, row, parent_id=kennel_id, digest=dog_digest)
+            seen.done(dog_id)
+            metrics.count_rows("dog")
+            self.reused_dogs += 1
+        return todo
 
-def main():
-    kennel_links = collect_all_kennel_links()
+    def report(self) -> str:
+        return (
+            f"Инкрементально: питомников без изменений {self.unchanged}, "
+            f"изменённых/новых {self.changed}, "
+            f"собак перенесено из прошлого обхода {self.reused_dogs}"
+        )
 
-    kennels_rows: list[dict] = []
-    dogs_rows: list[dict] = []
 
+def crawl_sequential(kennel_links: Iterable[str], journal: CrawlJournal,
+                     backend: str = DEFAULT_BACKEND,
+                     incremental: IncrementalPlan | None = None,
+                     seen: SeenIds | None = None) -> None:
+    """
+    Последовательный обход: один запрос за раз.
+    Оставлен как запасной режим (--mode sequential).
+    Каждая готовая собака и питомник сразу пишутся в журнал;
+    уже готовые записи (при --resume) пропускаются.
+    Собака скачивается один раз, даже если она есть у нескольких
+    питомников (seen — общее множество скачанных собак).
+    """
+    if seen is None:
+        seen = seen_dogs_from_journal(journal)
     for idx, kennel_url in enumerate(kennel_links, start=1):
-        print(f"[KENNEL {idx}/{len(kennel_links)}] {kennel_url}")
+        kennel_id = extract_id_from_url(kennel_url)
+        if journal.is_done("kennel", kennel_id):
+            continue
+
+        print(f"[KENNEL {idx}] {kennel_url}")
 
         try:
-            kennel_data, dog_links = parse_kennel(kennel_url)
+            page = fetch_page(kennel_url)
+            kennel_row, dog_links = parse_page_measured("kennel", page, kennel_url,
+                                                        backend=backend)
         except Exception as e:
             print(f"  !! Ошибка при парсинге питомника: {e}")
+            journal.record_error("kennel", kennel_id, str(e))
             continue
 
-        kennels_rows.append(clean_dict(kennel_data))
+        digest = kennel_hash(kennel_row, dog_links)
+        dog_links = claim_kennel_dogs(journal, seen, kennel_id, dog_links)
+        if incremental:
+            dog_links = incremental.dogs_to_fetch(journal, seen, kennel_id, digest, dog_links)
 
         for dog_url in dog_links:
+            dog_id = extract_id_from_url(dog_url)
             print(f"    [DOG] {dog_url}")
             try:
-                dog_data = parse_dog(
-                    dog_url,
-                    kennel_id=kennel_data["kennel_id"],
-                    kennel_name_from_kennel=kennel_data["kennel_name"],
+                dog_row = parse_page_measured(
+                    "dog", fetch_page(dog_url), dog_url,
+                    kennel_id, kennel_row["kennel_name"], backend,
                 )
-                dogs_rows.append(clean_dict(dog_data))
-                time.sleep(0.5)
+                journal.record("dog", dog_id, dog_row, parent_id=kennel_id)
+                seen.done(dog_id)
+                metrics.count_rows("dog")
             except Exception as e:
                 print(f"      !! Ошибка при парсинге собаки: {e}")
+                journal.record_error("dog", dog_id, str(e), parent_id=kennel_id)
+                seen.release(dog_id)
+
+        # Питомник считается готовым, когда обработаны все его собаки
+        journal.record("kennel", kennel_id, kennel_row, digest=digest)
+        metrics.count_rows("kennel")
+
+
+class HostLimiter:
+    """
+    Ограничивает число одновременных запросов к одному хосту.
+    Для каждого хоста заводится свой asyncio.Semaphore.
+    """
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def __call__(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        sem = self._semaphores.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_host)
+            self._semaphores[host] = sem
+        return sem
+
+    async def acquire(self, url: str) -> asyncio.Semaphore:
+        sem = self(url)
+        await sem.acquire()
+        return sem
+
+
+class DiscoveryGate:
+    """
+    Слоты HostLimiter для запросов поиска питомников (страницы списка,
+    перебор ID). Эти запросы идут из своих потоков, а не из цикла событий;
+    пока идёт crawl_async, каждый из них занимает слот своего хоста
+    на время самого запроса — как и запросы стадии скачивания.
+    Вне crawl_async (координатор шардового обхода и т.п.) слоты не нужны.
+    """
+
+    def __init__(self):
+        self._hosts: HostLimiter | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def bind(self, hosts: HostLimiter, loop: asyncio.AbstractEventLoop) -> None:
+        self._hosts, self._loop = hosts, loop
+
+    def unbind(self) -> None:
+        self._hosts = self._loop = None
+
+    @contextlib.contextmanager
+    def slot(self, url: str):
+        hosts, loop = self._hosts, self._loop
+        if hosts is None:
+            yield
+            return
+        sem = asyncio.run_coroutine_threadsafe(hosts.acquire(url), loop).result()
+        try:
+            yield
+        finally:
+            loop.call_soon_threadsafe(sem.release)
+
+
+discovery_gate = DiscoveryGate()
+
+
+def parse_page(kind: str, page: bytes, url: str,
+               kennel_id: str | None = None,
+               kennel_name: str | None = None,
+               backend: str = DEFAULT_BACKEND):
+    """
+    Стадия разбора конвейера: выполняется в пуле процессов,
+    поэтому на вход — только байты страницы и контекст, на выход — готовые строки.
+    """
+    return parse_page_timed(kind, page, url, kennel_id, kennel_name, backend)[0]
+
+
+def parse_page_timed(kind: str, page: bytes, url: str,
+                     kennel_id: str | None = None,
+                     kennel_name: str | None = None,
+                     backend: str = DEFAULT_BACKEND):
+    """
+    То же, что parse_page, плюс длительности стадий {"parse": с, "clean": с}.
+    Метрики процесса-обработчика родителю не видны, поэтому время
+    возвращается вместе с результатом.
+    """
+    t0 = time.perf_counter()
+    if kind == "kennel":
+        raw, dog_links = parse_kennel_html(page, url, backend=backend)
+    else:
+        raw = parse_dog_html(page, url, kennel_id, kennel_name, backend=backend)
+    t1 = time.perf_counter()
+    row = clean_dict(raw)
+    t2 = time.perf_counter()
+
+    result = (row, dog_links) if kind == "kennel" else row
+    return result, {"parse": t1 - t0, "clean": t2 - t1}
+
+
+def parse_page_measured(kind: str, page: bytes, url: str,
+                        kennel_id: str | None = None,
+                        kennel_name: str | None = None,
+                        backend: str = DEFAULT_BACKEND):
+    """parse_page в текущем процессе с учётом времени в metrics."""
+    try:
+        result, timings = parse_page_timed(kind, page, url, kennel_id, kennel_name, backend)
+    except Exception:
+        metrics.count_error("parse")
+        raise
+    record_timings(timings)
+    return result
 
-        time.sleep(0.5)
 
-    output_dir = Path(__file__).resolve().parents[1] / "data"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / "topdog_kennels_and_dogs.xlsx"
+def record_timings(timings: dict) -> None:
+    for stage, seconds in timings.items():
+        metrics.observe(stage, seconds)
 
-    df_kennels = pd.DataFrame(kennels_rows)
-    df_dogs = pd.DataFrame(dogs_rows)
 
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        df_kennels.to_excel(writer, sheet_name="kennels", index=False)
-        df_dogs.to_excel(writer, sheet_name="dogs", index=False)
+# Приоритеты очереди скачивания: сначала собаки уже открытых питомников,
+# потом новые питомники — так число «незакрытых» питомников остаётся небольшим
+DOG_PRIORITY = 0
+KENNEL_PRIORITY = 1
+
+
+def make_executors(parse_workers: int = PARSE_WORKERS) -> tuple[Executor, Executor]:
+    """
+    Пулы для crawl_async: разбор — parse_workers процессов (при 0 — поток)
+    и один поток, который забирает ссылки из ленивого списка питомников.
+    """
+    if parse_workers > 0:
+        parse_executor = ProcessPoolExecutor(max_workers=parse_workers)
+    else:
+        parse_executor = ThreadPoolExecutor(max_workers=1)
+    return parse_executor, ThreadPoolExecutor(max_workers=1)
+
+
+async def crawl_async(kennel_links: Iterable[str], journal: CrawlJournal,
+                      per_host: int = CONCURRENCY_PER_HOST,
+                      parse_workers: int = PARSE_WORKERS,
+                      backend: str = DEFAULT_BACKEND,
+                      incremental: IncrementalPlan | None = None,
+                      seen: SeenIds | None = None,
+                      parse_executor: Executor | None = None,
+                      discovery_executor: Executor | None = None) -> None:
+    """
+    Асинхронный обход питомников и собак в виде конвейера из двух стадий:
+
+      скачивание — per_host потоков, не больше per_host запросов к хосту,
+                   на выходе сырые байты страниц;
+      разбор     — parse_workers процессов (ProcessPoolExecutor),
+                   при parse_workers=0 разбор идёт в потоке.
+
+    Между стадиями — ограниченная очередь: если разбор не успевает,
+    скачивание ждёт. Результаты пишутся в журнал по мере готовности,
+    питомник — после того, как обработаны все его собаки.
+
+    kennel_links может быть ленивым (iter_kennel_links): ссылки забираются
+    из него в отдельном потоке и сразу попадают в очередь скачивания;
+    запросы страниц списка и перебора ID на время самого запроса занимают
+    слот своего хоста (discovery_gate), как и запросы скачивания.
+
+    seen — общее множество собак: каждая скачивается не больше одного раза
+    за обход, повторная встреча у другого питомника даёт только связь
+    в dog_kennels. По умолчанию строится по журналу.
+
+    parse_executor, discovery_executor — готовые пулы (make_executors), если
+    обход запускается много раз подряд, как у воркера шардового обхода:
+    тогда процессы разбора не поднимаются заново на каждый шард.
+    Переданные пулы остаются открытыми, свои закрываются в конце обхода.
+    """
+    if seen is None:
+        seen = seen_dogs_from_journal(journal)
+    loop = asyncio.get_running_loop()
+    hosts = HostLimiter(per_host)
+    fetch_executor = ThreadPoolExecutor(max_workers=per_host)
+    own_executors = parse_executor is None
+    if own_executors:
+        parse_executor, discovery_executor = make_executors(parse_workers)
+
+    fetch_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+    parse_queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, parse_workers * 2))
+    seq = itertools.count()
+    outstanding = 0
+    finished = asyncio.Event()
+
+    # kennel_id -> [строка питомника, сколько собак ещё не обработано, хеш]
+    open_kennels: dict[str, list] = {}
+
+    def submit(priority: int, task: tuple) -> None:
+        nonlocal outstanding
+        outstanding += 1
+        fetch_queue.put_nowait((priority, next(seq), task))
+
+    def task_done() -> None:
+        nonlocal outstanding
+        outstanding -= 1
+        if outstanding == 0:
+            finished.set()
+
+    def dog_finished(kennel_id: str) -> None:
+        state = open_kennels.get(kennel_id)
+        if state is None:
+            # питомник уже закрыт: не удалась запись самого питомника
+            return
+        state[1] -= 1
+        if state[1] == 0:
+            del open_kennels[kennel_id]
+            journal.record("kennel", kennel_id, state[0], digest=state[2])
+            metrics.count_rows("kennel")
+
+    def handle_failure(task: tuple, error: Exception) -> None:
+        kind, url, kennel_id, _ = task
+        if kind == "kennel":
+            print(f"  !! Ошибка при парсинге питомника {url}: {error}")
+            journal.record_error("kennel", kennel_id, str(error))
+        else:
+            print(f"      !! Ошибка при парсинге собаки {url}: {error}")
+            dog_id = extract_id_from_url(url)
+            journal.record_error("dog", dog_id, str(error), parent_id=kennel_id)
+            seen.release(dog_id)
+            dog_finished(kennel_id)
+
+    def handle_result(task: tuple, result) -> None:
+        kind, url, kennel_id, _ = task
+        if kind == "dog":
+            dog_id = extract_id_from_url(url)
+            journal.record("dog", dog_id, result, parent_id=kennel_id)
+            seen.done(dog_id)
+            metrics.count_rows("dog")
+            dog_finished(kennel_id)
+            return
+
+        kennel_row, dog_links = result
+        digest = kennel_hash(kennel_row, dog_links)
+        todo = claim_kennel_dogs(journal, seen, kennel_id, dog_links)
+        if incremental:
+            todo = incremental.dogs_to_fetch(journal, seen, kennel_id, digest, todo)
+        if not todo:
+            journal.record("kennel", kennel_id, kennel_row, digest=digest)
+            metrics.count_rows("kennel")
+            return
+        open_kennels[kennel_id] = [kennel_row, len(todo), digest]
+        for dog_url in todo:
+            submit(DOG_PRIORITY, ("dog", dog_url, kennel_id, kennel_row["kennel_name"]))
+
+    kennels_started = 0
+
+    async def fetcher():
+        nonlocal kennels_started
+        while True:
+            _, _, task = await fetch_queue.get()
+            kind, url = task[0], task[1]
+            if kind == "kennel":
+                kennels_started += 1
+                print(f"[KENNEL {kennels_started}/{kennels_found}] {url}")
+            else:
+                print(f"    [DOG] {url}")
+            try:
+                async with hosts(url):
+                    page = await loop.run_in_executor(fetch_executor, fetch_page, url)
+            except Exception as e:
+                handle_failure(task, e)
+                task_done()
+                continue
+            await parse_queue.put((task, page))
+
+    async def parser():
+        while True:
+            task, page = await parse_queue.get()
+            kind, url, kennel_id, kennel_name = task
+            try:
+                try:
+                    result, timings = await loop.run_in_executor(
+                        parse_executor, parse_page_timed,
+                        kind, page, url, kennel_id, kennel_name, backend,
+                    )
+                except Exception:
+                    metrics.count_error("parse")
+                    raise
+                record_timings(timings)
+                try:
+                    handle_result(task, result)
+                except Exception:
+                    # запись в журнал или подписанную на него выгрузку (база и т.п.)
+                    metrics.count_error("record")
+                    raise
+            except Exception as e:
+                handle_failure(task, e)
+            finally:
+                task_done()
+
+    kennels_found = 0
+
+    async def discover():
+        nonlocal kennels_found
+        links = iter(kennel_links)
+        try:
+            while True:
+                # Пока поток ждёт следующую ссылку, слот хоста не занят:
+                # его берут только сами запросы страниц (discovery_gate)
+                kennel_url = await loop.run_in_executor(
+                    discovery_executor, next, links, None,
+                )
+                if kennel_url is None:
+                    break
+                kennels_found += 1
+                kennel_id = extract_id_from_url(kennel_url)
+                if journal.is_done("kennel", kennel_id):
+                    probed_pages.take(kennel_url)
+                    continue
+                # Перебор ID не уходит далеко вперёд: найденные страницы ждут обхода в памяти
+                while probed_pages.backlog():
+                    await asyncio.sleep(0.05)
+                submit(KENNEL_PRIORITY, ("kennel", kennel_url, kennel_id, None))
+        except Exception as e:
+            print(f"!! Ошибка при сборе ссылок на питомники: {e}")
+        finally:
+            # Поиск ссылок сам считается задачей, пока не закончится
+            task_done()
+
+    outstanding += 1
+    # Скачивание и разбор работают до отмены: сами они завершаются, только
+    # если упали (например, журнал недоступен) — тогда обход завершается
+    # этой ошибкой, а не ждёт задач, которые некому доделать
+    stages = [asyncio.create_task(fetcher()) for _ in range(per_host)]
+    stages += [asyncio.create_task(parser()) for _ in range(max(1, parse_workers))]
+    workers = [asyncio.create_task(discover()), *stages]
+    waiter = asyncio.create_task(finished.wait())
+    discovery_gate.bind(hosts, loop)
+    try:
+        done, _ = await asyncio.wait([waiter, *stages], return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        discovery_gate.unbind()
+        waiter.cancel()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        fetch_executor.shutdown(wait=False)
+        if own_executors:
+            discovery_executor.shutdown(wait=False)
+            parse_executor.shutdown(wait=True)
+
+
+def save_to_excel(journal: CrawlJournal, output_path: Path) -> None:
+    """
+    Итоговый файл строится по журналу обхода.
+    Строки читаются курсором и сразу уходят в write-only книгу,
+    поэтому память не растёт с размером выгрузки.
+    """
+    with StreamingExcelWriter(output_path) as writer:
+        writer.add_sheet("kennels", KENNEL_COLUMNS)
+        writer.add_sheet("dogs", DOG_COLUMNS)
+        writer.add_sheet("dog_kennels", DOG_KENNEL_COLUMNS)
+        writer.write_rows("kennels", journal.rows("kennel"))
+        writer.write_rows("dogs", journal.rows("dog"))
+        writer.write_rows("dog_kennels", journal.rows("dog_kennel"))
+
+
+def dog_bitset_path(journal: CrawlJournal) -> Path:
+    return journal.path.with_name(f"{journal.path.stem}.dogs.bitset")
+
+
+def open_seen_dogs(journal: CrawlJournal, resume: bool) -> SeenIds:
+    """
+    Множество скачанных собак в файле рядом с журналом (mmap).
+    Новый обход начинает с пустого файла; при --resume файл открывается
+    как есть и сверяется с журналом — если обход упал между записью
+    в журнал и в файл, множество пересобирается по журналу.
+    """
+    bitset = IdBitset(dog_bitset_path(journal), reset=not resume)
+    seen = SeenIds(bitset)
+    done = journal.done_ids("dog")
+    if len(seen) != len(done):
+        if len(seen):
+            print("Файл собак не совпадает с журналом — пересобираем по журналу")
+        bitset.close()
+        seen = SeenIds(IdBitset(dog_bitset_path(journal), reset=True))
+        seen.mark_done(done)
+    return seen
+
+
+def open_parquet(directory: Path, journal: CrawlJournal) -> StreamingParquetWriter:
+    """
+    Parquet-выгрузка, которая пишется по ходу обхода: каждая готовая
+    запись журнала сразу попадает в буфер своей таблицы.
+    При --resume уже готовые записи журнала переносятся в начало файлов.
+    """
+    writer = StreamingParquetWriter(directory)
+    for table, columns in EXPORT_TABLES.values():
+        writer.add_table(table, columns, ints=INT_COLUMNS, dictionary=PARQUET_DICTIONARY)
+
+    def on_record(kind, item_id, data, parent_id):
+        if kind in EXPORT_TABLES:
+            writer.append(EXPORT_TABLES[kind][0], data)
+
+    journal.add_listener(on_record, replay_kinds=EXPORT_TABLES)
+    return writer
+
+
+def open_db(path: Path, journal: CrawlJournal) -> SqliteSink:
+    """
+    База, которая пополняется по ходу обхода: готовые записи журнала
+    уходят в фоновый поток-писатель и upsert'ами ложатся в таблицы.
+    База переживает обходы — повторный обход обновляет строки.
+    """
+    sink = SqliteSink(path, DB_TABLES)
+
+    def on_record(kind, item_id, data, parent_id):
+        if kind in EXPORT_TABLES:
+            sink.upsert(EXPORT_TABLES[kind][0], data)
+
+    journal.add_listener(on_record, replay_kinds=EXPORT_TABLES)
+    return sink
+
+
+def worker_journal_path(queue_path: Path, worker: str) -> Path:
+    """Журнал воркера шардового обхода — рядом с файлом очереди."""
+    return queue_path.with_name(f"{queue_path.stem}.{worker}.journal.sqlite")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Парсер питомников и собак top-dog.pro")
+    parser.add_argument(
+        "--mode", choices=("async", "sequential"), default="async",
+        help="async — параллельный обход, sequential — по одному запросу (запасной режим)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=CONCURRENCY_PER_HOST,
+        help="сколько запросов к одному хосту может выполняться одновременно",
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=PARSE_WORKERS,
+        help="число процессов для разбора HTML (0 — разбирать в потоке)",
+    )
+    parser.add_argument(
+        "--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+        help="чем разбирать страницы: bs4 (BeautifulSoup) или lxml (быстрее)",
+    )
+    parser.add_argument(
+        "--rps", type=float, default=REQUESTS_PER_SECOND,
+        help="средний лимит запросов в секунду (0 — без ограничения)",
+    )
+    parser.add_argument(
+        "--burst", type=int, default=RATE_BURST,
+        help="сколько запросов можно сделать подряд без ожидания",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=RETRIES,
+        help="сколько раз повторять запрос при 5xx/429/таймауте (0 — не повторять)",
+    )
+    parser.add_argument(
+        "--backoff", type=float, default=RETRY_BACKOFF,
+        help="пауза перед первым повтором, секунды (дальше удваивается)",
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+        help="каталог дискового кэша страниц",
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, default=DEFAULT_TTL,
+        help="сколько секунд страница из кэша считается свежей (0 — всегда перепроверять)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="не использовать кэш, всегда скачивать страницы заново",
+    )
+    parser.add_argument(
+        "--journal", type=Path, default=None,
+        help="файл журнала обхода (SQLite); по умолчанию data/topdog_journal.sqlite, "
+             "у воркера — рядом с очередью",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="продолжить прерванный обход: пропустить то, что уже есть в журнале",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="не перекачивать собак питомников, не изменившихся с прошлого полного обхода",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=DATA_DIR / "topdog_kennels_and_dogs.xlsx",
+        help="куда сохранить итоговый Excel",
+    )
+    parser.add_argument(
+        "--parquet-dir", type=Path, default=None,
+        help="писать ещё и kennels/dogs/dog_kennels.parquet в этот каталог (нужен pyarrow)",
+    )
+    parser.add_argument(
+        "--db", type=Path, default=None,
+        help="пополнять по ходу обхода базу SQLite (kennels, dogs, dog_kennels)",
+    )
+    parser.add_argument(
+        "--pedigree", type=Path, default=None,
+        help="после обхода сохранить родословный граф собак в этот .npz (см. pedigree.py)",
+    )
+    parser.add_argument(
+        "--photos-dir", type=Path, default=None,
+        help="скачивать по ходу обхода фото питомников и собак в этот каталог "
+             "(файлы по sha256 содержимого, одинаковые хранятся один раз)",
+    )
+    parser.add_argument(
+        "--photo-workers", type=int, default=DEFAULT_PHOTO_WORKERS,
+        help="сколько фото скачивать одновременно",
+    )
+    parser.add_argument(
+        "--photo-rps", type=float, default=DEFAULT_PHOTO_RPS,
+        help="лимит запросов за фото в секунду, отдельный от --rps (0 — без ограничения)",
+    )
+    parser.add_argument(
+        "--metrics-dir", type=Path, default=DATA_DIR / "metrics",
+        help="куда писать topdog_metrics.json и topdog_metrics.prom",
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=30,
+        help="раз во сколько секунд обновлять файлы метрик во время обхода (0 — только в конце)",
+    )
+    parser.add_argument(
+        "--no-metrics", action="store_true",
+        help="не писать файлы метрик",
+    )
+    parser.add_argument(
+        "--base-url", default=BASE_URL,
+        help="адрес сайта, например http://127.0.0.1:8765 для replay_server.py",
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=None,
+        help="ограничить число страниц списка питомников",
+    )
+    parser.add_argument(
+        "--listing-concurrency", type=int, default=DEFAULT_LISTING_CONCURRENCY,
+        help="сколько страниц списка питомников скачивать одновременно",
+    )
+    add_probe_arguments(parser, DATA_DIR / "topdog_id_gaps.json")
+    parser.add_argument(
+        "--queue", type=Path, default=None,
+        help="работать воркером шардового обхода: брать питомники из этой очереди "
+             "(её наполняет shard_crawl.py)",
+    )
+    parser.add_argument(
+        "--worker-id", default=f"{socket.gethostname()}-{os.getpid()}",
+        help="имя воркера в очереди",
+    )
+    parser.add_argument(
+        "--lease", type=float, default=DEFAULT_LEASE,
+        help="на сколько секунд воркер берёт шард; не продлённый вовремя шард отдаётся другому",
+    )
+    args = parser.parse_args(argv)
+    if args.journal is None:
+        args.journal = (
+            worker_journal_path(args.queue, args.worker_id) if args.queue
+            else DATA_DIR / "topdog_journal.sqlite"
+        )
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.parquet_dir and not parquet_available():
+        raise SystemExit("Для --parquet-dir нужен pyarrow: pip install pyarrow")
+    if args.queue and args.parquet_dir:
+        raise SystemExit("Воркер пишет только журнал; Parquet собирает shard_crawl.py merge --parquet-dir")
+    if args.queue and args.pedigree:
+        raise SystemExit("Воркер пишет только журнал; граф строится по общему журналу: "
+                         "pedigree.py --journal <очередь>.merged.sqlite")
+    limiter.configure(args.rps, args.burst)
+    # соединения: потоки скачивания, страницы списка или проверки ID при переборе
+    discovery = args.probe_concurrency if args.discovery == "ids" else args.listing_concurrency
+    client.configure(pool_size=args.concurrency + discovery,
+                     retries=args.retries, backoff=args.backoff)
+    cache.configure(args.cache_dir, args.cache_ttl, enabled=not args.no_cache)
+    labels = {"mode": args.mode, "backend": args.backend}
+    if args.queue:
+        labels["worker"] = args.worker_id
+    metrics.configure(
+        None if args.no_metrics else args.metrics_dir,
+        name="topdog",
+        interval=args.metrics_interval,
+        labels=labels,
+        # у каждого воркера шардового обхода свои файлы метрик
+        file_name=f"topdog.{args.worker_id}" if args.queue else None,
+    )
+    metrics.start()
+
+    journal = CrawlJournal(args.journal, resume=args.resume)
+    if args.resume:
+        print(
+            f"Продолжаем обход: уже готово питомников {journal.done_count('kennel')}, "
+            f"собак {journal.done_count('dog')}\n"
+        )
+    seen = open_seen_dogs(journal, args.resume)
+    parquet = open_parquet(args.parquet_dir, journal) if args.parquet_dir else None
+    db = open_db(args.db, journal) if args.db else None
+    photos = None
+    if args.photos_dir:
+        # Фото качаются в своих потоках, обход страниц их не ждёт
+        # и со своим клиентом и бюджетом запросов (--photo-rps), не из бюджета страниц
+        photos = PhotoStore(
+            args.photos_dir,
+            photo_client(HEADERS, args.photo_rps, args.photo_workers, args.retries,
+                         args.backoff, on_retry=lambda *_: metrics.count_retry()),
+            workers=args.photo_workers, metrics=metrics,
+        )
+        attach(photos, journal, ("kennel", "dog"))
+
+    incremental = None
+    if args.incremental:
+        if journal.previous_path.exists():
+            incremental = IncrementalPlan(JournalBaseline(journal.previous_path))
+            print(f"Инкрементальный обход относительно {journal.previous_path}\n")
+        else:
+            print("Прошлого полного обхода нет — обходим всё заново\n")
+
+    base_url = args.base_url.rstrip("/")
+
+    # Пулы разбора живут весь запуск: воркер шардового обхода вызывает
+    # crawl на каждый шард, и процессы не должны подниматься каждый раз заново
+    executors = make_executors(args.parse_workers) if args.mode == "async" else None
+
+    def crawl(kennel_links):
+        if args.mode == "sequential":
+            crawl_sequential(kennel_links, journal, backend=args.backend,
+                             incremental=incremental, seen=seen)
+        else:
+            parse_executor, discovery_executor = executors
+            asyncio.run(crawl_async(
+                kennel_links, journal,
+                per_host=args.concurrency,
+                parse_workers=args.parse_workers,
+                backend=args.backend,
+                incremental=incremental,
+                seen=seen,
+                parse_executor=parse_executor,
+                discovery_executor=discovery_executor,
+            ))
+
+    queue = None
+    if args.queue:
+        queue = WorkQueue(args.queue, lease=args.lease)
+        queue.register_worker(args.worker_id, args.journal)
+        print(f"Воркер {args.worker_id}: очередь {args.queue}, журнал {args.journal}\n")
+
+    probe = None
+    if not queue and args.discovery == "ids":
+        # Питомники ищутся перебором /kennels/{id} параллельно, а не по страницам списка
+        probe = probe_from_args(args, kennel_exists, base_url + "/kennels/{id}", "kennel")
+        # место с запасом на проверки в полёте, иначе обход ждал бы перебор вечно
+        probed_pages.configure(max(DEFAULT_PROBED_PAGES, 4 * args.probe_concurrency))
+
+    try:
+        if queue:
+            # Питомники раздаёт координатор (shard_crawl.py) шардами,
+            # выгрузку он же собирает из журналов воркеров
+            shards = queue.consume(args.worker_id, crawl)
+        else:
+            # Ссылки отдаются лениво: питомники обходятся, пока идёт поиск
+            crawl(iter(probe) if probe else
+                  iter_kennel_links(max_pages=args.max_pages, base_url=base_url,
+                                    concurrency=args.listing_concurrency))
+            with metrics.timer("export"):
+                save_to_excel(journal, args.output)
+                if parquet:
+                    parquet.close()
+                if args.pedigree:
+                    pedigree = PedigreeGraph.from_rows(journal.rows("dog"))
+                    pedigree.save(args.pedigree)
+        journal.mark_finished()
+    finally:
+        # База пишется и при прерванном обходе — всё, что успели собрать
+        if db:
+            db.close()
+        if photos:
+            photos.close()
+            photos.client.close()
+        journal.close()
+        seen.close()
+        metrics.stop()
+        if incremental:
+            incremental.baseline.close()
+        if queue:
+            queue.close()
+        if executors:
+            for executor in executors:
+                executor.shutdown(wait=True)
 
-    print(f"\nГотово! Файл сохранён: {output_path}")
+    if queue:
+        print(f"\nВоркер {args.worker_id}: обработано шардов {shards}, журнал {args.journal}")
+    else:
+        print(f"\nГотово! Файл сохранён: {args.output}")
+    if parquet:
+        print(f"Parquet: {args.parquet_dir}")
+    if db:
+        print(f"База: {args.db} (строк записано {db.rows_written})")
+    if photos:
+        print(photos.report())
+    if args.pedigree:
+        print(f"{pedigree.report()}; граф: {args.pedigree}")
+    print(f"Собак {len(seen)}, повторных встреч у других питомников: {seen.duplicates}")
+    if incremental:
+        print(incremental.report())
+    if probe:
+        print(probe.report())
+    print(cache.report())
+    print(metrics.report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,282 @@
+"""
+Фотографии питомников и собак (кошек) на диске, по содержимому.
+
+Файл называется sha256 своего содержимого: <каталог>/ab/ab12...ef.jpg,
+поэтому одна и та же картинка у нескольких записей (общая заглушка,
+фото собаки на страницах двух питомников) хранится один раз.
+Какой ссылке какой файл соответствует — в индексе <каталог>/photos.sqlite.
+
+Скачивание идёт в фоновых потоках: submit() только ставит ссылку
+в очередь, обход страниц не ждёт картинок. У фото свой клиент
+(photo_client) со своим бюджетом запросов, поэтому картинки не
+отнимают бюджет у страниц: к сайту в сумме уходит до --rps
+страниц и --photo-rps картинок в секунду. Файл пишется кусками
+по мере прихода (stream=True) во временный файл с подсчётом хеша
+и переименовывается в конце — целиком в памяти он не держится,
+а оборванная загрузка не оставляет полфайла. Ссылка, которая уже
+есть в индексе и чей файл на месте, повторно не скачивается.
+
+Докачать фото по журналу уже сделанного обхода:
+
+    python photo_store.py ../data/photos --journal ../data/topdog_journal.sqlite
+"""
+import argparse
+import hashlib
+import mimetypes
+import os
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from http_client import DEFAULT_BACKOFF, DEFAULT_RETRIES, HttpClient
+from rate_limit import TokenBucket
+
+DEFAULT_PHOTO_WORKERS = 4
+# Бюджет запросов за фото, отдельный от бюджета страниц (--photo-rps)
+DEFAULT_PHOTO_RPS = 2.0
+CHUNK_SIZE = 64 * 1024
+
+# расширения, которые можно взять из ссылки как есть
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".svg")
+
+
+def photo_extension(url: str, content_type: str | None) -> str:
+    """Расширение файла: из ссылки, иначе по Content-Type, иначе пустое."""
+    suffix = Path(urlparse(url).path).suffix.lower()
+    if suffix in IMAGE_EXTENSIONS:
+        return suffix
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if guessed:
+            return ".jpg" if guessed == ".jpe" else guessed
+    return ""
+
+
+class PhotoStore:
+    """
+    Хранилище фото с фоновым скачиванием.
+
+        store = PhotoStore(DATA_DIR / "photos", client, workers=4)
+        store.submit(row["photo_url"])   # не ждёт загрузки
+        ...
+        store.close()                    # дожидается очереди
+        print(store.report())
+
+    client — HttpClient для фото (photo_client): его limiter и повторы.
+    Счётчики: downloaded — новые файлы, shared — скачанная картинка уже
+    лежала под тем же хешем, skipped — ссылка уже в индексе, failed — ошибки.
+    """
+
+    def __init__(self, root: Path, client, workers: int = DEFAULT_PHOTO_WORKERS,
+                 metrics=None, timeout: float = 30):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.client = client
+        self.metrics = metrics
+        self.timeout = timeout
+        self.downloaded = 0
+        self.shared = 0
+        self.skipped = 0
+        self.failed: list[tuple[str, str]] = []
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self._submitted: set[str] = set()
+        self._queue: queue.Queue = queue.Queue()
+
+        # timeout: в один каталог могут писать несколько воркеров шардового обхода
+        self.conn = sqlite3.connect(self.root / "photos.sqlite", timeout=30,
+                                    check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS photos ("
+            " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, ext TEXT NOT NULL,"
+            " size INTEGER NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS photos_sha256 ON photos (sha256)")
+        self.conn.commit()
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"photos-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # ---------- пути и индекс ----------
+
+    def path_for_hash(self, sha256: str, ext: str = "") -> Path:
+        return self.root / sha256[:2] / f"{sha256}{ext}"
+
+    def lookup(self, url: str) -> Path | None:
+        """Файл, скачанный по ссылке, или None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sha256, ext FROM photos WHERE url = ?", (url,)
+            ).fetchone()
+        return self.path_for_hash(*row) if row else None
+
+    def _remember(self, url: str, sha256: str, ext: str, size: int) -> None:
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO photos (url, sha256, ext, size, fetched_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET sha256 = excluded.sha256, "
+                    "ext = excluded.ext, size = excluded.size, fetched_at = excluded.fetched_at",
+                    (url, sha256, ext, size, time.time()),
+                )
+
+    # ---------- очередь ----------
+
+    def submit(self, url: str | None) -> None:
+        """Поставить фото в очередь; пустые и уже поставленные ссылки пропускаются."""
+        if not url:
+            return
+        with self._lock:
+            if url in self._submitted:
+                return
+            self._submitted.add(url)
+        self._queue.put(url)
+
+    def close(self) -> None:
+        """Дождаться всех поставленных фото и закрыть индекс."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self.conn.close()
+
+    def _run(self) -> None:
+        while True:
+            url = self._queue.get()
+            if url is None:
+                break
+            try:
+                self.fetch(url)
+            except Exception as e:
+                with self._lock:
+                    self.failed.append((url, str(e)))
+                if self.metrics is not None:
+                    self.metrics.count_error("photo")
+
+    # ---------- скачивание ----------
+
+    def fetch(self, url: str) -> Path:
+        """Скачивает фото (если его ещё нет) и возвращает путь к файлу."""
+        known = self.lookup(url)
+        if known is not None and known.exists():
+            with self._lock:
+                self.skipped += 1
+            return known
+
+        t0 = time.perf_counter()
+        resp = self.client.get(url, stream=True, timeout=self.timeout)
+        tmp = self.root / f".{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            resp.raise_for_status()
+            digest = hashlib.sha256()
+            size = 0
+            with open(tmp, "wb") as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            ext = photo_extension(url, resp.headers.get("Content-Type"))
+            sha256 = digest.hexdigest()
+            path = self.path_for_hash(sha256, ext)
+            if path.exists():
+                tmp.unlink()
+                new = False
+            else:
+                path.parent.mkdir(exist_ok=True)
+                os.replace(tmp, path)
+                new = True
+        finally:
+            resp.close()
+            if tmp.exists():
+                tmp.unlink()
+
+        self._remember(url, sha256, ext, size)
+        with self._lock:
+            if new:
+                self.downloaded += 1
+                self.bytes_written += size
+            else:
+                self.shared += 1
+        if self.metrics is not None:
+            self.metrics.observe("photo", time.perf_counter() - t0)
+            self.metrics.count_response(resp.status_code, size)
+            if new:
+                self.metrics.count_rows("photo")
+        return path
+
+    def report(self) -> str:
+        return (
+            f"Фото: скачано новых {self.downloaded} ({self.bytes_written / 1024 / 1024:.1f} МБ), "
+            f"совпали с уже сохранёнными {self.shared}, уже были {self.skipped}, "
+            f"ошибок {len(self.failed)}"
+        )
+
+
+def photo_client(headers: dict | None = None, rps: float = DEFAULT_PHOTO_RPS,
+                 workers: int = DEFAULT_PHOTO_WORKERS, retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF, on_retry=None) -> HttpClient:
+    """
+    Клиент для PhotoStore: свой пул соединений и свой TokenBucket на rps
+    (0 — без ограничения), подряд без ожидания — по запросу на поток.
+    """
+    limiter = TokenBucket(rps, max(1, workers))
+    return HttpClient(headers, pool_size=workers, retries=retries, backoff=backoff,
+                      before_request=limiter.acquire, on_retry=on_retry)
+
+
+def attach(store: PhotoStore, journal, kinds, base_url: str | None = None) -> None:
+    """
+    Ставит в очередь фото каждой готовой записи журнала видов kinds
+    (при --resume — и записей, готовых раньше). Относительные ссылки
+    достраиваются от base_url.
+    """
+    def on_record(kind, item_id, data, parent_id):
+        url = data.get("photo_url")
+        if kind in kinds and url:
+            store.submit(urljoin(base_url, url) if base_url else url)
+
+    journal.add_listener(on_record, replay_kinds=kinds)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Докачать фото по журналу обхода")
+    parser.add_argument("root", type=Path, help="каталог хранилища фото")
+    parser.add_argument("--journal", type=Path, required=True, help="журнал обхода (SQLite)")
+    parser.add_argument("--kinds", default="kennel,dog,cat",
+                        help="виды записей, чьи photo_url скачивать")
+    parser.add_argument("--workers", type=int, default=DEFAULT_PHOTO_WORKERS,
+                        help="сколько фото скачивать одновременно")
+    parser.add_argument("--rps", type=float, default=DEFAULT_PHOTO_RPS,
+                        help="лимит запросов в секунду (0 — без ограничения)")
+    parser.add_argument("--base-url", default=None,
+                        help="адрес сайта для относительных ссылок на фото")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from crawl_journal import CrawlJournal
+
+    args = parse_args(argv)
+    client = photo_client(rps=args.rps, workers=args.workers)
+    store = PhotoStore(args.root, client, workers=args.workers)
+    journal = CrawlJournal(args.journal, resume=True)
+    try:
+        attach(store, journal, [k.strip() for k in args.kinds.split(",") if k.strip()],
+               base_url=args.base_url)
+    finally:
+        journal.close()
+        store.close()
+        client.close()
+    print(store.report())
+
+
+if __name__ == "__main__":
+    main()
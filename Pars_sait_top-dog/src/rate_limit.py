@@ -0,0 +1,54 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов по схеме «ведро с токенами».
+
+    rate  — средняя скорость, запросов в секунду (0 или меньше — без ограничения);
+    burst — сколько запросов можно сделать подряд без ожидания.
+
+    Один экземпляр можно делить между потоками: каждый вызов acquire()
+    резервирует себе слот под блокировкой, а спит уже вне её.
+    Спим только тогда, когда действительно опережаем бюджет.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: int = 1) -> None:
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = float(self.burst)
+            self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Забирает один токен и возвращает, сколько секунд нужно подождать
+        перед запросом (0, если бюджет ещё есть).
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        Блокирующий вариант для потоков: ждёт своей очереди.
+        Возвращает фактическое время ожидания.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,467 @@
+"""
+Локальный стенд, изображающий top-dog и top-cat, — для нагрузочных
+прогонов парсеров без обращения к настоящим сайтам.
+
+Отдаёт синтетический каталог, собранный из сохранённых страниц:
+  /kennels?page=N        — список питомников (ссылки /kennels/{id});
+  /kennels/{id}          — страница питомника со ссылками на его собак;
+  /dogs/{id}             — dump.html (кличка заменяется на «Dog {id}»);
+  /catteries?page=N      — список кошачьих питомников;
+  /catteries/{id}        — dump_cattery.html;
+  /pets.json?cattery_id= — питомцы питомника в формате, который понимает topcat_pets;
+  /cats/{id}             — dump_cat.html;
+  /__stats               — счётчики стенда (JSON).
+
+Размер каталога, удалённые записи (диапазоны ID питомников с ответом 404,
+которых нет и в списках), распределение задержки и доля ответов 429/500
+настраиваются; страницы списков по умолчанию ошибок не получают
+(иначе пагинация обрывается, и замер теряет смысл).
+
+    python replay_server.py --kennels 500 --latency-ms 80 --latency-dist lognormal
+    python parse_all.py --base-url http://127.0.0.1:8765 --no-cache --rps 0
+"""
+import argparse
+import functools
+import hashlib
+import json
+import math
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+HERE = Path(__file__).resolve().parent
+
+DUMP_DOG = (HERE / "dump.html").read_bytes()
+DUMP_CAT = (HERE / "dump_cat.html").read_bytes()
+DUMP_CATTERY = (HERE / "dump_cattery.html").read_bytes()
+DOG_NAME_IN_DUMP = "Triplemoon Absolute Storm".encode("utf-8")
+DOG_PHOTO_IN_DUMP = (
+    b"https://s3.webestudio.ru/topdog/dog_images/ab1c09e2a4445938/"
+    b"4631240564eda34b/ab1c09e2a44459384631240564eda34b.jpg"
+)
+
+LATENCY_DISTS = ("fixed", "uniform", "lognormal")
+
+KENNEL_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Kennel {kid}</title></head><body>
+<div class="kennel-name"><h1>Kennel {kid}</h1></div>
+<div class="kennel-info">
+  <div class="photo"><img src="/images/kennels/{kid}.jpg"></div>
+  <div class="city">Москва, Россия</div>
+</div>
+<div class="details-container"><dl>
+  <dt>Заводчик:</dt><dd><a href="/users/{kid}">Заводчик {kid}</a></dd>
+  <dt>Породы:</dt><dd>Австралийская овчарка</dd>
+  <dt>Заводская приставка:</dt><dd>Kennel{kid}</dd>
+  <dt>Эл. почта:</dt><dd>kennel{kid}@example.com</dd>
+  <dt>Телефон:</dt><dd>+7 (900) 000-{kid:04d}</dd>
+</dl></div>
+<div class="dogs-grid">
+{dogs}
+</div>
+</body></html>
+"""
+
+DOG_ITEM = (
+    '<div class="dogs-grid-item"><div class="dog-name">'
+    '<a href="/dogs/{did}">Dog {did}</a></div></div>'
+)
+
+LISTING_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head><body>
+<div class="list">
+{items}
+</div>
+{pager}
+</body></html>
+"""
+
+
+class ReplayConfig:
+    """
+    Параметры стенда: размер каталога, задержка и ошибки.
+
+    latency_ms   — медиана задержки ответа;
+    latency_dist — fixed (ровно latency_ms), uniform (0..2*latency_ms)
+                   или lognormal (медиана latency_ms, хвост задаёт latency_sigma);
+    error_rate   — доля ответов 500, rate_limit_rate — доля ответов 429
+                   (с Retry-After: retry_after секунд);
+    missing_ids  — диапазоны (первый, последний) ID питомников и кошачьих
+                   питомников, которых «удалили»: 404 и нет в списках;
+    pagination   — добавлять на страницы списков блок пагинации
+                   (первая, соседние и последняя страницы);
+    photo_variants, photo_kb — фото питомников и собак (/images/...) —
+                   это photo_variants разных картинок по photo_kb КБ,
+                   поэтому одна картинка встречается у многих записей;
+    shared_dogs  — {ID питомника: [ID собак]}: чужие собаки, которые
+                   показаны ещё и у этого питомника (как на сайте, где
+                   собака бывает у нескольких питомников).
+    """
+
+    def __init__(self, kennels: int = 100, dogs_per_kennel: int = 10,
+                 catteries: int = 100, cats_per_cattery: int = 10,
+                 page_size: int = 20,
+                 latency_ms: float = 50.0, latency_dist: str = "fixed",
+                 latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 retry_after: int = 1, errors_on_listing: bool = False,
+                 missing_ids=(), pagination: bool = False,
+                 photo_variants: int = 10, photo_kb: int = 32, seed: int | None = None,
+                 shared_dogs: dict[int, list[int]] | None = None):
+        if latency_dist not in LATENCY_DISTS:
+            raise ValueError(f"неизвестное распределение задержки: {latency_dist}")
+        self.kennels = kennels
+        self.dogs_per_kennel = dogs_per_kennel
+        self.catteries = catteries
+        self.cats_per_cattery = cats_per_cattery
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.errors_on_listing = errors_on_listing
+        self.missing_ids = [tuple(r) for r in missing_ids]
+        self.pagination = pagination
+        self.photo_variants = max(1, photo_variants)
+        self.photo_kb = photo_kb
+        self.seed = seed
+        self.shared_dogs = dict(shared_dogs or {})
+
+    def is_missing(self, item: int) -> bool:
+        return any(first <= item <= last for first, last in self.missing_ids)
+
+    def existing_ids(self, total: int) -> list[int]:
+        return [i for i in range(1, total + 1) if not self.is_missing(i)]
+
+    @property
+    def total_pages(self) -> int:
+        """Сколько страниц (без списков) полный обход обоих сайтов должен скачать."""
+        return (
+            len(self.existing_ids(self.kennels)) * (1 + self.dogs_per_kennel)
+            + len(self.existing_ids(self.catteries)) * 2  # страница питомника + pets.json
+        )
+
+
+class ReplayStats:
+    """Потокобезопасные счётчики стенда."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.by_kind: dict[str, int] = {}
+        self.by_status: dict[str, int] = {}
+        self.started_at = time.time()
+
+    def add(self, kind: str, status: int, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+            self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_sent": self.bytes_sent,
+                "by_kind": dict(self.by_kind),
+                "by_status": dict(self.by_status),
+                "uptime": round(time.time() - self.started_at, 3),
+            }
+
+
+def _ids_on_page(page: int, page_size: int, ids: list[int]) -> list[int]:
+    start = max(page - 1, 0) * page_size
+    return ids[start:start + page_size]
+
+
+def pager(kind: str, page: int, last: int) -> str:
+    """Блок пагинации как на сайтах: первая, соседние и последняя страницы."""
+    shown = sorted({p for p in (1, page - 1, page + 1, last) if 1 <= p <= last and p != page})
+    links = " ".join(f'<a href="/{kind}?page={p}">{p}</a>' for p in shown)
+    return f'<div class="pagination">{links}</div>'
+
+
+def listing_page(kind: str, page: int, page_size: int, ids: list[int],
+                 pagination: bool = False) -> bytes:
+    items = "\n".join(
+        f'<div class="item"><a href="/{kind}/{i}">{kind} {i}</a></div>'
+        for i in _ids_on_page(page, page_size, ids)
+    )
+    last = max(1, -(-len(ids) // page_size))
+    return LISTING_TEMPLATE.format(
+        title=f"{kind} page {page}", items=items,
+        pager=pager(kind, page, last) if pagination else "",
+    ).encode("utf-8")
+
+
+def kennel_page(kid: int, dogs_per_kennel: int, shared=()) -> bytes:
+    first = (kid - 1) * dogs_per_kennel + 1
+    dog_ids = [*range(first, first + dogs_per_kennel), *shared]
+    dogs = "\n".join(DOG_ITEM.format(did=did) for did in dog_ids)
+    return KENNEL_TEMPLATE.format(kid=kid, dogs=dogs).encode("utf-8")
+
+
+def dog_page(did: int) -> bytes:
+    return (DUMP_DOG.replace(DOG_NAME_IN_DUMP, f"Dog {did}".encode("utf-8"))
+            .replace(DOG_PHOTO_IN_DUMP, f"/images/dogs/{did}.jpg".encode("utf-8")))
+
+
+@functools.lru_cache(maxsize=None)
+def photo(variant: int, size_kb: int) -> bytes:
+    """Картинка-заглушка: заголовок JPEG и неповторяющиеся байты варианта."""
+    block = hashlib.sha256(f"photo {variant}".encode("utf-8")).digest()
+    body = b"".join(hashlib.sha256(block + i.to_bytes(4, "big")).digest()
+                    for i in range(size_kb * 1024 // len(block)))
+    return b"\xff\xd8\xff\xe0" + body
+
+
+def pets_json(cattery_id: int, cats_per_cattery: int) -> bytes:
+    first = (cattery_id - 1) * cats_per_cattery + 1
+    pets = [
+        {
+            "id": cid,
+            "name": f"Cat {cid}",
+            "gender": "Кошка" if cid % 2 else "Кот",
+            "color": "n (aby)",
+            "birthday": "19 января 2025",
+            "father": {"id": cid * 2, "name": f"Sire {cid}"},
+            "mother": {"id": cid * 2 + 1, "name": f"Dam {cid}"},
+            "url": f"/cats/{cid}",
+        }
+        for cid in range(first, first + cats_per_cattery)
+    ]
+    return json.dumps(pets, ensure_ascii=False).encode("utf-8")
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: ReplayConfig):
+        super().__init__(address, ReplayHandler)
+        self.config = config
+        self.stats = ReplayStats()
+        self._random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+        # ID в списках: без удалённых записей
+        self.listed = {
+            "kennels": config.existing_ids(config.kennels),
+            "catteries": config.existing_ids(config.catteries),
+        }
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def random(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def latency(self) -> float:
+        """Задержка очередного ответа в секундах."""
+        cfg = self.config
+        if cfg.latency_ms <= 0:
+            return 0.0
+        with self._random_lock:
+            if cfg.latency_dist == "uniform":
+                ms = self._random.uniform(0, 2 * cfg.latency_ms)
+            elif cfg.latency_dist == "lognormal":
+                ms = self._random.lognormvariate(math.log(cfg.latency_ms), cfg.latency_sigma)
+            else:
+                ms = cfg.latency_ms
+        return ms / 1000
+
+    def start_in_thread(self) -> str:
+        threading.Thread(target=self.serve_forever, name="replay-server", daemon=True).start()
+        return self.base_url
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # keep-alive, как у настоящего сайта: иначе пул соединений клиента не виден
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def setup(self):
+        super().setup()
+        # Заголовки и тело уходят отдельными записями; без TCP_NODELAY на
+        # keep-alive соединении вторая ждёт delayed ACK клиента (~40 мс)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _route(self, path: str, query: dict) -> tuple[str, bytes | None, str]:
+        """(вид запроса, тело или None для 404, Content-Type)."""
+        cfg = self.server.config
+        parts = path.strip("/").split("/")
+        html = "text/html; charset=utf-8"
+
+        def number(value: str) -> int | None:
+            return int(value) if value.isdigit() else None
+
+        if parts == ["kennels"] or parts == ["catteries"]:
+            page = number(query.get("page", ["1"])[0]) or 1
+            ids = self.server.listed[parts[0]]
+            return "listing", listing_page(parts[0], page, cfg.page_size, ids, cfg.pagination), html
+
+        if parts == ["pets.json"]:
+            cid = number(query.get("cattery_id", [""])[0])
+            if cid is None or not 1 <= cid <= cfg.catteries or cfg.is_missing(cid):
+                return "pets", None, html
+            return "pets", pets_json(cid, cfg.cats_per_cattery), "application/json"
+
+        if len(parts) == 3 and parts[0] == "images" and parts[2].endswith(".jpg"):
+            item = number(parts[2][:-len(".jpg")])
+            limit = {"kennels": cfg.kennels, "dogs": cfg.kennels * cfg.dogs_per_kennel}.get(parts[1])
+            if item is None or limit is None or not 1 <= item <= limit:
+                return "image", None, html
+            return "image", photo((item - 1) % cfg.photo_variants, cfg.photo_kb), "image/jpeg"
+
+        if len(parts) == 2 and number(parts[1]) is not None:
+            kind, item = parts[0], int(parts[1])
+            if kind in ("kennels", "catteries") and cfg.is_missing(item):
+                return {"kennels": "kennel", "catteries": "cattery"}[kind], None, html
+            if kind == "kennels" and 1 <= item <= cfg.kennels:
+                return "kennel", kennel_page(
+                    item, cfg.dogs_per_kennel, cfg.shared_dogs.get(item, ())), html
+            if kind == "dogs" and 1 <= item <= cfg.kennels * cfg.dogs_per_kennel:
+                return "dog", dog_page(item), html
+            if kind == "catteries" and 1 <= item <= cfg.catteries:
+                return "cattery", DUMP_CATTERY, html
+            if kind == "cats" and 1 <= item <= cfg.catteries * cfg.cats_per_cattery:
+                return "cat", DUMP_CAT, html
+
+        return "other", None, html
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            self._send(200, json.dumps(self.server.stats.snapshot()).encode(), "application/json")
+            return
+
+        cfg = self.server.config
+        kind, body, content_type = self._route(url.path, parse_qs(url.query))
+        time.sleep(self.server.latency())
+
+        status, headers = 200, {}
+        if body is None:
+            status = 404
+        elif kind != "listing" or cfg.errors_on_listing:
+            roll = self.server.random()
+            if roll < cfg.rate_limit_rate:
+                status, headers = 429, {"Retry-After": str(cfg.retry_after)}
+            elif roll < cfg.rate_limit_rate + cfg.error_rate:
+                status = 500
+
+        if status != 200:
+            body, content_type = f"status {status}".encode(), "text/plain; charset=utf-8"
+        self.server.stats.add(kind, status, len(body))
+        self._send(status, body, content_type, headers)
+
+    def _send(self, status: int, body: bytes, content_type: str,
+              headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def parse_id_ranges(value: str) -> list[tuple[int, int]]:
+    """«10-19,40» -> [(10, 19), (40, 40)]."""
+    ranges = []
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        first, _, last = part.partition("-")
+        ranges.append((int(first), int(last or first)))
+    return ranges
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Аргументы ReplayConfig — общие для сервера и bench_replay.py."""
+    parser.add_argument("--kennels", type=int, default=100, help="сколько питомников top-dog")
+    parser.add_argument("--dogs-per-kennel", type=int, default=10)
+    parser.add_argument("--catteries", type=int, default=100, help="сколько питомников top-cat")
+    parser.add_argument("--cats-per-cattery", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=20, help="ссылок на странице списка")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="медиана задержки ответа")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTS, default="fixed")
+    parser.add_argument(
+        "--latency-sigma", type=float, default=0.5,
+        help="разброс для lognormal (больше — длиннее хвост)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After у 429, секунд")
+    parser.add_argument(
+        "--errors-on-listing", action="store_true",
+        help="отдавать ошибки и на страницах списков",
+    )
+    parser.add_argument(
+        "--missing-ids", type=parse_id_ranges, default=[],
+        help="«удалённые» ID питомников, например 10-19,40 — ответ 404, в списках их нет",
+    )
+    parser.add_argument(
+        "--pagination", action="store_true",
+        help="добавлять на страницы списков блок пагинации со ссылкой на последнюю страницу",
+    )
+    parser.add_argument("--photo-variants", type=int, default=10,
+                        help="сколько разных картинок отдавать как фото питомников и собак")
+    parser.add_argument("--photo-kb", type=int, default=32, help="размер картинки, КБ")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора случайностей")
+
+
+def config_from_args(args: argparse.Namespace) -> ReplayConfig:
+    return ReplayConfig(
+        kennels=args.kennels,
+        dogs_per_kennel=args.dogs_per_kennel,
+        catteries=args.catteries,
+        cats_per_cattery=args.cats_per_cattery,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        errors_on_listing=args.errors_on_listing,
+        missing_ids=args.missing_ids,
+        pagination=args.pagination,
+        photo_variants=args.photo_variants,
+        photo_kb=args.photo_kb,
+        seed=args.seed,
+    )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Локальный стенд top-dog/top-cat")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = ReplayServer((args.host, args.port), config_from_args(args))
+    print(f"Стенд запущен: {server.base_url} (статистика: {server.base_url}/__stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats.snapshot(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
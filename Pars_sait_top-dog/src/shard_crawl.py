@@ -0,0 +1,317 @@
+"""
+Шардовый обход: один координатор и несколько воркеров (процессов или машин
+с общим диском), которые делят питомники через общую очередь WorkQueue.
+
+  координатор — обходит страницы списка и раскладывает найденные питомники
+                по шардам в файле очереди;
+  воркеры     — обычные parse_all.py / parse_all_topcat.py с --queue:
+                берут шард в аренду, обходят его питомники (и их собак/кошек)
+                в свой журнал, подтверждают; шард упавшего воркера по
+                истечении аренды отдаётся другому;
+  сборка      — журналы воркеров сливаются в один (повторы отбрасываются),
+                по нему строятся обычные Excel / Parquet / база.
+
+Всё на одной машине:
+    python shard_crawl.py run --workers 4 -- --rps 2 --concurrency 4
+
+Воркеры на других машинах (очередь на общем диске):
+    python shard_crawl.py enqueue --queue /mnt/crawl/topdog_queue.sqlite
+    python parse_all.py --queue /mnt/crawl/topdog_queue.sqlite --worker-id host1
+    python shard_crawl.py merge --queue /mnt/crawl/topdog_queue.sqlite
+
+С --discovery ids координатор ищет питомники не по страницам списка,
+а параллельным перебором ID (см. id_probe.py).
+
+Аргументы после «--» передаются каждому воркеру, поэтому --rps
+и --concurrency — на воркер: общий темп к сайту растёт с их числом.
+"""
+import argparse
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import parse_all
+from crawl_journal import CrawlJournal
+from extractors import extract_id_from_url
+from id_probe import IdRangeProbe, add_probe_arguments, probe_from_args
+from pagination import DEFAULT_LISTING_CONCURRENCY
+from work_queue import DEFAULT_LEASE, DEFAULT_SHARD_SIZE, WorkQueue
+
+HERE = Path(__file__).resolve().parent
+TOPCAT_SRC = HERE.parents[1] / "Pars_sait_top-cat" / "src"
+
+
+class TopDogSite:
+    name = "topdog"
+    script = HERE / "parse_all.py"
+    base_url = parse_all.BASE_URL
+    queue_path = parse_all.DATA_DIR / "topdog_queue.sqlite"
+    output = parse_all.DATA_DIR / "topdog_kennels_and_dogs.xlsx"
+    id_gaps = parse_all.DATA_DIR / "topdog_id_gaps.json"
+    # собака одна на весь обход, даже если её скачали воркеры разных питомников
+    unique_kinds = ("dog",)
+
+    def configure(self, args) -> None:
+        parse_all.limiter.configure(args.rps, args.burst)
+        parse_all.cache.configure(enabled=not args.no_cache)
+        parse_all.client.configure(
+            pool_size=max(args.probe_concurrency, args.listing_concurrency))
+
+    def links(self, args):
+        if args.discovery == "ids":
+            return probe_from_args(args, parse_all.kennel_exists,
+                                   args.base_url + "/kennels/{id}", "kennel")
+        return parse_all.iter_kennel_links(max_pages=args.max_pages, base_url=args.base_url,
+                                           concurrency=args.listing_concurrency)
+
+    def item_id(self, url: str) -> str:
+        return extract_id_from_url(url)
+
+    def export(self, journal: CrawlJournal, output: Path, parquet_dir, db, base_url) -> None:
+        parse_all.save_to_excel(journal, output)
+        if parquet_dir:
+            parse_all.open_parquet(parquet_dir, journal).close()
+        if db:
+            parse_all.open_db(db, journal).close()
+
+
+class TopCatSite:
+    name = "topcat"
+    script = TOPCAT_SRC / "parse_all_topcat.py"
+    base_url = "https://ru.top-cat.org"
+    queue_path = TOPCAT_SRC / "topcat_queue.sqlite"
+    output = TOPCAT_SRC / "topcat_catteries.xlsx"
+    id_gaps = TOPCAT_SRC / "topcat_id_gaps.json"
+    unique_kinds = ()
+
+    @property
+    def module(self):
+        if str(TOPCAT_SRC) not in sys.path:
+            sys.path.append(str(TOPCAT_SRC))
+        import parse_all_topcat
+        return parse_all_topcat
+
+    def configure(self, args) -> None:
+        self.module.limiter.configure(args.rps, args.burst)
+        self.module.cache.configure(enabled=not args.no_cache)
+        self.module.client.configure(
+            pool_size=max(args.probe_concurrency, args.listing_concurrency))
+
+    def links(self, args):
+        if args.discovery == "ids":
+            return probe_from_args(args, self.module.cattery_exists,
+                                   args.base_url + "/catteries/{id}", "cattery")
+        return self.module.iter_cattery_links(max_pages=args.max_pages, base_url=args.base_url,
+                                              concurrency=args.listing_concurrency)
+
+    def item_id(self, url: str) -> str:
+        return self.module.cattery_id(url)
+
+    def export(self, journal: CrawlJournal, output: Path, parquet_dir, db, base_url) -> None:
+        topcat = self.module
+        topcat.save_to_excel(
+            topcat.journal_rows(journal, base_url),
+            filename=output, cat_rows=journal.rows("cat"),
+        )
+        if parquet_dir:
+            topcat.close_parquet(topcat.open_parquet(parquet_dir, journal), journal, base_url)
+        if db:
+            sink = topcat.open_db(db, journal)
+            topcat.add_failed_catteries(sink, journal, base_url)
+            sink.close()
+
+
+SITES = {site.name: site for site in (TopDogSite(), TopCatSite())}
+
+
+def enqueue(site, queue: WorkQueue, args) -> int:
+    """Поиск питомников в очередь; по окончании — отметка, что ссылок больше не будет."""
+    links = site.links(args)
+    try:
+        added = queue.add(links, site.item_id, args.shard_size)
+    except Exception as e:
+        print(f"!! Ошибка при сборе ссылок: {e}")
+        added = 0
+    finally:
+        queue.close_discovery()
+    if isinstance(links, IdRangeProbe):
+        print(links.report())
+    return added
+
+
+def merge(site, queue: WorkQueue, output: Path, parquet_dir=None, db=None,
+          base_url: str | None = None) -> Path:
+    """
+    Журналы воркеров — в один журнал <очередь>.merged.sqlite, по нему —
+    выгрузки. Запись, сделанная двумя воркерами (шард выдавался повторно),
+    попадает в выгрузку один раз. Возвращает путь общего журнала.
+    """
+    merged = CrawlJournal(queue.path.with_name(f"{queue.path.stem}.merged.sqlite"))
+    try:
+        for path in queue.worker_journals():
+            if not path.exists():
+                print(f"  журнал {path} не найден — пропускаем")
+                continue
+            added = merged.merge_from(path, site.unique_kinds)
+            summary = ", ".join(f"{kind} {count}" for kind, count in sorted(added.items()))
+            print(f"  {path.name}: {summary or 'нового нет'}")
+        site.export(merged, output, parquet_dir, db, base_url or site.base_url)
+        merged.mark_finished()
+    finally:
+        merged.close()
+    return merged.path
+
+
+def start_workers(site, queue_path: Path, count: int, lease: float, base_url: str,
+                  resume: bool, worker_args: list[str]) -> list[subprocess.Popen]:
+    """count процессов-воркеров; вывод каждого — в <очередь>.<воркер>.log."""
+    procs = []
+    for n in range(1, count + 1):
+        worker = f"w{n}"
+        cmd = [
+            sys.executable, str(site.script),
+            "--queue", str(queue_path), "--worker-id", worker,
+            "--lease", str(lease), "--base-url", base_url,
+        ]
+        if resume:
+            cmd.append("--resume")
+        log = open(queue_path.with_name(f"{queue_path.stem}.{worker}.log"), "w", encoding="utf-8")
+        procs.append(subprocess.Popen(
+            cmd + worker_args, cwd=site.script.parent,
+            stdout=log, stderr=subprocess.STDOUT,
+        ))
+        log.close()
+    return procs
+
+
+def print_stats(queue: WorkQueue) -> None:
+    stats = queue.stats()
+    shards = ", ".join(f"{k} {v}" for k, v in sorted(stats["shards"].items())) or "нет"
+    items = ", ".join(f"{k} {v}" for k, v in sorted(stats["items"].items())) or "нет"
+    print(f"Шарды: {shards}; питомники: {items}; выдано повторно: {stats['redelivered']}")
+    print(f"Поиск ссылок {'закончен' if stats['discovery_finished'] else 'ещё идёт'}")
+
+
+def cmd_enqueue(site, args, worker_args) -> None:
+    site.configure(args)
+    queue = WorkQueue(args.queue, lease=args.lease, reset=not args.resume)
+    queue.reopen_discovery()
+    try:
+        added = enqueue(site, queue, args)
+        print(f"В очередь добавлено: {added}")
+        print_stats(queue)
+    finally:
+        queue.close()
+
+
+def cmd_merge(site, args, worker_args) -> None:
+    queue = WorkQueue(args.queue, lease=args.lease)
+    try:
+        if queue.unfinished():
+            print(f"!! В очереди ещё {queue.unfinished()} необработанных шардов")
+        merge(site, queue, args.output, args.parquet_dir, args.db, args.base_url)
+    finally:
+        queue.close()
+    print(f"Готово! Файл сохранён: {args.output}")
+
+
+def cmd_status(site, args, worker_args) -> None:
+    queue = WorkQueue(args.queue, lease=args.lease)
+    try:
+        print_stats(queue)
+    finally:
+        queue.close()
+
+
+def cmd_run(site, args, worker_args) -> None:
+    """Поиск ссылок, воркеры и сборка на этой машине — всё сразу."""
+    if args.parquet_dir and not parse_all.parquet_available():
+        raise SystemExit("Для --parquet-dir нужен pyarrow: pip install pyarrow")
+    site.configure(args)
+    t0 = time.perf_counter()
+    queue = WorkQueue(args.queue, lease=args.lease, reset=not args.resume)
+    queue.reopen_discovery()
+    try:
+        # Воркеры стартуют сразу и разбирают шарды, пока идёт пагинация
+        discovery = threading.Thread(
+            target=enqueue, name="discovery", args=(site, queue, args),
+        )
+        discovery.start()
+        procs = start_workers(site, queue.path, args.workers, args.lease,
+                              args.base_url, args.resume, worker_args)
+        discovery.join()
+        codes = [proc.wait() for proc in procs]
+        crawled = time.perf_counter() - t0
+        failed = [f"w{n}" for n, code in enumerate(codes, 1) if code]
+        if failed:
+            print(f"!! Воркеры завершились с ошибкой: {', '.join(failed)} (см. *.log рядом с очередью)")
+        print_stats(queue)
+        print("Сборка выгрузки:")
+        merge(site, queue, args.output, args.parquet_dir, args.db, args.base_url)
+    finally:
+        queue.close()
+    print(f"\nГотово! Файл сохранён: {args.output}")
+    print(f"Воркеров {args.workers}: обход {crawled:.1f} c, "
+          f"всего с выгрузкой {time.perf_counter() - t0:.1f} c")
+
+
+COMMANDS = {"run": cmd_run, "enqueue": cmd_enqueue, "merge": cmd_merge, "status": cmd_status}
+
+
+def parse_args(argv=None) -> tuple[argparse.Namespace, list[str]]:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    worker_args: list[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, worker_args = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(
+        description="Шардовый обход: координатор и воркеры с общей очередью",
+        epilog="Аргументы после «--» передаются каждому воркеру.",
+    )
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--site", choices=sorted(SITES), default="topdog")
+    parser.add_argument("--queue", type=Path, default=None,
+                        help="файл очереди (SQLite); у воркеров на других машинах — на общем диске")
+    parser.add_argument("--workers", type=int, default=4, help="сколько воркеров запустить (run)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                        help="питомников в одном шарде")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE,
+                        help="аренда шарда, секунды: столько ждать, прежде чем отдать шард упавшего воркера другому")
+    parser.add_argument("--resume", action="store_true",
+                        help="не очищать очередь и журналы воркеров — продолжить прерванный обход")
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="ограничить число страниц списка питомников")
+    parser.add_argument("--listing-concurrency", type=int, default=DEFAULT_LISTING_CONCURRENCY,
+                        help="сколько страниц списка скачивать одновременно")
+    add_probe_arguments(parser, default_gaps=None)
+    parser.add_argument("--base-url", default=None, help="адрес сайта (для replay_server.py)")
+    parser.add_argument("--rps", type=float, default=parse_all.REQUESTS_PER_SECOND,
+                        help="лимит запросов в секунду для страниц списка у координатора")
+    parser.add_argument("--burst", type=int, default=parse_all.RATE_BURST,
+                        help="сколько запросов координатор может сделать подряд без ожидания")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="координатору не брать страницы списка из кэша")
+    parser.add_argument("--output", type=Path, default=None, help="куда сохранить итоговый Excel")
+    parser.add_argument("--parquet-dir", type=Path, default=None,
+                        help="собрать ещё и Parquet в этот каталог (нужен pyarrow)")
+    parser.add_argument("--db", type=Path, default=None, help="собрать ещё и базу SQLite")
+    args = parser.parse_args(argv)
+
+    site = SITES[args.site]
+    args.queue = args.queue or site.queue_path
+    args.output = args.output or site.output
+    args.id_gaps = args.id_gaps or site.id_gaps
+    args.base_url = (args.base_url or site.base_url).rstrip("/")
+    return args, worker_args
+
+
+def main(argv=None):
+    args, worker_args = parse_args(argv)
+    COMMANDS[args.command](SITES[args.site], args, worker_args)
+
+
+if __name__ == "__main__":
+    main()
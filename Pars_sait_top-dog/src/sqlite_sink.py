@@ -0,0 +1,278 @@
+"""
+База SQLite с результатами обхода: таблицы с ключами и индексами,
+запись upsert'ами из фонового потока пачками.
+
+Повторная выгрузка из базы без обхода:
+
+    python sqlite_sink.py ../data/topdog.db --excel topdog.xlsx
+    python sqlite_sink.py ../data/topdog.db --csv csv_dir
+"""
+import argparse
+import csv
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from excel_stream import StreamingExcelWriter
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class SinkTable:
+    """
+    Описание таблицы базы:
+      key        — колонки первичного ключа (по ним upsert);
+      ints       — колонки типа INTEGER (ID, счётчики), остальные TEXT;
+      indexes    — колонки, по которым строятся индексы для поиска;
+      references — колонка -> таблица, на чей первичный ключ она ссылается.
+    """
+
+    def __init__(self, name: str, columns: list[str], key: tuple[str, ...],
+                 ints=(), indexes=(), references: dict[str, str] | None = None):
+        self.name = name
+        self.columns = list(columns)
+        self.key = tuple(key)
+        self.ints = tuple(c for c in ints if c in self.columns)
+        self.indexes = tuple(indexes)
+        self.references = dict(references or {})
+
+    def ddl(self, tables: dict[str, "SinkTable"]) -> list[str]:
+        cols = [
+            f"{c} {'INTEGER' if c in self.ints else 'TEXT'}"
+            + (" NOT NULL" if c in self.key else "")
+            for c in self.columns
+        ]
+        cols.append(f"PRIMARY KEY ({', '.join(self.key)})")
+        for col, target in self.references.items():
+            target_key = ", ".join(tables[target].key)
+            cols.append(f"FOREIGN KEY ({col}) REFERENCES {target} ({target_key})")
+        statements = [f"CREATE TABLE IF NOT EXISTS {self.name} (\n    "
+                      + ",\n    ".join(cols) + "\n)"]
+        for col in self.indexes:
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {self.name}_{col} ON {self.name} ({col})"
+            )
+        return statements
+
+    def upsert_sql(self) -> str:
+        names = ", ".join(self.columns)
+        marks = ", ".join("?" for _ in self.columns)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.columns if c not in self.key)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        return (f"INSERT INTO {self.name} ({names}) VALUES ({marks}) "
+                f"ON CONFLICT ({', '.join(self.key)}) {action}")
+
+    def values(self, row: dict) -> tuple:
+        out = []
+        for col in self.columns:
+            value = row.get(col)
+            if col in self.ints and value is not None and not isinstance(value, int):
+                text = str(value).strip()
+                value = int(text) if text.isdigit() else None
+            out.append(value)
+        return tuple(out)
+
+
+class SqliteSink:
+    """
+    Запись строк в SQLite из фонового потока.
+
+    upsert() только кладёт строку в очередь и сразу возвращается, поэтому
+    обход не ждёт диска. Поток-писатель собирает строки в пачки
+    (batch_size строк или flush_interval секунд) и пишет каждую пачку
+    одной транзакцией через INSERT ... ON CONFLICT DO UPDATE — повторный
+    обход обновляет строки, а не дублирует их.
+
+    Внешние ключи (dogs.kennel_id -> kennels) объявлены в схеме, но при
+    загрузке не проверяются: питомник попадает в журнал после своих собак.
+    Целостность после обхода — foreign_key_violations(path).
+    """
+
+    def __init__(self, path: Path, tables: list[SinkTable],
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.tables = {t.name: t for t in tables}
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._sql = {t.name: t.upsert_sql() for t in tables}
+        self._queue: queue.Queue = queue.Queue(maxsize=self.batch_size * 20)
+        self._error: BaseException | None = None
+
+        # timeout: в одну базу могут писать несколько воркеров шардового обхода
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for table in tables:
+                for statement in table.ddl(self.tables):
+                    conn.execute(statement)
+                # база, созданная до появления новых колонок
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table.name})")}
+                for col in table.columns:
+                    if col not in existing:
+                        kind = "INTEGER" if col in table.ints else "TEXT"
+                        conn.execute(f"ALTER TABLE {table.name} ADD COLUMN {col} {kind}")
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._run, name="sqlite-sink", daemon=True)
+        self._thread.start()
+
+    def upsert(self, table: str, row: dict) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Запись в базу {self.path} остановлена") from self._error
+        self._queue.put((table, self.tables[table].values(row)))
+
+    def flush(self) -> None:
+        """Ждёт, пока всё, что уже в очереди, окажется в базе."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Запись в базу {self.path} не удалась") from self._error
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        batch: dict[str, list[tuple]] = {}
+        pending = 0
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = False  # вышло время — сбрасываем пачку
+
+                if isinstance(item, tuple):
+                    batch.setdefault(item[0], []).append(item[1])
+                    pending += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if pending < self.batch_size:
+                        continue
+
+                if pending:
+                    with conn:
+                        for table, rows in batch.items():
+                            conn.executemany(self._sql[table], rows)
+                    self.rows_written += pending
+                    batch.clear()
+                    pending = 0
+                deadline = None
+
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is None:
+                    break
+        except BaseException as e:
+            self._error = e
+            # Не даём обходу повиснуть на полной очереди или на flush()
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    item.set()
+        finally:
+            conn.close()
+
+
+def foreign_key_violations(db_path: Path) -> list[tuple]:
+    """Строки, ссылающиеся на отсутствующие записи: (таблица, rowid, куда)."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return [row[:3] for row in conn.execute("PRAGMA foreign_key_check")]
+    finally:
+        conn.close()
+
+
+def table_names(conn: sqlite3.Connection) -> list[str]:
+    return [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+    )]
+
+
+def iter_table(conn: sqlite3.Connection, table: str):
+    """Колонки и курсор по строкам таблицы в порядке первичного ключа."""
+    info = list(conn.execute(f"PRAGMA table_info({table})"))
+    columns = [row[1] for row in info]
+    # row[5] — номер колонки в первичном ключе (0 — не входит)
+    key = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+    cur = conn.execute(f"SELECT * FROM {table} ORDER BY {', '.join(key) or 'rowid'}")
+    return columns, cur
+
+
+def export_excel(db_path: Path, output: Path) -> dict[str, int]:
+    """Все таблицы базы — листами одного Excel, потоково."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    counts = {}
+    try:
+        with StreamingExcelWriter(output) as writer:
+            for table in table_names(conn):
+                columns, cur = iter_table(conn, table)
+                writer.add_sheet(table, columns)
+                counts[table] = writer.write_rows(table, (dict(zip(columns, r)) for r in cur))
+    finally:
+        conn.close()
+    return counts
+
+
+def export_csv(db_path: Path, directory: Path) -> dict[str, int]:
+    """Каждая таблица базы — в <directory>/<таблица>.csv (UTF-8 с BOM для Excel)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    counts = {}
+    try:
+        for table in table_names(conn):
+            columns, cur = iter_table(conn, table)
+            with open(directory / f"{table}.csv", "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                count = 0
+                for row in cur:
+                    writer.writerow(row)
+                    count += 1
+            counts[table] = count
+    finally:
+        conn.close()
+    return counts
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Выгрузка базы обхода в Excel или CSV")
+    parser.add_argument("db", type=Path, help="файл базы (--db парсера)")
+    parser.add_argument("--excel", type=Path, default=None, help="сохранить все таблицы в Excel")
+    parser.add_argument("--csv", type=Path, default=None, help="каталог для <таблица>.csv")
+    args = parser.parse_args(argv)
+    if not args.excel and not args.csv:
+        parser.error("нужен --excel и/или --csv")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.excel:
+        counts = export_excel(args.db, args.excel)
+        print(f"Excel сохранён: {args.excel} {counts}")
+    if args.csv:
+        counts = export_csv(args.db, args.csv)
+        print(f"CSV сохранены в {args.csv} {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    shard_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    items       TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_until);
+CREATE TABLE IF NOT EXISTS items (
+    item_id  TEXT PRIMARY KEY,
+    shard_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker     TEXT PRIMARY KEY,
+    journal    TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+DEFAULT_SHARD_SIZE = 20
+DEFAULT_LEASE = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class Shard:
+    """Выданная воркеру пачка: ссылки items и номер выдачи attempt."""
+
+    __slots__ = ("shard_id", "items", "attempt", "worker")
+
+    def __init__(self, shard_id: int, items: list[str], attempt: int, worker: str):
+        self.shard_id = shard_id
+        self.items = items
+        self.attempt = attempt
+        self.worker = worker
+
+    def __repr__(self):
+        return f"Shard({self.shard_id}, {len(self.items)} шт., выдача {self.attempt})"
+
+
+class WorkQueue:
+    """
+    Общая очередь работы для нескольких процессов (и машин с общим диском)
+    в файле SQLite.
+
+    Координатор складывает найденные ссылки (питомники) пачками — шардами
+    по shard_size; ID, уже лежащий в очереди, второй раз не добавляется.
+    Воркер берёт шард в аренду (lease) на lease секунд, продлевает её, пока
+    работает (heartbeat), и подтверждает (ack). Шард, аренда которого
+    истекла — воркер упал или завис, — выдаётся снова другому воркеру;
+    после max_attempts выдач он считается неудачным (failed).
+    Подтверждение от воркера, потерявшего аренду, не принимается.
+
+    Кроме шардов в очереди записано, где журнал каждого воркера, —
+    по ним координатор собирает общую выгрузку.
+    """
+
+    def __init__(self, path: Path, lease: float = DEFAULT_LEASE,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, reset: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if reset:
+            for suffix in ("", "-wal", "-shm"):
+                side = self.path.with_name(self.path.name + suffix)
+                if side.exists():
+                    side.unlink()
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # isolation_level=None: транзакции открываются явно (BEGIN IMMEDIATE),
+        # чтобы выдача шарда была атомарной между процессами
+        self.conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False,
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _write(self, func):
+        """func(conn) в одной транзакции записи."""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    # --- координатор ---
+
+    def add(self, urls: Iterable[str], key, shard_size: int = DEFAULT_SHARD_SIZE) -> int:
+        """
+        Раскладывает ссылки по шардам (key(url) — ID элемента) и возвращает,
+        сколько новых добавлено. Шард уходит в очередь, как только набран,
+        так что воркеры начинают, пока координатор ещё ищет ссылки.
+        """
+        added = 0
+        batch: list[tuple[str, str]] = []
+        for url in urls:
+            batch.append((key(url), url))
+            if len(batch) >= shard_size:
+                added += self._add_shard(batch)
+                batch = []
+        if batch:
+            added += self._add_shard(batch)
+        return added
+
+    def _add_shard(self, batch: list[tuple[str, str]]) -> int:
+        def insert(conn):
+            now = time.time()
+            cur = conn.execute(
+                "INSERT INTO shards (items, updated_at) VALUES ('[]', ?)", (now,),
+            )
+            shard_id = cur.lastrowid
+            fresh = []
+            for item_id, url in batch:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO items (item_id, shard_id) VALUES (?, ?)",
+                    (item_id, shard_id),
+                )
+                if cur.rowcount:
+                    fresh.append(url)
+            if fresh:
+                conn.execute(
+                    "UPDATE shards SET items = ? WHERE shard_id = ?",
+                    (json.dumps(fresh, ensure_ascii=False), shard_id),
+                )
+            else:
+                conn.execute("DELETE FROM shards WHERE shard_id = ?", (shard_id,))
+            return len(fresh)
+        return self._write(insert)
+
+    def _set_meta(self, key: str, value: str | None) -> None:
+        self._write(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value),
+        ))
+
+    def _get_meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def close_discovery(self) -> None:
+        """Ссылок больше не будет: воркеры, разобрав очередь, завершаются."""
+        self._set_meta("discovery_finished", str(time.time()))
+
+    def reopen_discovery(self) -> None:
+        self._set_meta("discovery_finished", None)
+
+    @property
+    def discovery_finished(self) -> bool:
+        return self._get_meta("discovery_finished") is not None
+
+    # --- воркер ---
+
+    def register_worker(self, worker: str, journal: Path) -> None:
+        self._write(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO workers (worker, journal, started_at) VALUES (?, ?, ?)",
+            (worker, str(Path(journal).resolve()), time.time()),
+        ))
+
+    def worker_journals(self) -> list[Path]:
+        """Журналы воркеров в порядке регистрации."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT journal FROM workers ORDER BY started_at, worker"
+            ).fetchall()
+        return [Path(journal) for (journal,) in rows]
+
+    def lease_shard(self, worker: str) -> Shard | None:
+        """
+        Берёт в аренду свободный шард или шард с истёкшей арендой.
+        None — сейчас выдать нечего (но работа может появиться позже).
+        """
+        def take(conn):
+            now = time.time()
+            # шарды, исчерпавшие попытки, больше не выдаются
+            conn.execute(
+                "UPDATE shards SET status = 'failed', worker = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT shard_id, items, attempts FROM shards "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY shard_id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            shard_id, items, attempts = row
+            conn.execute(
+                "UPDATE shards SET status = 'leased', worker = ?, lease_until = ?, "
+                "attempts = ?, updated_at = ? WHERE shard_id = ?",
+                (worker, now + self.lease, attempts + 1, now, shard_id),
+            )
+            return Shard(shard_id, json.loads(items), attempts + 1, worker)
+        return self._write(take)
+
+    def _update_leased(self, shard: Shard, sql: str, params: tuple) -> bool:
+        """UPDATE шарда, только если аренда всё ещё у этого воркера."""
+        def update(conn):
+            cur = conn.execute(
+                sql + " WHERE shard_id = ? AND status = 'leased' AND worker = ? AND attempts = ?",
+                params + (shard.shard_id, shard.worker, shard.attempt),
+            )
+            return cur.rowcount == 1
+        return self._write(update)
+
+    def renew(self, shard: Shard) -> bool:
+        """Продлевает аренду; False — аренда потеряна (шард отдан другому)."""
+        now = time.time()
+        return self._update_leased(
+            shard, "UPDATE shards SET lease_until = ?, updated_at = ?",
+            (now + self.lease, now),
+        )
+
+    def ack(self, shard: Shard) -> bool:
+        """Шард обработан. False — аренда была потеряна, подтверждение не принято."""
+        return self._update_leased(
+            shard, "UPDATE shards SET status = 'done', lease_until = NULL, updated_at = ?",
+            (time.time(),),
+        )
+
+    def fail(self, shard: Shard, error: str) -> bool:
+        """Вернуть шард в очередь (или в failed, если попытки кончились)."""
+        status = "failed" if shard.attempt >= self.max_attempts else "pending"
+        return self._update_leased(
+            shard, "UPDATE shards SET status = ?, worker = NULL, lease_until = NULL, "
+                   "error = ?, updated_at = ?",
+            (status, error, time.time()),
+        )
+
+    def heartbeat(self, shard: Shard) -> "Heartbeat":
+        return Heartbeat(self, shard)
+
+    def unfinished(self) -> int:
+        """Шарды, которые ещё могут быть обработаны: свободные и в аренде."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE status IN ('pending', 'leased')"
+            ).fetchone()[0]
+
+    def iter_shards(self, worker: str, poll: float = 0.25) -> Iterator[Shard]:
+        """
+        Шарды для воркера по одному, пока координатор не закончит поиск
+        и все шарды не будут обработаны. Пока чужие шарды в аренде, воркер
+        ждёт: если их владелец упадёт, они вернутся в очередь.
+        Подтверждать шард (ack/fail) — дело вызывающего.
+        """
+        while True:
+            shard = self.lease_shard(worker)
+            if shard is not None:
+                yield shard
+                continue
+            if self.discovery_finished and not self.unfinished():
+                return
+            time.sleep(poll)
+
+    def consume(self, worker: str, process, poll: float = 0.25) -> int:
+        """
+        Цикл воркера: process(items) на каждом шарде под heartbeat, затем ack.
+        Если process упал, шард возвращается в очередь, исключение
+        пробрасывается дальше. Возвращает число подтверждённых шардов.
+        """
+        done = 0
+        for shard in self.iter_shards(worker, poll):
+            print(f"[{worker}] шард {shard.shard_id}: {len(shard.items)} шт., выдача {shard.attempt}")
+            with self.heartbeat(shard) as beat:
+                try:
+                    process(shard.items)
+                except Exception as e:
+                    self.fail(shard, str(e))
+                    raise
+            if beat.lost or not self.ack(shard):
+                # шард уже у другого воркера — записи останутся в обоих
+                # журналах, при сборке выгрузки повтор отбрасывается
+                print(f"[{worker}] аренда шарда {shard.shard_id} потеряна")
+                continue
+            done += 1
+        return done
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*), COALESCE(SUM(json_array_length(items)), 0) "
+                "FROM shards GROUP BY status"
+            ).fetchall()
+            redelivered = self.conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE attempts > 1"
+            ).fetchone()[0]
+        result = {
+            "shards": {status: count for status, count, _ in rows},
+            "items": {status: items for status, _, items in rows},
+            "redelivered": redelivered,
+        }
+        result["discovery_finished"] = self.discovery_finished
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+class Heartbeat:
+    """
+    Продлевает аренду шарда в фоновом потоке, пока идёт обработка:
+
+        with queue.heartbeat(shard) as beat:
+            ...
+        beat.lost  # True, если аренду всё-таки отобрали
+    """
+
+    def __init__(self, queue: WorkQueue, shard: Shard, interval: float | None = None):
+        self.queue = queue
+        self.shard = shard
+        self.interval = interval if interval is not None else queue.lease / 3
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self.queue.renew(self.shard):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()